@@ -0,0 +1,92 @@
+"""
+Streaming exports of whole querysets, rendered as NDJSON or CSV.
+"""
+import csv
+import json
+
+from django.db.models import prefetch_related_objects
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+class Echo:
+    """
+    File-like object that returns what is written, so csv.writer can be used to stream rows.
+    """
+
+    def write(self, value):
+        return value
+
+
+def iterate_in_chunks(queryset, chunk_size):
+    """
+    Iterate the queryset with a server-side cursor, yielding lists of up to `chunk_size`
+    instances with the prefetch lookups of the queryset done for each list.
+    """
+    lookups = queryset._prefetch_related_lookups
+    chunk = []
+
+    for instance in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(instance)
+
+        if len(chunk) == chunk_size:
+            prefetch_related_objects(chunk, *lookups)
+            yield chunk
+            chunk = []
+
+    if chunk:
+        prefetch_related_objects(chunk, *lookups)
+        yield chunk
+
+
+def render_ndjson(fields, rows):
+    for row in rows:
+        yield json.dumps(row, cls=JSONEncoder, ensure_ascii=False) + '\n'
+
+
+def render_csv(fields, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+
+    for row in rows:
+        # Nested objects and lists are written as JSON
+        yield writer.writerow([
+            json.dumps(value, cls=JSONEncoder, ensure_ascii=False)
+            if isinstance(value, (dict, list)) else value
+            for value in (row[field] for field in fields)
+        ])
+
+
+RENDERERS = {
+    'ndjson': render_ndjson,
+    'csv': render_csv,
+}
+
+
+def export_response(queryset, get_serializer, export_format, filename, chunk_size):
+    """
+    Return a StreamingHttpResponse with every instance of the queryset serialized with
+    `get_serializer(instances, many=True)`, in `export_format`.
+    """
+    if export_format not in RENDERERS:
+        raise ValidationError({
+            'export_format': [f'Must be one of: {", ".join(RENDERERS)}.']
+        })
+
+    fields = list(get_serializer([], many=True).child.fields)
+
+    def rows():
+        for chunk in iterate_in_chunks(queryset, chunk_size):
+            yield from get_serializer(chunk, many=True).data
+
+    response = StreamingHttpResponse(RENDERERS[export_format](fields, rows()),
+                                     content_type=EXPORT_CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+
+    return response
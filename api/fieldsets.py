@@ -0,0 +1,129 @@
+"""
+Sparse fieldsets: `?fields=` and `?exclude=` query parameters to choose the fields of the
+list, retrieve and export responses, with a queryset that only loads what those fields need.
+"""
+from collections import OrderedDict
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import RelatedField
+
+READ_ACTIONS = ('list', 'retrieve', 'export')
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Only keep the serializer fields named in the `fieldset` entry of the context.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.context.get('fieldset')
+
+        if fieldset is None:
+            return fields
+
+        return OrderedDict((name, field) for name, field in fields.items() if name in fieldset)
+
+
+class SparseFieldsetViewSetMixin:
+    """
+    Read the `fields`/`exclude` query parameters of the read actions and project the
+    queryset on them: only the needed columns are loaded, and relations are only
+    joined or prefetched when a requested field uses them.
+
+    The columns and relations of each field are taken from its source. Fields without
+    a model source, like method fields, declare them in `fieldset_sources`, and the ones
+    every instance needs go in `fieldset_required`.
+    """
+    fields_param = 'fields'
+    exclude_param = 'exclude'
+    fieldset_sources = {}
+    fieldset_required = ()
+
+    def get_fieldset(self):
+        """
+        Return the names of the requested fields, or None if every field is requested.
+        """
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = self._get_fieldset()
+
+        return self._fieldset
+
+    def _get_fieldset(self):
+        if self.action not in READ_ACTIONS:
+            return None
+
+        fields = self._get_param_names(self.fields_param)
+        exclude = self._get_param_names(self.exclude_param)
+
+        if not fields and not exclude:
+            return None
+
+        available = list(self.get_serializer_class()().fields)
+        unknown = [name for name in fields + exclude if name not in available]
+
+        if unknown:
+            raise ValidationError({
+                'fields': [f'Unknown fields: {", ".join(unknown)}.']
+            })
+
+        return [name for name in available
+                if (not fields or name in fields) and name not in exclude]
+
+    def _get_param_names(self, param):
+        value = self.request.query_params.get(param, '')
+        return [name.strip() for name in value.split(',') if name.strip()]
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fieldset'] = self.get_fieldset()
+
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fieldset = self.get_fieldset()
+
+        if fieldset is None:
+            return queryset
+
+        return self.project_queryset(queryset, fieldset)
+
+    def project_queryset(self, queryset, fieldset):
+        opts = queryset.model._meta
+        serializer_fields = self.get_serializer_class()().fields
+        only, select_related, prefetch_related = set(), set(), set()
+
+        def add_source(source, related_object):
+            model_field = opts.get_field(source)
+
+            if model_field.many_to_many or model_field.one_to_many:
+                prefetch_related.add(source)
+                return
+
+            only.add(source)
+            if model_field.many_to_one and related_object:
+                select_related.add(source)
+
+        for source in self.fieldset_required:
+            add_source(source, True)
+
+        for name in fieldset:
+            if name in self.fieldset_sources:
+                for source in self.fieldset_sources[name]:
+                    add_source(source, True)
+                continue
+
+            field = serializer_fields[name]
+            if field.source != '*':
+                # Primary key fields only need the foreign key column
+                add_source(field.source.split('.')[0], not isinstance(field, RelatedField))
+
+        queryset = queryset.select_related(None).prefetch_related(None).only(*only)
+
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+
+        return queryset
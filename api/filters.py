@@ -1,15 +1,54 @@
+import operator
+import re
+from functools import reduce
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import Func, Q, Subquery, TextField
 from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter, SearchFilter
 
 from video.models import Media, LiveVideo, LiveVideoCut
 
 
-class MediaFilter(filters.FilterSet):
+class TagsFilterSet(filters.FilterSet):
+    """
+    Filter by a comma separated list of tag names, matched against the denormalized
+    `tag_names` of the videos so any number of tags is a single indexed condition.
+    `tags_mode` selects whether the videos need all of the tags (default) or any of them.
+    """
+    ALL = 'all'
+    ANY = 'any'
+    TAGS_MODE_CHOICES = (
+        (ALL, ALL),
+        (ANY, ANY),
+    )
+
+    tags = filters.CharFilter(method='tags_filter')
+    tags_mode = filters.ChoiceFilter(choices=TAGS_MODE_CHOICES, method='tags_mode_filter')
+
+    def tags_filter(self, queryset, name, value):
+        tags_list = [tag for tag in value.split(',') if tag]
+
+        if not tags_list:
+            return queryset
+
+        if self.form.cleaned_data.get('tags_mode') == self.ANY:
+            return queryset.filter(tag_names__overlap=tags_list)
+
+        return queryset.filter(tag_names__contains=tags_list)
+
+    def tags_mode_filter(self, queryset, name, value):
+        # Only changes how `tags` is applied
+        return queryset
+
+
+class MediaFilter(TagsFilterSet):
     NOT_FINISHED = (Media.State.NOT_FINISHED, Media.State.NOT_FINISHED)
     FAILED = (Media.State.FAILED, Media.State.FAILED)
     state_choices = Media.State.CHOICES + (NOT_FINISHED, FAILED)
 
     state = filters.MultipleChoiceFilter(choices=state_choices, method='state_filter')
-    tags = filters.CharFilter(method='tags_filter')
     video_ids = filters.CharFilter(method='video_ids_filter')
 
     class Meta:
@@ -26,14 +65,6 @@ class MediaFilter(filters.FilterSet):
             'media_type'
         )
 
-    def tags_filter(self, queryset, value, *args, **kwargs):
-        tags_list = args[0].split(',')
-
-        for tag in tags_list:
-            queryset = queryset.filter(tags__name=tag)
-
-        return queryset
-
     def video_ids_filter(self, queryset, value, *args, **kwargs):
         video_ids_list = args[0].split(",")
         queryset = queryset.filter(video_id__in=video_ids_list)
@@ -54,9 +85,8 @@ class MediaFilter(filters.FilterSet):
         return queryset
 
 
-class LiveVideoFilter(filters.FilterSet):
+class LiveVideoFilter(TagsFilterSet):
     state = filters.MultipleChoiceFilter(choices=LiveVideo.State.CHOICES, method='state_filter')
-    tags = filters.CharFilter(method='tags_filter')
 
     class Meta:
         model = LiveVideo
@@ -70,14 +100,6 @@ class LiveVideoFilter(filters.FilterSet):
             'tags'
         )
 
-    def tags_filter(self, queryset, value, *args, **kwargs):
-        tags_list = args[0].split(',')
-
-        for tag in tags_list:
-            queryset = queryset.filter(tags__name=tag)
-
-        return queryset
-
     def state_filter(self, queryset, name, value):
         queryset = queryset.filter(state__in=value)
         return queryset
@@ -98,3 +120,105 @@ class LiveVideoCutsFilter(filters.FilterSet):
     def state_filter(self, queryset, name, value):
         queryset = queryset.filter(state__in=value)
         return queryset
+
+
+class TagNamesText(Func):
+    """
+    The denormalized `tag_names` of a video as a single string. The function is created
+    in migration video.0004_search, and indexed with pg_trgm.
+    """
+    function = 'video_tag_names_text'
+    output_field = TextField()
+
+
+class VideoSearchFilter(SearchFilter):
+    """
+    Search of media and live videos over the `search_fields` of the view, with the same
+    matches as SearchFilter but with conditions that can use the trigram indexes and
+    without joins, so the results don't need a DISTINCT:
+        - `video_id` is compared by equality when the term is a whole UUID, other
+          terms, e.g. part of an id or a custom id, use the lookup of the field
+        - `tags__name` is matched against the denormalized `tag_names`
+        - Foreign key lookups, e.g. `created_by__username`, are matched with a subquery
+          on the related model, limited to the organization of the user
+    Results are ordered by full text relevance of the name and tags, with the ordering of
+    the view as tiebreaker, only when no `ordering` is requested. Databases other than
+    PostgreSQL use SearchFilter.
+    """
+    denormalized_fields = {
+        'tags__name': 'search_tag_names',
+    }
+    rank_fields = (
+        ('name', 'A'),
+        ('search_tag_names', 'B'),
+    )
+    # Fields holding generated UUIDs
+    uuid_fields = ('video_id',)
+    uuid_regex = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.I)
+
+    def filter_queryset(self, request, queryset, view):
+        if connections[queryset.db].vendor != 'postgresql':
+            return super().filter_queryset(request, queryset, view)
+
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+
+        if not search_fields or not search_terms:
+            return queryset
+
+        queryset = queryset.annotate(search_tag_names=TagNamesText('tag_names'))
+
+        for search_term in search_terms:
+            queries = [
+                self.get_term_query(request, queryset.model, str(search_field), search_term)
+                for search_field in search_fields
+            ]
+            queryset = queryset.filter(reduce(operator.or_, queries))
+
+        if self.has_ordering_param(request, view):
+            return queryset
+
+        vector = reduce(operator.add, [SearchVector(field, weight=weight, config='simple')
+                                       for field, weight in self.rank_fields])
+        query = SearchQuery(' '.join(search_terms), config='simple')
+        ordering = getattr(view, 'ordering', None) or ()
+
+        return queryset.annotate(search_rank=SearchRank(vector, query)) \
+            .order_by('-search_rank', *ordering)
+
+    def has_ordering_param(self, request, view):
+        """
+        Whether the client requested an ordering through an OrderingFilter of the view.
+        """
+        return any(request.query_params.get(backend.ordering_param)
+                   for backend in getattr(view, 'filter_backends', ())
+                   if issubclass(backend, OrderingFilter))
+
+    def get_term_query(self, request, model, search_field, search_term):
+        """
+        Return the condition of a search field for a term.
+        """
+        orm_lookup = self.construct_search(search_field)
+        field_name, lookup = orm_lookup.rsplit('__', 1)
+        parts = field_name.split('__')
+
+        if field_name in self.uuid_fields and self.uuid_regex.match(search_term):
+            return Q(**{field_name: search_term.lower()})
+
+        if field_name in self.denormalized_fields and lookup == 'icontains':
+            return Q(**{f'{self.denormalized_fields[field_name]}__{lookup}': search_term})
+
+        if len(parts) == 1:
+            return Q(**{orm_lookup: search_term})
+
+        field = model._meta.get_field(parts[0])
+        related_lookup = '__'.join(parts[1:] + [lookup])
+
+        if field.many_to_one:
+            related = field.related_model.objects.filter(**{related_lookup: search_term})
+            if any(f.name == 'organization' for f in field.related_model._meta.fields):
+                related = related.filter(organization_id=request.user.organization_id)
+            return Q(**{f'{field.name}__in': Subquery(related.values('pk'))})
+
+        # Other relations are matched with a subquery, which doesn't duplicate the rows
+        return Q(pk__in=model.objects.filter(**{orm_lookup: search_term}).values('pk'))
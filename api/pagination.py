@@ -1,5 +1,5 @@
 from django.core.paginator import Paginator, Page, InvalidPage, EmptyPage
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from collections import OrderedDict
 
 from rest_framework.response import Response
@@ -74,3 +74,49 @@ class PageNumberPaginationWithoutCount(PageNumberPagination):
         ])
 
         return Response(response)
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Cursor pagination over the newest first listings. The cursor is the `created_at` of
+    the boundary row, so every page is an index range scan on
+    (organization_id, created_at, id) no matter how deep it is.
+    """
+    ordering = ('-created_at', '-id')
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    """
+    Page number pagination by default. Requests with `?pagination=cursor`, or that
+    follow a `cursor` link, are paginated with `cursor_pagination_class` instead.
+    """
+    cursor_pagination_class = CreatedAtCursorPagination
+    cursor_paginator = None
+
+    def use_cursor(self, request):
+        return request.query_params.get('pagination') == 'cursor' or \
+            self.cursor_pagination_class.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+
+        return super(PageNumberOrCursorPagination, self).paginate_queryset(queryset, request,
+                                                                           view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator:
+            return self.cursor_paginator.get_paginated_response(data)
+
+        return super(PageNumberOrCursorPagination, self).get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.cursor_paginator:
+            return self.cursor_paginator.get_html_context()
+
+        return super(PageNumberOrCursorPagination, self).get_html_context()
+
+    def get_schema_fields(self, view):
+        fields = super(PageNumberOrCursorPagination, self).get_schema_fields(view)
+        return fields + self.cursor_pagination_class().get_schema_fields(view)
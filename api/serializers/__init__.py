@@ -2,7 +2,8 @@ from .auth import AccountSerializer, ChangeAccountPasswordSerializer, MinAccount
 from .organization import OrganizationSerializer
 from .channel import ChannelSerializer, CreateChannelSerializer, MinChannelSerializer
 from .media import MediaSerializer, CreateMediaSerializer, UpdateMediaSerializer, \
-    PartialUpdateMediaSerializer, ThumbnailMediaSerializer
+    PartialUpdateMediaSerializer, ThumbnailMediaSerializer, BulkCreateMediaSerializer, \
+    BulkTransitionMediaSerializer
 from .live_video import LiveVideoSerializer, UpdateLiveVideoSerializer, \
     PartialUpdateLiveVideoSerializer, CreateLiveVideoSerializer, SubscribeSerializer, \
     NotifySerializer
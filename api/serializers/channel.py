@@ -13,7 +13,8 @@ class ChannelSerializer(serializers.ModelSerializer):
             'allowed_domains',
             'ads_vast_url',
             'detect_adblock',
-            'autoplay'
+            'autoplay',
+            'provisioning_state'
         )
 
 
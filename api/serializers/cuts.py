@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from rest_framework.exceptions import NotAuthenticated, PermissionDenied
 
+from api.fieldsets import SparseFieldsetSerializerMixin
 from api.serializers import MinAccountSerializer
 from video.models.cuts import LiveVideoCut, LiveVideo
 
@@ -15,7 +16,7 @@ class MinLiveVideoCutSerializer(serializers.ModelSerializer):
         )
 
 
-class LiveVideoCutSerializer(serializers.ModelSerializer):
+class LiveVideoCutSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     created_by = MinAccountSerializer()
 
     class Meta:
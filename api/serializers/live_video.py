@@ -3,17 +3,19 @@ from django.core.exceptions import MultipleObjectsReturned
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from api.fieldsets import SparseFieldsetSerializerMixin
 from api.serializers import MinAccountSerializer, MinChannelSerializer
 from api.serializers.tag import TagSerializer
 from organization.models import Channel
 from video.models import LiveVideo, Tag, LiveVideoCut
 
 
-class LiveVideoSerializer(serializers.ModelSerializer):
+class LiveVideoSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     created_by = MinAccountSerializer()
     channel = MinChannelSerializer()
     tags = TagSerializer(many=True)
     actual_cut = serializers.SerializerMethodField()
+    provisioning_progress = serializers.SerializerMethodField()
 
     class Meta:
         model = LiveVideo
@@ -26,6 +28,7 @@ class LiveVideoSerializer(serializers.ModelSerializer):
             'tags',
             'channel',
             'state',
+            'provisioning_progress',
             'input_state',
             'actual_cut',
             'ads_vast_url',
@@ -46,6 +49,10 @@ class LiveVideoSerializer(serializers.ModelSerializer):
 
         return None
 
+    def get_provisioning_progress(self, obj):
+        from video.provisioning import get_provisioning_progress
+        return get_provisioning_progress(obj)
+
 
 class CreateLiveVideoSerializer(serializers.ModelSerializer):
 
@@ -155,6 +162,7 @@ class SubscribeSerializer(serializers.Serializer):
 class NotifySerializer(serializers.Serializer):
     Message = serializers.CharField(required=False, default=None)
     SubscribeURL = serializers.CharField(required=False, default=None)
+    TopicArn = serializers.CharField(required=False, default=None)
 
     def validate_Message(self, data):
         request = self.context.get('request')
@@ -1,19 +1,102 @@
 import re
+from collections import OrderedDict
+
+from django.conf import settings
 from django.core.exceptions import MultipleObjectsReturned
+from django.db import models
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
 
+from api.fieldsets import SparseFieldsetSerializerMixin
 from api.serializers import MinAccountSerializer, MinChannelSerializer
 from api.serializers.tag import TagSerializer
 from organization.models import Channel
 from video.models import Media, Tag
+from video.tasks import TRANSITIONS
+
+
+class MediaListSerializer(serializers.ListSerializer):
+    """
+    Read only representation of a list of media with the same output as MediaSerializer.
+    The fields of the child serializer, and of its nested serializers, are read once per
+    list instead of being bound again for every media, and the urls are computed once per
+    media.
+    """
+
+    def to_representation(self, data):
+        # Sparse fieldsets go through the serializer fields, so only those are evaluated
+        if self.context.get('fieldset') is not None:
+            return super().to_representation(data)
+
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        fields = self.get_readable_fields(self.child)
+
+        return [self.instance_to_representation(media, fields, self.get_precomputed_values(media))
+                for media in iterable]
+
+    @classmethod
+    def get_readable_fields(cls, serializer):
+        """
+        Return (field, nested fields) pairs of the readable fields of `serializer`, the
+        nested fields are the ones of nested serializers, or None for other fields.
+        """
+        readable = []
+
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+
+            child = field.child if isinstance(field, serializers.ListSerializer) else field
+            nested = cls.get_readable_fields(child) \
+                if isinstance(child, serializers.Serializer) else None
+            readable.append((field, nested))
+
+        return readable
 
+    @staticmethod
+    def get_precomputed_values(media):
+        thumbnail_url, media_url, _ = media.get_urls()
 
-class MediaSerializer(serializers.ModelSerializer):
+        return {
+            'thumbnail_url': thumbnail_url,
+            'media_url': media_url,
+        }
+
+    @classmethod
+    def instance_to_representation(cls, instance, fields, values=None):
+        ret = OrderedDict()
+
+        for field, nested in fields:
+            if values and field.field_name in values:
+                ret[field.field_name] = values[field.field_name]
+                continue
+
+            try:
+                attribute = field.get_attribute(instance)
+            except SkipField:
+                continue
+
+            check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+            if check_for_none is None:
+                ret[field.field_name] = None
+            elif nested is None:
+                ret[field.field_name] = field.to_representation(attribute)
+            elif isinstance(field, serializers.ListSerializer):
+                items = attribute.all() if isinstance(attribute, models.Manager) else attribute
+                ret[field.field_name] = [cls.instance_to_representation(item, nested)
+                                         for item in items]
+            else:
+                ret[field.field_name] = cls.instance_to_representation(attribute, nested)
+
+        return ret
+
+
+class MediaSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     created_by = MinAccountSerializer()
     channel = MinChannelSerializer()
     tags = TagSerializer(many=True)
-    job_percent_complete = serializers.SerializerMethodField()
     thumbnail_url = serializers.SerializerMethodField()
     media_url = serializers.SerializerMethodField()
 
@@ -38,10 +121,7 @@ class MediaSerializer(serializers.ModelSerializer):
             'thumbnail_url',
             'media_url',
         )
-
-    def get_job_percent_complete(self, obj):
-        job_percent_complete = obj.metadata.get('job_percent_complete', None)
-        return job_percent_complete
+        list_serializer_class = MediaListSerializer
 
     def get_thumbnail_url(self, obj):
         poster, _, _ = obj.get_urls()
@@ -97,6 +177,66 @@ class CreateMediaSerializer(serializers.ModelSerializer):
         return data
 
 
+class BulkCreateMediaItemSerializer(CreateMediaSerializer):
+    # Channels are resolved for the whole batch by BulkCreateMediaSerializer
+    channel_id = serializers.IntegerField(required=False, default=None)
+
+    def validate_channel_id(self, data):
+        return data
+
+
+class BulkCreateMediaSerializer(serializers.Serializer):
+    media = BulkCreateMediaItemSerializer(many=True, allow_empty=False)
+
+    def validate_media(self, data):
+        if len(data) > settings.MEDIA_BULK_CREATE_MAX:
+            raise ValidationError(
+                f'Ensure this field has no more than {settings.MEDIA_BULK_CREATE_MAX} elements.')
+
+        organization = self.context['request'].user.organization
+        channel_ids = {item['channel_id'] for item in data if item['channel_id']}
+        channels = organization.channels.in_bulk(channel_ids)
+
+        video_ids = [item['video_id'] for item in data if item.get('video_id')]
+        existing_video_ids = set(
+            Media.objects.filter(video_id__in=video_ids).values_list('video_id', flat=True))
+
+        errors = []
+        seen_video_ids = set()
+
+        for item in data:
+            item_errors = {}
+
+            channel_id = item.pop('channel_id')
+            if channel_id and channel_id not in channels:
+                item_errors['channel_id'] = ['The channel does not belong to your organization.']
+            item['channel'] = channels.get(channel_id)
+
+            video_id = item.get('video_id')
+            if video_id and (video_id in existing_video_ids or video_id in seen_video_ids):
+                item_errors['video_id'] = ['A video with this id already exists.']
+            seen_video_ids.add(video_id)
+
+            errors.append(item_errors)
+
+        if any(errors):
+            raise ValidationError(errors)
+
+        return data
+
+
+class BulkTransitionMediaSerializer(serializers.Serializer):
+    video_ids = serializers.ListField(child=serializers.CharField(), allow_empty=False)
+    transition = serializers.ChoiceField(choices=TRANSITIONS)
+
+    def validate_video_ids(self, data):
+        if len(data) > settings.BULK_TRANSITION_MAX:
+            raise ValidationError(
+                f'Ensure this field has no more than {settings.BULK_TRANSITION_MAX} elements.')
+
+        return list(OrderedDict.fromkeys(data))
+
+
 class UpdateMediaSerializer(serializers.ModelSerializer):
     channel = serializers.PrimaryKeyRelatedField(queryset=Channel.objects)
     tags = serializers.ManyRelatedField(
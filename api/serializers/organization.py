@@ -27,5 +27,6 @@ class OrganizationSerializer(serializers.ModelSerializer):
             'security_enabled',
             'aws_account',
             'bucket_name',
-            'cf_distribution_ids'
+            'cf_distribution_ids',
+            'provisioning_state'
             )
@@ -6,3 +6,4 @@ from .live_videos import LiveVideoTests
 from .cuts import LiveVideoCutTests
 from .link import VideoLinkTests
 from .bills import BillTests
+from .dashboard import DashboardTests
@@ -1209,3 +1209,30 @@ class LiveVideoCutTests(APITestCase):
             cut.to_executing()
 
     # </editor-fold>
+
+    # <editor-fold desc="Sparse Fieldsets Cuts TESTS">
+    def test_list_cuts_with_fields(self):
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('cuts-list')
+        response = self.client.get(url, {'fields': 'id,live,initial_time'}, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        # Validate only the requested fields are rendered, with the same values
+        expected = [
+            {key: LiveVideoCutSerializer(cut).data[key] for key in ('id', 'live', 'initial_time')}
+            for cut in (self.cut1, self.cut2)
+        ]
+        self.assertEqual(expected, response.json()['results'])
+
+    def test_list_cuts_with_unknown_fields(self):
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('cuts-list')
+        response = self.client.get(url, {'fields': 'id,unknown'}, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+    # </editor-fold>
@@ -0,0 +1,132 @@
+import logging
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from test_utils import create_organizations, create_user, create_videos, create_live_videos
+from video.models import LiveVideo, Media
+
+
+class DashboardTests(APITestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.WARNING)
+
+        cls.org1, cls.org2 = create_organizations('Organization', 2)
+
+        cls.user1 = create_user('user1', '12345678', cls.org1)
+        cls.user2 = create_user('user2', '12345678', cls.org1)
+        cls.user3 = create_user('user3', '12345678', cls.org2)
+
+    def setUp(self):
+        cache.clear()
+
+        create_videos('Video', self.user1, self.org1, 3, Media.State.PROCESSING)
+        create_videos('Video', self.user1, self.org1, 1, Media.State.QUEUING_FAILED)
+        create_videos('Video', self.user2, self.org1, 2, Media.State.PROCESSING_FAILED)
+        create_videos('Video', self.user2, self.org1, 4, Media.State.FINISHED)
+        create_videos('Video', self.user3, self.org2, 5, Media.State.PROCESSING)
+        create_live_videos('Live', self.user1, self.org1, 2)
+        create_live_videos('Live', self.user3, self.org2, 1)
+
+    def tearDown(self):
+        Media.objects.all().delete()
+        LiveVideo.objects.all().delete()
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+        cls.org1.delete()
+        cls.org2.delete()
+
+    # <editor-fold desc="Dashboard TESTS">
+    def test_dashboard_with_annon_user(self):
+        url = reverse('dashboard')
+        response = self.client.get(url, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+
+    def test_dashboard_with_user(self):
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('dashboard')
+        response = self.client.get(url, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        # Validate counters
+        self.assertEqual({
+            'videos_in_process': 3,
+            'failed_videos': 3,
+            'uploaded_by_user': 4,
+            'uploaded_by_org': 10,
+            'live_videos_by_org': 2
+        }, response.json())
+
+    def test_dashboard_without_videos(self):
+        Media.objects.filter(organization=self.org2).delete()
+        LiveVideo.objects.filter(organization=self.org2).delete()
+
+        self.client.login(username='user3', password='12345678')
+
+        url = reverse('dashboard')
+        response = self.client.get(url, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        # Validate counters
+        self.assertEqual({
+            'videos_in_process': 0,
+            'failed_videos': 0,
+            'uploaded_by_user': 0,
+            'uploaded_by_org': 0,
+            'live_videos_by_org': 0
+        }, response.json())
+
+    def test_dashboard_counters_single_query(self):
+        self.client.login(username='user1', password='12345678')
+        url = reverse('dashboard')
+
+        # Warm up the session and authentication queries
+        self.client.get(url, format='json')
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, format='json')
+        counters = [query for query in queries if 'video_media' in query['sql']]
+
+        # Validate the counters are computed with one query
+        self.assertEqual(1, len(counters))
+
+    def test_dashboard_counters_cached(self):
+        self.client.login(username='user1', password='12345678')
+        url = reverse('dashboard')
+
+        self.client.get(url, format='json')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, format='json')
+
+        # Validate the counters are served from the cache
+        self.assertFalse([query for query in queries if 'video_media' in query['sql']])
+        self.assertEqual(10, response.json()['uploaded_by_org'])
+
+    def test_dashboard_cached_by_user(self):
+        url = reverse('dashboard')
+
+        self.client.login(username='user1', password='12345678')
+        response = self.client.get(url, format='json')
+        self.assertEqual(4, response.json()['uploaded_by_user'])
+
+        self.client.login(username='user2', password='12345678')
+        response = self.client.get(url, format='json')
+        self.assertEqual(6, response.json()['uploaded_by_user'])
+    # </editor-fold>
@@ -3,16 +3,22 @@ import json
 from unittest import mock
 from urllib.parse import quote
 
+from celery.exceptions import Retry
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django_fsm import TransitionNotAllowed
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from api.serializers.live_video import LiveVideoSerializer
+from organization.models import AWSAccount, Organization
 from test_utils import create_organizations, create_channels, \
     create_live_videos, create_tags, create_live_video, create_user, create_superuser, \
     add_channel_to_live_video, create_key
-from utils import medialive, sns
+from utils import cloudfront, cloudwatchevents, medialive, sns
+from video import provisioning
 from video.models import LiveVideo
 
 
@@ -1455,3 +1461,291 @@ class LiveVideoTests(APITestCase):
         self.assertEqual(new_data['geolocation_type'], response.json()['geolocation_type'])
         self.assertEqual(data['geolocation_countries'], response.json()['geolocation_countries'])
     # </editor-fold>
+
+    # <editor-fold desc="Sparse Fieldsets LiveVideo TESTS">
+    def test_list_live_videos_with_fields(self):
+        add_channel_to_live_video(self.live1, self.chan1)
+        self.live1.tags.add(self.tag1)
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('live-videos-list')
+        response = self.client.get(url, {'fields': 'video_id,channel,tags'}, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        # Validate only the requested fields are rendered, with the same values
+        lives = {live['video_id']: live for live in response.json()['results']}
+        expected = LiveVideoSerializer(self.live1).data
+        self.assertEqual({key: expected[key] for key in ('video_id', 'channel', 'tags')},
+                         lives[str(self.live1.video_id)])
+
+    def test_retrieve_live_video_with_exclude(self):
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('live-videos-detail', kwargs={'pk': self.live1.pk})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'exclude': 'actual_cut,created_by'}, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        # Validate the excluded fields are not rendered nor queried
+        expected = LiveVideoSerializer(self.live1).data
+        expected.pop('actual_cut')
+        expected.pop('created_by')
+        self.assertEqual(expected, response.json())
+        self.assertFalse([query for query in queries if 'video_livevideocut' in query['sql']])
+
+    def test_list_live_videos_with_unknown_fields(self):
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('live-videos-list')
+        response = self.client.get(url, {'exclude': 'unknown'}, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+    # </editor-fold>
+
+    # <editor-fold desc="Provisioning LiveVideo TESTS">
+    @staticmethod
+    def _mock_provisioning():
+        def alert_service(live):
+            live.sns_topic_arn = 'arn:aws:sns:us-east-1:1:topic'
+
+        return [
+            mock.patch('utils.medialive.create_input', return_value={
+                'Input': {'Id': '1', 'Destinations': [{'Url': 'rtmp://1.1.1.1:1935/live/1'}]}}),
+            mock.patch('utils.medialive.create_channel', return_value={
+                'Channel': {'Arn': 'arn:aws:medialive:us-east-1:1:channel:2'}}),
+            mock.patch('utils.medialive.alert_service', side_effect=alert_service),
+            mock.patch('utils.cloudfront.create_distribution',
+                       return_value={'cf_id': 'E1', 'cf_domain': 'abc.cloudfront.net'}),
+        ]
+
+    def test_provision_live_video(self):
+        live = create_live_video('Video', self.user1, self.org1, 6,
+                                 state=LiveVideo.State.PROVISIONING)
+        self.client.login(username='user1', password='12345678')
+        url = reverse('live-videos-detail', kwargs={'pk': live.pk})
+
+        patches = self._mock_provisioning()
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        provisioning.provision_distribution(live.pk)
+        provisioning.provision_input(live.pk)
+
+        # Validate the progress is rendered
+        response = self.client.get(url, format='json')
+        self.assertEqual(LiveVideo.State.PROVISIONING, response.json()['state'])
+        self.assertEqual(50, response.json()['provisioning_progress'])
+
+        provisioning.provision_channel(live.pk)
+        provisioning.provision_alerts(live.pk)
+        provisioning.finish_live_provisioning(live.pk)
+
+        # Validate the resources are stored and the live video is available
+        live = LiveVideo.objects.get(pk=live.pk)
+        self.assertEqual(LiveVideo.State.OFF, live.state)
+        self.assertEqual('1', live.ml_input_id)
+        self.assertEqual('rtmp://1.1.1.1:1935/live/1', live.ml_input_url)
+        self.assertEqual('arn:aws:medialive:us-east-1:1:channel:2', live.ml_channel_arn)
+        self.assertEqual('arn:aws:sns:us-east-1:1:topic', live.sns_topic_arn)
+        self.assertEqual('E1', live.cf_id)
+        self.assertEqual('abc.cloudfront.net', live.cf_domain)
+        self.assertEqual(100, self.client.get(url, format='json').json()['provisioning_progress'])
+
+        # Validate the channel is created for the stored input, with idempotent distributions
+        self.assertEqual({'Input': {'Id': '1'}}, medialive.create_channel.call_args[0][1])
+        self.assertEqual(f'live-{live.video_id}',
+                         provisioning.cloudfront.create_distribution.call_args[0][0]['caller'])
+
+    def test_provisioning_steps_are_not_repeated(self):
+        live = create_live_video('Video', self.user1, self.org1, 6,
+                                 state=LiveVideo.State.PROVISIONING)
+        LiveVideo.objects.filter(pk=live.pk).update(ml_input_id='1', provisioned_steps=['input'])
+
+        patches = self._mock_provisioning()
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        provisioning.provision_input(live.pk)
+        provisioning.provision_channel(live.pk)
+        provisioning.finish_live_provisioning(live.pk)
+
+        # Validate the done step is skipped and the live video waits for the rest
+        medialive.create_input.assert_not_called()
+        medialive.create_channel.assert_called_once()
+        live = LiveVideo.objects.get(pk=live.pk)
+        self.assertEqual(['input', 'channel'], live.provisioned_steps)
+        self.assertEqual(LiveVideo.State.PROVISIONING, live.state)
+
+    def test_re_provision_failed_live_video(self):
+        live = create_live_video('Video', self.user1, self.org1, 6,
+                                 state=LiveVideo.State.PROVISIONING)
+
+        with mock.patch('utils.medialive.create_input', side_effect=Exception('Throttled')), \
+                mock.patch.object(provisioning.provision_input, 'max_retries', 0):
+            with self.assertRaises(Exception):
+                provisioning.provision_input(live.pk)
+
+        # Validate the live video is marked as failed once the retries are exhausted
+        self.assertEqual(LiveVideo.State.PROVISIONING_FAILED,
+                         LiveVideo.objects.get(pk=live.pk).state)
+
+        url = reverse('live-videos-re-provision', kwargs={'pk': live.pk})
+
+        # Validate only admins can provision again
+        self.client.login(username='user1', password='12345678')
+        response = self.client.post(url, format='json')
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+        self.client.login(username='admin', password='12345678')
+        response = self.client.post(url, format='json')
+
+        # Validate status code and state
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(LiveVideo.State.PROVISIONING, response.json()['state'])
+        self.assertEqual(LiveVideo.State.PROVISIONING, LiveVideo.objects.get(pk=live.pk).state)
+
+        # Validate the transition is only allowed from a failed provisioning
+        response = self.client.post(url, format='json')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+    # </editor-fold>
+
+    # <editor-fold desc="Teardown LiveVideo TESTS">
+    def _create_provisioned_live_video(self, number, state=LiveVideo.State.DELETING):
+        aws_account = AWSAccount.objects.create(name='Account', access_key='key',
+                                                secret_access_key='secret', region='us-east-1',
+                                                account_id='123456789012')
+        Organization.objects.filter(pk=self.org1.pk).update(aws_account=aws_account)
+
+        live = create_live_video('Video', self.user1, self.org1, number, state=state,
+                                 ml_channel_arn='arn:aws:medialive:us-east-1:1:channel:2')
+        LiveVideo.objects.filter(pk=live.pk).update(
+            ml_input_id='1', sns_topic_arn='arn:aws:sns:us-east-1:1:topic', cf_id='E1')
+        return live
+
+    @staticmethod
+    def _mock_teardown():
+        return [
+            mock.patch('utils.medialive.delete_channel'),
+            mock.patch('utils.medialive.delete_input'),
+            mock.patch('utils.cloudwatchevents.remove_targets'),
+            mock.patch('utils.cloudwatchevents.delete_rule'),
+            mock.patch('utils.sns.unsubscribe_all'),
+            mock.patch('utils.sns.delete_topic'),
+            mock.patch('utils.cloudfront.update_distribution'),
+            mock.patch('utils.cloudfront._delete_cloudfront_distribution'),
+        ]
+
+    def _start_patches(self, patches):
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    @staticmethod
+    def _run_teardown(live):
+        provisioning.delete_live_channel(live.pk)
+        provisioning.delete_live_input(live.pk)
+        provisioning.delete_live_rule_targets(live.pk)
+        provisioning.delete_live_rule(live.pk)
+        provisioning.delete_live_topic(live.pk)
+        provisioning.disable_live_distribution(live.pk)
+        provisioning.finish_live_teardown(live.pk)
+
+    def test_to_delete_live_video(self):
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('live-videos-to-delete', kwargs={'pk': self.live1.pk})
+        response = self.client.delete(url, format='json')
+
+        # Validate the response is returned right away with the deleting state
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(LiveVideo.State.DELETING, response.json()['state'])
+        self.assertEqual(LiveVideo.State.DELETING, LiveVideo.objects.get(pk=self.live1.pk).state)
+
+    def test_teardown_live_video(self):
+        live = self._create_provisioned_live_video(6)
+        self._start_patches(self._mock_teardown())
+
+        self._run_teardown(live)
+
+        # Validate every resource is deleted and the distribution is deleted last
+        medialive.delete_channel.assert_called_once_with('2', '123456789012')
+        medialive.delete_input.assert_called_once_with('1', '123456789012')
+        cloudwatchevents.remove_targets.assert_called_once()
+        cloudwatchevents.delete_rule.assert_called_once()
+        sns.delete_topic.assert_called_once()
+        cloudfront.update_distribution.assert_called_once_with(mock.ANY, 'E1', False)
+        cloudfront._delete_cloudfront_distribution.delay.assert_called_once_with(
+            'E1', '123456789012', str(live.video_id))
+        self.assertEqual(set(provisioning.TEARDOWN_STEPS),
+                         set(LiveVideo.objects.get(pk=live.pk).teardown_steps))
+
+    def test_teardown_resumes_after_errors(self):
+        live = self._create_provisioned_live_video(6)
+        self._start_patches(self._mock_teardown())
+        medialive.delete_input.side_effect = Exception('ConflictException')
+
+        with mock.patch.object(provisioning.delete_live_input, 'max_retries', 0):
+            with self.assertRaises(Exception):
+                self._run_teardown(live)
+
+        # Validate the teardown stops at the failed step and the live video is kept
+        self.assertEqual(['channel'], LiveVideo.objects.get(pk=live.pk).teardown_steps)
+        cloudfront._delete_cloudfront_distribution.delay.assert_not_called()
+
+        # Validate deleting again is allowed
+        self.client.login(username='user1', password='12345678')
+        url = reverse('live-videos-to-delete', kwargs={'pk': live.pk})
+        self.assertEqual(status.HTTP_200_OK, self.client.delete(url, format='json').status_code)
+
+        medialive.delete_input.side_effect = None
+        self._run_teardown(live)
+
+        # Validate the done steps are not repeated
+        medialive.delete_channel.assert_called_once()
+        self.assertEqual(2, medialive.delete_input.call_count)
+        cloudfront._delete_cloudfront_distribution.delay.assert_called_once()
+
+    def test_teardown_input_retried_with_backoff(self):
+        live = self._create_provisioned_live_video(6)
+        self._start_patches(self._mock_teardown())
+        medialive.delete_input.side_effect = Exception('ConflictException')
+
+        task = mock.Mock(max_retries=10, default_retry_delay=10)
+        task.retry.side_effect = Retry()
+
+        # Validate the delay doubles on every retry, up to the maximum
+        for retries, countdown in ((0, 10), (1, 20), (3, 80), (4, 120), (9, 120)):
+            task.request.retries = retries
+            with self.assertRaises(Retry):
+                provisioning._run_teardown_step(task, live.pk, provisioning.INPUT,
+                                                provisioning._delete_input, max_retry_delay=120)
+            self.assertEqual(countdown, task.retry.call_args[1]['countdown'])
+
+        # Validate the input has its own retries, so the channel has time to be deleted
+        self.assertEqual(settings.LIVE_INPUT_DELETION_MAX_RETRIES,
+                         provisioning.delete_live_input.max_retries)
+        self.assertEqual(settings.LIVE_INPUT_DELETION_RETRY_DELAY,
+                         provisioning.delete_live_input.default_retry_delay)
+
+    def test_teardown_live_video_without_resources(self):
+        live = create_live_video('Video', self.user1, self.org1, 6,
+                                 state=LiveVideo.State.PROVISIONING_FAILED)
+        self._start_patches(self._mock_teardown())
+
+        live.to_deleting()
+        self._run_teardown(live)
+
+        # Validate nothing is deleted in AWS and the live video is deleted
+        medialive.delete_channel.assert_not_called()
+        sns.delete_topic.assert_not_called()
+        cloudfront._delete_cloudfront_distribution.delay.assert_not_called()
+        self.assertFalse(LiveVideo.objects.filter(pk=live.pk).exists())
+    # </editor-fold>
@@ -1,12 +1,24 @@
+import csv
+import json
 import logging
 from unittest import mock
 
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ListSerializer
 from rest_framework.test import APITestCase
+from api.serializers import MinChannelSerializer
 from api.serializers.media import MediaSerializer
+from organization.models import AWSAccount
+from player import embed
 from test_utils import create_organizations, create_user, create_superuser, create_channels, \
     create_videos, create_tags, create_video, create_key
+from utils import mediaconvert
 from video.models import Media
 
 
@@ -137,6 +149,74 @@ class VideoTests(APITestCase):
         self.assertNotIn(video4, response.json()['results'])
         self.assertNotIn(video5, response.json()['results'])
 
+    def test_list_videos_with_cursor_pagination(self):
+        videos = create_videos('Paginated video', self.user1, self.org1, 65)
+        expected = [str(video.video_id) for video in
+                    sorted(videos + [self.video1, self.video2, self.video3],
+                           key=lambda video: (video.created_at, video.id), reverse=True)]
+
+        self.client.login(username='user1', password='12345678')
+
+        video_ids = []
+        url = reverse('videos-list') + '?pagination=cursor'
+        while url:
+            response = self.client.get(url, format='json')
+
+            # Validate status code
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+            self.assertNotIn('count', response.json())
+
+            video_ids += [video['video_id'] for video in response.json()['results']]
+            url = response.json()['next']
+
+        # Validate every video is listed once, newest first
+        self.assertEqual(expected, video_ids)
+
+    def test_list_videos_with_invalid_cursor(self):
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-list')
+        response = self.client.get(url, {'cursor': 'invalid'}, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_list_serializer_same_output(self):
+        self.video1.channel = self.chan1
+        self.video1.has_thumbnail = True
+        self.video1.ads_vast_url = 'https://ads.example.com/vast.xml'
+        self.video1.job_percent_complete = 42
+        self.video1.save()
+        self.video1.tags.add(self.tag1)
+
+        self.video2.channel = self.chan2
+        self.video2.media_type = 'audio'
+        self.video2.enable_ads = False
+        self.video2.created_by = None
+        self.video2.save()
+
+        queryset = Media.objects.select_related('organization', 'channel', 'created_by') \
+            .prefetch_related('tags').filter(organization=self.org1).order_by('id')
+
+        default = ListSerializer(child=MediaSerializer(), instance=queryset).data
+        fast = MediaSerializer(queryset, many=True).data
+
+        # Validate both serializers render the same JSON
+        self.assertEqual(JSONRenderer().render(default), JSONRenderer().render(fast))
+
+        # Validate every media, with its nested objects, is the same as MediaSerializer's
+        for media, data in zip(queryset, fast):
+            self.assertEqual(MediaSerializer(media).data, data)
+
+        fields = MinChannelSerializer.Meta.fields + ('allowed_domains',)
+        with mock.patch.object(MinChannelSerializer.Meta, 'fields', fields):
+            data = MediaSerializer(queryset, many=True).data[0]
+            detail = MediaSerializer(queryset[0]).data
+
+        # Validate fields added to nested serializers are listed too
+        self.assertEqual(detail, data)
+        self.assertIn('allowed_domains', data['channel'])
+
     # </editor-fold>
 
     # <editor-fold desc="Retrieve Video TESTS">
@@ -808,6 +888,159 @@ class VideoTests(APITestCase):
 
     # </editor-fold>
 
+    # <editor-fold desc="Bulk Create Video TESTS">
+    def test_bulk_create_videos_annon_user(self):
+        url = reverse('videos-bulk-create')
+        response = self.client.post(url, data={'media': []}, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+
+    def test_bulk_create_videos_user_1_with_org_1(self):
+        data = {
+            'media': [
+                {'name': 'foo', 'content_type': 'video/mp4'},
+                {'name': 'bar', 'content_type': 'video/mp4', 'channel_id': self.chan1.id,
+                 'video_id': 'bulk-12345'},
+                {'name': 'baz', 'content_type': 'audio/mp3', 'media_type': 'audio'},
+            ]
+        }
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-bulk-create')
+        response = self.client.post(url, data=data, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+
+        # Validate a signed url is returned for every created video, in order
+        self.assertEqual(3, len(response.data))
+        self.assertEqual('bulk-12345', response.data[1]['video_id'])
+        for item, result in zip(data['media'], response.data):
+            video = Media.objects.get(video_id=result['video_id'])
+            self.assertEqual(item['name'], video.name)
+            self.assertEqual(self.org1, video.organization)
+            self.assertEqual(self.user1, video.created_by)
+            self.assertIn(f'{video.video_id}/input.mp4', result['signed_url'])
+
+        self.assertEqual(self.chan1, Media.objects.get(video_id='bulk-12345').channel)
+        self.assertEqual('audio', Media.objects.get(video_id=response.data[2]['video_id']).media_type)
+
+    def test_bulk_create_videos_same_number_of_queries(self):
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-bulk-create')
+        query_counts = []
+        for quantity in (2, 20):
+            data = {
+                'media': [{'name': f'foo {number}', 'content_type': 'video/mp4',
+                           'channel_id': self.chan1.id} for number in range(quantity)]
+            }
+
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(url, data=data, format='json')
+
+            self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+            query_counts.append(len(queries))
+
+        # Validate the number of queries doesn't depend on the number of videos
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_bulk_create_videos_with_channel_from_different_org(self):
+        data = {
+            'media': [
+                {'name': 'foo', 'content_type': 'video/mp4', 'channel_id': self.chan1.id},
+                {'name': 'bar', 'content_type': 'video/mp4', 'channel_id': self.chan4.id},
+            ]
+        }
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-bulk-create')
+        response = self.client.post(url, data=data, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+        # Validate the error is reported for the invalid video only, and nothing is created
+        self.assertEqual({}, response.data['media'][0])
+        self.assertIn('channel_id', response.data['media'][1])
+        self.assertFalse(Media.objects.filter(name__in=['foo', 'bar']).exists())
+
+    def test_bulk_create_videos_with_repeated_id(self):
+        data = {
+            'media': [
+                {'name': 'foo', 'content_type': 'video/mp4', 'video_id': 'bulk-1'},
+                {'name': 'bar', 'content_type': 'video/mp4', 'video_id': 'bulk-1'},
+                {'name': 'baz', 'content_type': 'video/mp4', 'video_id': self.video1.video_id},
+            ]
+        }
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-bulk-create')
+        response = self.client.post(url, data=data, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+        # Validate the repeated ids are reported
+        self.assertEqual({}, response.data['media'][0])
+        self.assertIn('video_id', response.data['media'][1])
+        self.assertIn('video_id', response.data['media'][2])
+
+    def test_bulk_create_videos_with_different_content_type(self):
+        data = {
+            'media': [
+                {'name': 'foo', 'content_type': 'video/mp4'},
+                {'name': 'bar', 'content_type': 'other/content-type'},
+            ]
+        }
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-bulk-create')
+        response = self.client.post(url, data=data, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    @override_settings(MEDIA_BULK_CREATE_MAX=2)
+    def test_bulk_create_too_many_videos(self):
+        data = {
+            'media': [{'name': 'foo', 'content_type': 'video/mp4'}] * 3
+        }
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-bulk-create')
+        response = self.client.post(url, data=data, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_bulk_create_videos_user_2_with_disabled_org(self):
+        self.org2.upload_enabled = False
+        self.org2.save()
+
+        data = {
+            'media': [{'name': 'foo', 'content_type': 'video/mp4'}]
+        }
+
+        self.client.login(username='user2', password='12345678')
+
+        url = reverse('videos-bulk-create')
+        response = self.client.post(url, data=data, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+        self.org2.upload_enabled = True
+        self.org2.save()
+
+    # </editor-fold>
+
     # <editor-fold desc="Delete Video TESTS">
     def test_delete_video_with_annon_user(self):
         url = reverse('videos-detail', kwargs={'pk': self.video1.pk})
@@ -1098,3 +1331,746 @@ class VideoTests(APITestCase):
         # Validate status code
         self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
     # </editor-fold>
+
+    # <editor-fold desc="Bulk Transition Video TESTS">
+    def _create_finished_videos(self, quantity):
+        videos = create_videos('Finished', self.user1, self.org1, quantity,
+                               state=Media.State.FINISHED)
+        Media.objects.filter(pk__in=[video.pk for video in videos]).update(channel=self.chan1)
+
+        return videos
+
+    @staticmethod
+    def _run_chain(tasks):
+        # Runs the tasks of the chain right away instead of sending them to Celery
+        return mock.Mock(apply_async=lambda: [task() for task in tasks])
+
+    def test_bulk_transition_videos_annon_user(self):
+        url = reverse('videos-bulk-transition')
+        response = self.client.post(url, data={'video_ids': [str(self.video1.video_id)],
+                                               'transition': 're_process'}, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+
+    def test_bulk_transition_videos_re_process(self):
+        finished1, finished2 = self._create_finished_videos(2)
+        data = {
+            'video_ids': [str(finished1.video_id), str(finished2.video_id),
+                          str(self.video1.video_id), str(self.video4.video_id), 'unknown'],
+            'transition': 're_process'
+        }
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-bulk-transition')
+        with mock.patch('video.tasks.chain', side_effect=self._run_chain), \
+                mock.patch('utils.mediaconvert.transcode', side_effect=None) as transcode, \
+                mock.patch('utils.s3.delete_object', side_effect=None), \
+                mock.patch('utils.cloudfront.create_invalidation', side_effect=None):
+            response = self.client.post(url, data=data, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_202_ACCEPTED, response.status_code)
+
+        # Validate videos from other organizations are not transitioned
+        self.assertEqual(3, response.data['total'])
+        self.assertEqual([str(self.video4.video_id), 'unknown'], response.data['not_found'])
+        self.assertEqual(2, transcode.call_count)
+
+        # Validate states
+        states = dict(Media.objects.values_list('video_id', 'state'))
+        self.assertEqual(Media.State.QUEUED, states[str(finished1.video_id)])
+        self.assertEqual(Media.State.QUEUED, states[str(finished2.video_id)])
+        self.assertEqual(Media.State.WAITING_FILE, states[str(self.video1.video_id)])
+
+        url = reverse('videos-bulk-transition-status',
+                      kwargs={'batch_id': response.data['batch_id']})
+        response = self.client.get(url, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        # Validate progress of the batch
+        self.assertEqual(3, response.data['total'])
+        self.assertEqual(0, response.data['pending'])
+        self.assertEqual(2, response.data['succeeded'])
+        self.assertEqual(1, response.data['failed'])
+        self.assertEqual([str(self.video1.video_id)], list(response.data['errors']))
+
+    @override_settings(BULK_TRANSITION_CONCURRENCY=2)
+    def test_bulk_transition_videos_concurrency(self):
+        videos = self._create_finished_videos(5)
+        data = {
+            'video_ids': [str(video.video_id) for video in videos],
+            'transition': 're_process'
+        }
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-bulk-transition')
+        with mock.patch('video.tasks.chain') as chain:
+            response = self.client.post(url, data=data, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_202_ACCEPTED, response.status_code)
+
+        # Validate the videos of the account are split in two chains
+        self.assertEqual(2, chain.call_count)
+        self.assertEqual([3, 2], [len(list(call[0][0])) for call in chain.call_args_list])
+
+    def test_bulk_transition_status_from_different_org(self):
+        self.client.login(username='user2', password='12345678')
+
+        url = reverse('videos-bulk-transition')
+        with mock.patch('video.tasks.chain'):
+            response = self.client.post(url, data={'video_ids': [str(self.video4.video_id)],
+                                                   'transition': 'to_queued'}, format='json')
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-bulk-transition-status',
+                      kwargs={'batch_id': response.data['batch_id']})
+        response = self.client.get(url, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+        url = reverse('videos-bulk-transition-status', kwargs={'batch_id': 'unknown'})
+        response = self.client.get(url, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_bulk_transition_videos_invalid_transition(self):
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-bulk-transition')
+        response = self.client.post(url, data={'video_ids': [str(self.video1.video_id)],
+                                               'transition': 'delete'}, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+    # </editor-fold>
+
+    # <editor-fold desc="Job Events Video TESTS">
+    def _job_event(self, video, status, **detail):
+        return dict({
+            'status': status,
+            'jobId': 'job-1',
+            'userMetadata': {'video_id': str(video.video_id)}
+        }, **detail)
+
+    def _get_state(self, video):
+        video = Media.objects.get(pk=video.pk)
+        return video.state, video.job_percent_complete, video.duration
+
+    def _create_job_video(self, number, state, job_id, job_percent_complete=None):
+        video = create_video('Video', self.user1, self.org1, number, state=state)
+        video.media_convert_job_id = job_id
+        video.job_percent_complete = job_percent_complete
+        video.save()
+        return video
+
+    TOPIC_ARN = f'arn:aws:sns:us-east-1:123456789012:{mediaconvert.JOB_EVENTS_NAME}'
+    SUBSCRIBE_URL = 'https://sns.us-east-1.amazonaws.com/?Action=ConfirmSubscription' \
+                    f'&TopicArn={TOPIC_ARN}&Token=token'
+
+    def _notify(self, message_type, **data):
+        AWSAccount.objects.get_or_create(
+            name='Account', region='us-east-1', account_id='123456789012',
+            defaults={'access_key': 'key', 'secret_access_key': 'secret'})
+
+        url = reverse('videos-notify')
+        headers = {'HTTP_X_AMZ_SNS_MESSAGE_TYPE': message_type}
+        return self.client.post(url, data=dict({'TopicArn': self.TOPIC_ARN}, **data),
+                                format='json', **headers)
+
+    def test_notify_job_events_confirm_subscription(self):
+        with mock.patch('requests.get', side_effect=None) as get:
+            response = self._notify('SubscriptionConfirmation', SubscribeURL=self.SUBSCRIBE_URL)
+
+        # Validate status code
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        get.assert_called_once_with(self.SUBSCRIBE_URL)
+
+    def test_notify_job_events_confirm_subscription_from_other_hosts(self):
+        other_topic = self.TOPIC_ARN.replace('us-east-1', 'us-west-2')
+        urls = [
+            'https://sns.example.com/?TopicArn=' + self.TOPIC_ARN,
+            'http://sns.us-east-1.amazonaws.com/?TopicArn=' + self.TOPIC_ARN,
+            'https://sns.us-east-1.amazonaws.com.example.com/?TopicArn=' + self.TOPIC_ARN,
+            'https://sns.us-east-1.amazonaws.com/?TopicArn=' + other_topic,
+            'http://127.0.0.1:8000/',
+        ]
+
+        for subscribe_url in urls:
+            with mock.patch('requests.get', side_effect=None) as get:
+                response = self._notify('SubscriptionConfirmation', SubscribeURL=subscribe_url)
+
+            # Validate nothing is requested
+            self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+            get.assert_not_called()
+
+    def test_notify_job_event(self):
+        message = self._job_event(self.video1, 'PROGRESSING')
+
+        with mock.patch('utils.mediaconvert.job_state_changed', side_effect=None) as changed:
+            response = self._notify('Notification', Message=json.dumps(message))
+
+        # Validate status code
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        # Validate the event is handled
+        changed.assert_called_once_with(message)
+
+    def test_notify_job_event_of_other_topics(self):
+        message = self._job_event(self.video1, 'PROGRESSING')
+        topics = [
+            self.TOPIC_ARN.replace('123456789012', '210987654321'),
+            self.TOPIC_ARN.replace(mediaconvert.JOB_EVENTS_NAME, 'other'),
+            self.TOPIC_ARN.replace('us-east-1', 'us-west-2'),
+        ]
+
+        for topic_arn in topics:
+            with mock.patch('utils.mediaconvert.job_state_changed', side_effect=None) as changed:
+                response = self._notify('Notification', Message=json.dumps(message),
+                                        TopicArn=topic_arn)
+
+            # Validate the event is not handled
+            self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+            changed.assert_not_called()
+
+    def test_job_events_update_video(self):
+        video = self._create_job_video(4, Media.State.QUEUED, 'job-1')
+
+        mediaconvert._job_state_changed(self._job_event(video, 'PROGRESSING'))
+        self.assertEqual(Media.State.PROCESSING, self._get_state(video)[0])
+
+        mediaconvert._job_state_changed(self._job_event(
+            video, 'STATUS_UPDATE', jobProgress={'jobPercentComplete': 42}))
+        self.assertEqual(42, self._get_state(video)[1])
+
+        with mock.patch('utils.s3.get_size', return_value=0):
+            mediaconvert._job_state_changed(self._job_event(
+                video, 'COMPLETE',
+                outputGroupDetails=[{'outputDetails': [{'durationInMs': 61500}]}]))
+
+        state, job_percent_complete, duration = self._get_state(video)
+        self.assertEqual(Media.State.FINISHED, state)
+        self.assertIsNone(job_percent_complete)
+        self.assertEqual(62, duration)
+
+        # Validate late events are ignored
+        mediaconvert._job_state_changed(self._job_event(video, 'PROGRESSING'))
+        self.assertEqual(Media.State.FINISHED, self._get_state(video)[0])
+
+    def test_job_events_status_update_after_complete(self):
+        video = self._create_job_video(4, Media.State.PROCESSING, 'job-1',
+                                       job_percent_complete=42)
+        failed = self._create_job_video(5, Media.State.PROCESSING, 'job-1',
+                                        job_percent_complete=42)
+
+        with mock.patch('utils.s3.get_size', return_value=0):
+            mediaconvert._job_state_changed(self._job_event(
+                video, 'COMPLETE',
+                outputGroupDetails=[{'outputDetails': [{'durationInMs': 61500}]}]))
+        mediaconvert._job_state_changed(self._job_event(failed, 'ERROR'))
+
+        for media in (video, failed):
+            mediaconvert._job_state_changed(self._job_event(
+                media, 'STATUS_UPDATE', jobProgress={'jobPercentComplete': 50}))
+
+        # Validate the late update doesn't overwrite the final status
+        video = Media.objects.get(pk=video.pk)
+        self.assertEqual(Media.State.FINISHED, video.state)
+        self.assertEqual(('COMPLETE', None), (video.job_status, video.job_percent_complete))
+
+        failed = Media.objects.get(pk=failed.pk)
+        self.assertEqual(Media.State.PROCESSING_FAILED, failed.state)
+        self.assertEqual(('ERROR', 42), (failed.job_status, failed.job_percent_complete))
+
+    def test_job_events_progress_only_updates_job_columns(self):
+        video = self._create_job_video(4, Media.State.PROCESSING, 'job-1')
+
+        with CaptureQueriesContext(connection) as queries:
+            mediaconvert._job_state_changed(self._job_event(
+                video, 'STATUS_UPDATE', jobProgress={'jobPercentComplete': 42}))
+
+        # Validate a single column UPDATE, without the metadata
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(1, len(updates))
+        self.assertNotIn('"metadata"', updates[0])
+        self.assertNotIn('"state"', updates[0])
+
+        video = Media.objects.get(pk=video.pk)
+        self.assertEqual(('PROGRESSING', 42), (video.job_status, video.job_percent_complete))
+        self.assertIsNotNone(video.job_updated_at)
+
+    def test_job_events_error(self):
+        video = self._create_job_video(4, Media.State.PROCESSING, 'job-1')
+
+        mediaconvert._job_state_changed(self._job_event(video, 'ERROR'))
+
+        # Validate state
+        self.assertEqual(Media.State.PROCESSING_FAILED, self._get_state(video)[0])
+
+    def test_job_events_from_other_jobs_are_ignored(self):
+        video = self._create_job_video(4, Media.State.QUEUED, 'job-2')
+
+        mediaconvert._job_state_changed(self._job_event(video, 'ERROR'))
+        mediaconvert._job_state_changed(dict(self._job_event(video, 'ERROR'), jobId=None))
+
+        # Validate state
+        self.assertEqual(Media.State.QUEUED, self._get_state(video)[0])
+
+    def test_reconcile_jobs(self):
+        queued = self._create_job_video(4, Media.State.QUEUED, 'job-1')
+        processing = self._create_job_video(5, Media.State.PROCESSING, 'job-2',
+                                            job_percent_complete=10)
+        failed = self._create_job_video(6, Media.State.QUEUED, 'job-3')
+        finished = self._create_job_video(7, Media.State.PROCESSING, 'job-4')
+        submitted = self._create_job_video(8, Media.State.QUEUED, 'job-5')
+        other = self._create_job_video(9, Media.State.FINISHED, 'job-6')
+
+        jobs = [
+            {'Id': 'job-1', 'Status': 'PROGRESSING'},
+            {'Id': 'job-2', 'Status': 'PROGRESSING', 'JobPercentComplete': 42},
+            {'Id': 'job-3', 'Status': 'ERROR'},
+            {'Id': 'job-4', 'Status': 'COMPLETE',
+             'OutputGroupDetails': [{'OutputDetails': [{'DurationInMs': 61500}]}]},
+            {'Id': 'job-5', 'Status': 'SUBMITTED'},
+            {'Id': 'job-6', 'Status': 'COMPLETE'},
+        ]
+        client = mock.Mock()
+        client.list_jobs.return_value = {'Jobs': jobs}
+
+        with mock.patch('utils.mediaconvert.get_media_convert', return_value=client), \
+                mock.patch('utils.mediaconvert.check_job_status.delay') as check_job_status, \
+                mock.patch('utils.s3.get_size', return_value=0):
+            mediaconvert._reconcile_account_jobs(None)
+
+        # Validate a single API call lists the jobs of all the videos
+        client.list_jobs.assert_called_once_with(MaxResults=20, Order='DESCENDING')
+        client.get_job.assert_not_called()
+        check_job_status.assert_not_called()
+
+        # Validate states
+        self.assertEqual(Media.State.PROCESSING, self._get_state(queued)[0])
+        self.assertEqual('PROGRESSING', Media.objects.get(pk=queued.pk).job_status)
+        self.assertEqual(42, self._get_state(processing)[1])
+        self.assertEqual(Media.State.PROCESSING_FAILED, self._get_state(failed)[0])
+        self.assertEqual((Media.State.FINISHED, None, 62), self._get_state(finished))
+        self.assertEqual(Media.State.QUEUED, self._get_state(submitted)[0])
+        self.assertEqual(Media.State.FINISHED, self._get_state(other)[0])
+
+    def test_reconcile_jobs_invalidates_caches(self):
+        queued = self._create_job_video(4, Media.State.QUEUED, 'job-1')
+        failed = self._create_job_video(5, Media.State.QUEUED, 'job-2')
+
+        self.client.login(username='user1', password='12345678')
+        self.client.get(reverse('dashboard'), format='json')
+        embed.get_embed_data(str(queued.video_id))
+        embed.get_embed_data(str(failed.video_id))
+        self.assertIsNotNone(cache.get(embed.VIDEO_KEY.format(queued.video_id)))
+
+        jobs = [
+            {'Id': 'job-1', 'Status': 'PROGRESSING', 'JobPercentComplete': 5},
+            {'Id': 'job-2', 'Status': 'ERROR'},
+        ]
+        client = mock.Mock()
+        client.list_jobs.return_value = {'Jobs': jobs}
+
+        with mock.patch('utils.mediaconvert.get_media_convert', return_value=client):
+            mediaconvert._reconcile_account_jobs(None)
+
+        # Validate the embed data is invalidated
+        self.assertIsNone(cache.get(embed.VIDEO_KEY.format(queued.video_id)))
+        self.assertIsNone(cache.get(embed.VIDEO_KEY.format(failed.video_id)))
+
+        response = self.client.get(reverse('dashboard'), format='json')
+
+        # Validate the dashboard counters are invalidated
+        self.assertEqual(1, response.json()['videos_in_process'])
+        self.assertEqual(1, response.json()['failed_videos'])
+
+    @override_settings(MEDIA_CONVERT_RECONCILE_MAX_PAGES=2)
+    def test_reconcile_jobs_pages(self):
+        video1 = self._create_job_video(4, Media.State.QUEUED, 'job-1')
+        video2 = self._create_job_video(5, Media.State.QUEUED, 'job-2')
+        video3 = self._create_job_video(6, Media.State.QUEUED, 'job-3')
+
+        client = mock.Mock()
+        client.list_jobs.side_effect = [
+            {'Jobs': [{'Id': 'job-1', 'Status': 'PROGRESSING'}], 'NextToken': 'page-2'},
+            {'Jobs': [{'Id': 'job-2', 'Status': 'PROGRESSING'}], 'NextToken': 'page-3'},
+        ]
+
+        with mock.patch('utils.mediaconvert.get_media_convert', return_value=client), \
+                mock.patch('utils.mediaconvert.check_job_status.delay') as check_job_status:
+            mediaconvert._reconcile_account_jobs(None)
+
+        # Validate the pages are listed up to the limit
+        self.assertEqual(2, client.list_jobs.call_count)
+        self.assertEqual('page-2', client.list_jobs.call_args[1]['NextToken'])
+        self.assertEqual(Media.State.PROCESSING, self._get_state(video1)[0])
+        self.assertEqual(Media.State.PROCESSING, self._get_state(video2)[0])
+
+        # Validate the jobs not found are checked one by one
+        check_job_status.assert_called_once_with(str(video3.video_id))
+
+    def test_reconcile_jobs_by_account(self):
+        self._create_job_video(4, Media.State.QUEUED, 'job-1')
+        self._create_job_video(5, Media.State.PROCESSING, 'job-2')
+        self._create_job_video(6, Media.State.FINISHED, 'job-3')
+
+        with mock.patch('utils.mediaconvert._reconcile_account_jobs.delay') as reconcile:
+            mediaconvert.reconcile_jobs()
+
+        # Validate a single task per account
+        reconcile.assert_called_once_with(None)
+    # </editor-fold>
+
+    # <editor-fold desc="Search Video TESTS">
+    def test_search_videos_by_name(self):
+        self.video2.name = 'Holiday trip'
+        self.video2.save()
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-list')
+        response = self.client.get(url, {'search': 'DAY TR'}, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        # Validate videos in results
+        self.assertEqual([str(self.video2.video_id)],
+                         [video['video_id'] for video in response.json()['results']])
+
+    def test_search_videos_by_tag(self):
+        tag = create_tags('Cooking', self.org1, 1)[0]
+        self.video1.tags.add(self.tag1, tag)
+        self.video3.tags.add(tag)
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-list')
+        response = self.client.get(url, {'search': 'ook'}, format='json')
+
+        # Validate videos in results, without duplicates
+        video_ids = [video['video_id'] for video in response.json()['results']]
+        self.assertCountEqual([str(self.video1.video_id), str(self.video3.video_id)], video_ids)
+
+    def test_search_videos_by_video_id(self):
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-list')
+        response = self.client.get(url, {'search': str(self.video2.video_id).upper()}, format='json')
+
+        # Validate videos in results
+        self.assertEqual([str(self.video2.video_id)],
+                         [video['video_id'] for video in response.json()['results']])
+
+        response = self.client.get(url, {'search': str(self.video2.video_id)[:13]}, format='json')
+
+        # Validate partial ids are still matched
+        self.assertEqual([str(self.video2.video_id)],
+                         [video['video_id'] for video in response.json()['results']])
+
+    def test_search_videos_by_custom_video_id(self):
+        self.video2.video_id = 'custom-id_2024'
+        self.video2.save()
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-list')
+        response = self.client.get(url, {'search': 'ID_20'}, format='json')
+
+        # Validate ids that aren't UUIDs are matched
+        self.assertEqual(['custom-id_2024'],
+                         [video['video_id'] for video in response.json()['results']])
+
+    def test_search_videos_by_created_by(self):
+        video = create_video('Video', self.su, self.org1, 4)
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-list')
+        response = self.client.get(url, {'search': 'admi'}, format='json')
+
+        # Validate videos in results
+        self.assertEqual([str(video.video_id)],
+                         [video['video_id'] for video in response.json()['results']])
+
+    def test_search_videos_by_created_by_other_organization(self):
+        create_video('Video', self.user2, self.org1, 4)
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-list')
+        response = self.client.get(url, {'search': 'user2'}, format='json')
+
+        # Validate only the accounts of the organization are matched
+        self.assertEqual(0, response.json()['count'])
+
+    def test_search_videos_all_terms(self):
+        self.video1.name = 'Cooking class'
+        self.video1.save()
+        self.video2.name = 'Cooking show'
+        self.video2.save()
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-list')
+        response = self.client.get(url, {'search': 'cooking show'}, format='json')
+
+        # Validate every term has to match
+        self.assertEqual([str(self.video2.video_id)],
+                         [video['video_id'] for video in response.json()['results']])
+
+    def test_search_videos_no_results(self):
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-list')
+        response = self.client.get(url, {'search': 'asdf1234'}, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        # Validate videos in results
+        self.assertEqual(0, response.json()['count'])
+
+    def test_search_videos_relevance_ordering(self):
+        tag = create_tags('Travel', self.org1, 1)[0]
+        self.video3.tags.add(tag)
+        self.video1.name = 'Travel'
+        self.video1.save()
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-list')
+        response = self.client.get(url, {'search': 'travel'}, format='json')
+
+        # Validate name matches are ranked before tag matches
+        self.assertEqual([str(self.video1.video_id), str(self.video3.video_id)],
+                         [video['video_id'] for video in response.json()['results']])
+
+        response = self.client.get(url, {'search': 'travel', 'ordering': 'created_at'},
+                                   format='json')
+
+        # Validate the requested ordering is kept
+        self.assertEqual([str(self.video1.video_id), str(self.video3.video_id)],
+                         [video['video_id'] for video in response.json()['results']])
+
+        response = self.client.get(url, {'search': 'travel', 'ordering': '-created_at'},
+                                   format='json')
+
+        self.assertEqual([str(self.video3.video_id), str(self.video1.video_id)],
+                         [video['video_id'] for video in response.json()['results']])
+
+    @staticmethod
+    def _get_tag_names(video):
+        return Media.objects.values_list('tag_names', flat=True).get(pk=video.pk)
+
+    def test_tag_names_kept_up_to_date(self):
+        tag1, tag2 = create_tags('Sports', self.org1, 2)
+
+        self.video1.tags.add(tag2, tag1)
+        self.assertEqual(['Sports 1', 'Sports 2'], self._get_tag_names(self.video1))
+
+        self.video1.tags.remove(tag1)
+        self.assertEqual(['Sports 2'], self._get_tag_names(self.video1))
+
+        tag2.name = 'Soccer'
+        tag2.save()
+        self.assertEqual(['Soccer'], self._get_tag_names(self.video1))
+
+        tag1.media.add(self.video1, self.video2)
+        tag1.media.clear()
+        self.assertEqual([], self._get_tag_names(self.video2))
+
+        tag2.delete()
+        self.assertEqual([], self._get_tag_names(self.video1))
+    # </editor-fold>
+
+    # <editor-fold desc="Filter Video TESTS">
+    def test_filter_videos_by_all_tags(self):
+        tag1, tag2 = create_tags('Sports', self.org1, 2)
+        self.video1.tags.add(tag1, tag2, self.tag1)
+        self.video2.tags.add(tag1)
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-list')
+        response = self.client.get(url, {'tags': f'{tag1.name},{tag2.name}'}, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        # Validate videos in results
+        self.assertEqual([str(self.video1.video_id)],
+                         [video['video_id'] for video in response.json()['results']])
+
+    def test_filter_videos_by_any_tag(self):
+        tag1, tag2 = create_tags('Sports', self.org1, 2)
+        self.video1.tags.add(tag1, tag2)
+        self.video2.tags.add(tag2)
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-list')
+        response = self.client.get(url, {'tags': f'{tag1.name},{tag2.name}', 'tags_mode': 'any'},
+                                   format='json')
+
+        # Validate videos in results, without duplicates
+        self.assertCountEqual([str(self.video1.video_id), str(self.video2.video_id)],
+                              [video['video_id'] for video in response.json()['results']])
+
+    def test_filter_videos_by_unknown_tag(self):
+        tag1 = create_tags('Sports', self.org1, 1)[0]
+        self.video1.tags.add(tag1)
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-list')
+        response = self.client.get(url, {'tags': f'{tag1.name},Unknown'}, format='json')
+
+        # Validate videos in results
+        self.assertEqual(0, response.json()['count'])
+
+    def test_filter_videos_by_tags_invalid_mode(self):
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-list')
+        response = self.client.get(url, {'tags': self.tag1.name, 'tags_mode': 'some'},
+                                   format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+    # </editor-fold>
+
+    # <editor-fold desc="Sparse Fieldsets TESTS">
+    def test_list_videos_with_fields(self):
+        self.video1.channel = self.chan1
+        self.video1.has_thumbnail = True
+        self.video1.save()
+        self.video1.tags.add(self.tag1)
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-list')
+        response = self.client.get(url, {'fields': 'video_id,name,tags,thumbnail_url'},
+                                   format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        # Validate only the requested fields are rendered, with the same values
+        videos = {video['video_id']: video for video in response.json()['results']}
+        expected = MediaSerializer(self.video1).data
+        self.assertEqual({key: expected[key] for key in ('video_id', 'name', 'tags', 'thumbnail_url')},
+                         videos[str(self.video1.video_id)])
+
+    def test_retrieve_video_with_exclude(self):
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-detail', kwargs={'pk': self.video1.pk})
+        response = self.client.get(url, {'exclude': 'tags,created_by,media_url'}, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        # Validate the excluded fields are not rendered
+        expected = MediaSerializer(self.video1).data
+        for key in ('tags', 'created_by', 'media_url'):
+            expected.pop(key)
+        self.assertEqual(expected, response.json())
+
+    def test_list_videos_with_unknown_fields(self):
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-list')
+        response = self.client.get(url, {'fields': 'video_id,password'}, format='json')
+
+        # Validate status code
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_list_videos_with_fields_loads_only_needed_data(self):
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-list')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': 'video_id,name'}, format='json')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        # Validate the media query neither joins nor prefetches other tables
+        media_queries = [query['sql'] for query in queries
+                         if 'FROM "video_media"' in query['sql'] and 'COUNT(' not in query['sql']]
+        self.assertEqual(1, len(media_queries))
+        self.assertNotIn('JOIN', media_queries[0])
+        self.assertNotIn('"video_media"."metadata"', media_queries[0])
+        self.assertFalse([query for query in queries if 'video_tag' in query['sql']])
+    # </editor-fold>
+
+    # <editor-fold desc="Export Video TESTS">
+    def test_export_videos_with_annon_user(self):
+        url = reverse('videos-export')
+        response = self.client.get(url)
+
+        # Validate status code
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_export_videos_ndjson(self):
+        self.video1.channel = self.chan1
+        self.video1.save()
+        self.video1.tags.add(self.tag1)
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-export')
+        response = self.client.get(url)
+
+        # Validate status code and content type
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('application/x-ndjson', response['Content-Type'])
+
+        # Validate every video of the organization is exported, newest first
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        expected = [JSONRenderer().render(MediaSerializer(video).data).decode()
+                    for video in (self.video3, self.video2, self.video1)]
+        self.assertEqual([json.loads(line) for line in expected],
+                         [json.loads(line) for line in lines])
+
+    def test_export_videos_csv_with_filters(self):
+        self.video2.tags.add(self.tag1)
+
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-export')
+        response = self.client.get(url, {'export_format': 'csv', 'tags': self.tag1.name,
+                                         'fields': 'video_id,name,tags'})
+
+        # Validate status code and content type
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('text/csv', response['Content-Type'])
+
+        # Validate the filtered videos and requested fields are exported
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual([
+            ['video_id', 'name', 'tags'],
+            [str(self.video2.video_id), self.video2.name,
+             json.dumps([{'id': self.tag1.id, 'name': self.tag1.name}])],
+        ], rows)
+
+    def test_export_videos_invalid_format(self):
+        self.client.login(username='user1', password='12345678')
+
+        url = reverse('videos-export')
+        response = self.client.get(url, {'export_format': 'xml'})
+
+        # Validate status code
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+    # </editor-fold>
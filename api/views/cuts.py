@@ -3,13 +3,14 @@ from rest_framework import viewsets, status
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
+from api.fieldsets import SparseFieldsetViewSetMixin
 from api.filters import LiveVideoCutsFilter
 from api.serializers.cuts import LiveVideoCutSerializer, UpdateLiveVideoCutSerializer, \
     CreateLiveVideoCutSerializer
 from video.models import LiveVideoCut
 
 
-class LiveVideoCutsViewSet(viewsets.ModelViewSet):
+class LiveVideoCutsViewSet(SparseFieldsetViewSetMixin, viewsets.ModelViewSet):
     search_fields = (
         '=created_by__username',
         'description',
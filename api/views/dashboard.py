@@ -1,6 +1,11 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from organization.models import Organization
+from video.dashboard import get_dashboard_key
 from video.models import LiveVideo, Media
 
 
@@ -9,26 +14,45 @@ class DashboardView(APIView):
     Returns data related to videos to display on the Website Dashboard
     """
 
-    def _get_videos(self):
-        organization = self.request.user.organization_id
+    def _get_live_videos_count(self):
+        live_videos = LiveVideo.objects.filter(organization_id=OuterRef('pk')) \
+            .order_by().values('organization_id').annotate(count=Count('id')).values('count')
 
-        return Media.objects.filter(organization_id=organization)
+        return Subquery(live_videos, output_field=IntegerField())
 
-    def _get_live_videos(self):
-        organization = self.request.user.organization_id
+    def _get_counters(self):
+        """
+        Every counter is computed with a single conditional aggregation over the media of
+        the organization, with the live videos counted in a subquery of the same statement.
+        """
+        user = self.request.user
+
+        counters = Organization.objects.filter(pk=user.organization_id).annotate(
+            videos_in_process=Count('media', filter=Q(media__state=Media.State.PROCESSING)),
+            failed_videos=Count('media', filter=Q(media__state__in=[
+                Media.State.QUEUING_FAILED, Media.State.PROCESSING_FAILED])),
+            uploaded_by_user=Count('media', filter=Q(media__created_by=user)),
+            uploaded_by_org=Count('media'),
+            live_videos_by_org=self._get_live_videos_count()
+        ).values('videos_in_process', 'failed_videos', 'uploaded_by_user', 'uploaded_by_org',
+                 'live_videos_by_org').first()
+
+        if counters is None:
+            counters = dict.fromkeys(['videos_in_process', 'failed_videos', 'uploaded_by_user',
+                                      'uploaded_by_org', 'live_videos_by_org'], 0)
+
+        # The subquery yields NULL when the organization has no live videos
+        counters['live_videos_by_org'] = counters['live_videos_by_org'] or 0
 
-        return LiveVideo.objects.filter(organization_id=organization)
+        return counters
 
     def get(self, request, format=None):
         user = self.request.user
+        key = get_dashboard_key(user.organization_id, user.pk)
 
-        response = {
-            'videos_in_process': self._get_videos().filter(state=Media.State.PROCESSING).count(),
-            'failed_videos': self._get_videos().filter(
-                state__in=[Media.State.QUEUING_FAILED, Media.State.PROCESSING_FAILED]).count(),
-            'uploaded_by_user': self._get_videos().filter(created_by=user).count(),
-            'uploaded_by_org': self._get_videos().count(),
-            'live_videos_by_org': self._get_live_videos().count()
-        }
+        response = cache.get(key)
+        if response is None:
+            response = self._get_counters()
+            cache.set(key, response, settings.DASHBOARD_CACHE_TIMEOUT)
 
         return Response(response)
@@ -1,17 +1,21 @@
 import requests
 
 from django.db import IntegrityError
+from django_filters.rest_framework import DjangoFilterBackend
 from django_fsm import TransitionNotAllowed
 
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
 from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
 from rest_framework import permissions
 
 from api.exceptions import SubscriptionError
-from api.filters import LiveVideoFilter
+from api.fieldsets import SparseFieldsetViewSetMixin
+from api.filters import LiveVideoFilter, VideoSearchFilter
+from api.pagination import PageNumberOrCursorPagination
 from api.serializers import LiveVideoSerializer, UpdateLiveVideoSerializer, \
     PartialUpdateLiveVideoSerializer, CreateLiveVideoSerializer, SubscribeSerializer, \
     NotifySerializer
@@ -19,7 +23,7 @@ from utils import medialive, sns
 from video.models import LiveVideo
 
 
-class LiveVideoViewSet(viewsets.ModelViewSet):
+class LiveVideoViewSet(SparseFieldsetViewSetMixin, viewsets.ModelViewSet):
     serializer_class = LiveVideoSerializer
     search_fields = (
         '=video_id',  # Exact field because of search filter
@@ -28,14 +32,24 @@ class LiveVideoViewSet(viewsets.ModelViewSet):
         'tags__name'
     )
 
+    pagination_class = PageNumberOrCursorPagination
+    ordering = ('-created_at', '-id')
     filterset_class = LiveVideoFilter
+    # The search runs last, as it orders by relevance when no ordering is requested
+    filter_backends = (DjangoFilterBackend, OrderingFilter, VideoSearchFilter)
+    fieldset_sources = {
+        'actual_cut': (),
+        'provisioning_progress': ('state', 'provisioned_steps'),
+    }
+    # Read by LiveVideo.__init__
+    fieldset_required = ('channel', 'geolocation_type', 'geolocation_countries')
 
     def get_queryset(self):
         user = self.request.user
 
         return LiveVideo.objects.select_related('organization', 'channel',
                                                 'created_by').prefetch_related('tags').filter(
-            organization_id=user.organization_id).order_by('-created_at')
+            organization_id=user.organization_id).order_by('-created_at', '-id')
 
     def get_serializer_class(self):
         serializer_class = {
@@ -54,7 +68,8 @@ class LiveVideoViewSet(viewsets.ModelViewSet):
     def get_permissions(self):
         permission_classes = {
             'create': [permissions.IsAdminUser],
-            'destroy': [permissions.IsAdminUser]
+            'destroy': [permissions.IsAdminUser],
+            're_provision': [permissions.IsAdminUser]
         }
 
         if self.action and self.action in permission_classes.keys():
@@ -79,20 +94,36 @@ class LiveVideoViewSet(viewsets.ModelViewSet):
         except IntegrityError:
             raise ValidationError({'non_field_errors': ['Error while creating live video.']})
 
+        # The AWS resources are provisioned in the background, the progress is in the response
         data = LiveVideoSerializer(live).data
 
         return Response(data, status=HTTP_201_CREATED)
-    
+
+    # POST /live-videos/{id}/re_provision
+    @action(detail=True, methods=['post'])
+    def re_provision(self, request, **kwargs):
+        live = self.get_object()
+
+        try:
+            live.re_provision()
+        except TransitionNotAllowed:
+            raise ValidationError(
+                {'non_field_errors': ['Cannot be changed to the entered state.']})
+
+        return Response(LiveVideoSerializer(live).data)
 
     # DELETE /live-videos/{id}/to_delete
     @action(detail=True, methods=['delete'])
     def to_delete(self, request, **kwargs):
+        live = self.get_object()
+
+        # The teardown runs in the background, a failed one is resumed
         try:
-            live = self.get_object()
             live.to_deleting()
-        except :
+        except TransitionNotAllowed:
             raise ValidationError({'non_field_errors': ['Error while deleting live video.']})
-        return Response(status=HTTP_200_OK)
+
+        return Response(LiveVideoSerializer(live).data, status=HTTP_200_OK)
     
     # POST /live-videos/{id}/to_on
     @action(detail=True, methods=['post'])
@@ -2,26 +2,37 @@ import hmac
 
 import datetime
 import hashlib
-from django.db import IntegrityError
+import requests
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.http import HttpResponse
+from django_filters.rest_framework import DjangoFilterBackend
 from django_fsm import TransitionNotAllowed
-from rest_framework import viewsets
+from rest_framework import permissions, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
-from rest_framework.status import HTTP_201_CREATED, HTTP_200_OK
+from rest_framework.status import HTTP_201_CREATED, HTTP_200_OK, HTTP_202_ACCEPTED
 from rest_framework.status import HTTP_400_BAD_REQUEST
 
-from api.filters import MediaFilter
+from api.export import export_response
+from api.fieldsets import SparseFieldsetViewSetMixin
+from api.filters import MediaFilter, VideoSearchFilter
+from api.pagination import PageNumberOrCursorPagination
 from api.serializers import MediaSerializer, CreateMediaSerializer, UpdateMediaSerializer, \
-    PartialUpdateMediaSerializer, ThumbnailMediaSerializer
+    PartialUpdateMediaSerializer, ThumbnailMediaSerializer, BulkCreateMediaSerializer, \
+    BulkTransitionMediaSerializer, NotifySerializer
+from utils import mediaconvert, sns
 from utils.cloudfront import create_invalidation
-from utils.s3 import get_put_presigned_s3_url, delete_object, get_signature_key
+from utils.s3 import get_put_presigned_s3_url, get_put_presigned_s3_urls, delete_object, \
+    get_signature_key
 from video.models import Media
+from video.tasks import start_bulk_transition, get_bulk_transition
 
 
-class MediaViewSet(viewsets.ModelViewSet):
+class MediaViewSet(SparseFieldsetViewSetMixin, viewsets.ModelViewSet):
     serializer_class = MediaSerializer
     search_fields = (
         'video_id',
@@ -29,21 +40,32 @@ class MediaViewSet(viewsets.ModelViewSet):
         'created_by__username',
         'tags__name'
     )
+    pagination_class = PageNumberOrCursorPagination
+    ordering = ('-created_at', '-id')
     filterset_class = MediaFilter
+    # The search runs last, as it orders by relevance when no ordering is requested
+    filter_backends = (DjangoFilterBackend, OrderingFilter, VideoSearchFilter)
+    fieldset_sources = {
+        'thumbnail_url': ('channel', 'video_id', 'media_type', 'has_thumbnail'),
+        'media_url': ('channel', 'video_id', 'media_type', 'has_thumbnail'),
+    }
 
     def get_queryset(self):
         user = self.request.user
 
         return Media.objects.select_related('organization', 'channel',
                                             'created_by').prefetch_related('tags').filter(
-            organization_id=user.organization_id).order_by('-created_at')
+            organization_id=user.organization_id).order_by('-created_at', '-id')
 
     def get_serializer_class(self):
         serializer_class = {
             'create': CreateMediaSerializer,
             'update': UpdateMediaSerializer,
             'partial_update': PartialUpdateMediaSerializer,
-            'thumbnail': ThumbnailMediaSerializer
+            'thumbnail': ThumbnailMediaSerializer,
+            'bulk_create': BulkCreateMediaSerializer,
+            'bulk_transition': BulkTransitionMediaSerializer,
+            'notify': NotifySerializer
         }
 
         if self.action and self.action in serializer_class.keys():
@@ -88,6 +110,111 @@ class MediaViewSet(viewsets.ModelViewSet):
 
         return Response(data, status=HTTP_201_CREATED)
 
+    @action(detail=False, methods=['post'])
+    def bulk_create(self, request, **kwargs):
+        input_serializer = self.get_serializer(data=request.data)
+        input_serializer.is_valid(raise_exception=True)
+
+        user = self.request.user
+        organization = user.organization
+
+        if not organization.upload_enabled:
+            raise PermissionDenied()
+
+        items = input_serializer.validated_data['media']
+        content_types = [item.pop('content_type') for item in items]
+        media = [Media(created_by=user, organization=organization, **item) for item in items]
+
+        # The new media are waiting for their file, so the post_save receivers skipped by
+        # bulk_create have nothing to do
+        try:
+            with transaction.atomic():
+                Media.objects.bulk_create(media)
+        except IntegrityError:
+            raise ValidationError({'non_field_errors': ['Error creating videos.']})
+
+        signed_urls = get_put_presigned_s3_urls(
+            organization,
+            [(f'{video.video_id}/input.mp4', content_type)
+             for video, content_type in zip(media, content_types)]
+        )
+
+        data = [
+            {
+                'video_id': str(video.video_id),
+                'signed_url': signed_url
+            }
+            for video, signed_url in zip(media, signed_urls)
+        ]
+
+        return Response(data, status=HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    def bulk_transition(self, request, **kwargs):
+        input_serializer = self.get_serializer(data=request.data)
+        input_serializer.is_valid(raise_exception=True)
+
+        video_ids = input_serializer.validated_data['video_ids']
+        transition = input_serializer.validated_data['transition']
+
+        videos = list(Media.objects.filter(organization_id=request.user.organization_id,
+                                           video_id__in=video_ids)
+                      .values_list('video_id', 'organization__aws_account_id'))
+        found = {video_id for video_id, _ in videos}
+
+        # The transitions run in Celery, so the response doesn't wait for AWS
+        batch_id = start_bulk_transition(request.user.organization_id, transition, videos)
+
+        data = {
+            'batch_id': batch_id,
+            'total': len(videos),
+            'not_found': [video_id for video_id in video_ids if video_id not in found]
+        }
+
+        return Response(data, status=HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], url_path=r'bulk_transition/(?P<batch_id>[^/.]+)')
+    def bulk_transition_status(self, request, batch_id, **kwargs):
+        batch = get_bulk_transition(batch_id)
+
+        if batch is None or batch.pop('organization_id') != request.user.organization_id:
+            raise NotFound()
+
+        return Response(batch, status=HTTP_200_OK)
+
+    # POST /videos/notify
+    @action(detail=False, methods=['post'], permission_classes=[permissions.AllowAny])
+    def notify(self, request, **kwargs):
+        input_serializer = self.get_serializer(data=request.data)
+        input_serializer.is_valid(raise_exception=True)
+
+        # Anyone can post here, only the job events topics of the AWS accounts are trusted
+        topic_arn = input_serializer.validated_data['TopicArn']
+        if not mediaconvert.is_job_events_topic(topic_arn):
+            raise PermissionDenied()
+
+        if input_serializer.validated_data['SubscribeURL']:
+            subscribe_url = input_serializer.validated_data['SubscribeURL']
+            if not sns.is_subscribe_url(subscribe_url, topic_arn):
+                raise PermissionDenied()
+
+            # Confirm subscription to topic
+            requests.get(subscribe_url)
+        elif input_serializer.validated_data['Message']:
+            # MediaConvert job state change
+            mediaconvert.job_state_changed(input_serializer.validated_data['Message'])
+
+        return Response()
+
+    @action(detail=False, methods=['get'])
+    def export(self, request, **kwargs):
+        # Every filtered video in one response, streamed from a server-side cursor
+        queryset = self.filter_queryset(self.get_queryset())
+        export_format = request.query_params.get('export_format', 'ndjson')
+
+        return export_response(queryset, self.get_serializer, export_format, 'videos',
+                               settings.EXPORT_CHUNK_SIZE)
+
     @action(detail=True, methods=['post'])
     def to_queued(self, request, **kwargs):
         media = self.get_object()
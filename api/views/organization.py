@@ -1,7 +1,12 @@
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.status import HTTP_200_OK
 
 from api.serializers import OrganizationSerializer
 from organization.models import Organization
+from organization.tasks import get_distributions_update
 
 
 class OrganizationViewSet(viewsets.ModelViewSet):
@@ -11,3 +16,13 @@ class OrganizationViewSet(viewsets.ModelViewSet):
         user = self.request.user
 
         return Organization.objects.filter(id=user.organization_id)
+
+    # GET /organizations/distribution_update/{batch_id}
+    @action(detail=False, methods=['get'], url_path=r'distribution_update/(?P<batch_id>[^/.]+)')
+    def distribution_update_status(self, request, batch_id, **kwargs):
+        batch = get_distributions_update(batch_id)
+
+        if batch is None or batch.pop('organization_id') != request.user.organization_id:
+            raise NotFound()
+
+        return Response(batch, status=HTTP_200_OK)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class ConfigurationConfig(AppConfig):
     name = 'configuration'
+
+    def ready(self):
+        # Connect the template cache invalidation receivers
+        from configuration import cache  # noqa
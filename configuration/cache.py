@@ -0,0 +1,118 @@
+"""
+Cache of the configuration templates: the global CloudFront configuration and the
+MediaConvert and MediaLive configurations of the plans.
+
+Templates are kept pickled in the process and in the shared cache, under a version that
+changes every time a configuration is saved or deleted, so a process only checks the
+version to know its copy is current. Every caller gets its own copy, unpickled from the
+stored bytes, that it can patch for a job without touching the cached template.
+"""
+import pickle
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from configuration.models import Configuration, MediaConvertConfiguration, \
+    MediaLiveConfiguration
+
+VERSION_KEY = 'configuration:version'
+TEMPLATE_KEY = 'configuration:{}:{}'
+
+CLOUDFRONT = 'cloudfront'
+MEDIA_CONVERT = 'mediaconvert:{}'
+MEDIA_LIVE = 'medialive:{}'
+
+_lock = threading.Lock()
+_templates = {}
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(VERSION_KEY, version, None):
+            version = cache.get(VERSION_KEY, version)
+
+    return version
+
+
+def bump_version():
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def _get_template(name, load):
+    """
+    Return a copy of the template `name`, built by `load` if it isn't cached.
+    """
+    version = get_version()
+    entry = _templates.get(name)
+
+    if entry is None or entry[0] != version:
+        key = TEMPLATE_KEY.format(version, name)
+        data = cache.get(key)
+
+        if data is None:
+            data = pickle.dumps(load(), pickle.HIGHEST_PROTOCOL)
+            cache.set(key, data, settings.CONFIGURATION_CACHE_TIMEOUT)
+
+        entry = (version, data)
+        with _lock:
+            _templates[name] = entry
+
+    return pickle.loads(entry[1])
+
+
+def get_cloudfront_configuration():
+    """
+    :return: copy of the CloudFront distribution configuration of the global Configuration
+    """
+    return _get_template(CLOUDFRONT, lambda: Configuration.get_solo().cloud_front_configuration)
+
+
+def get_media_convert_settings(configuration_id):
+    """
+    :return: copy of the `settings` of a MediaConvertConfiguration
+    """
+    return _get_template(
+        MEDIA_CONVERT.format(configuration_id),
+        lambda: MediaConvertConfiguration.objects.get(pk=configuration_id).settings
+    )
+
+
+def get_media_live_settings(configuration_id):
+    """
+    :return: copy of the `source_settings`, `destination_settings` and `encoder_settings` of
+        a MediaLiveConfiguration, as a dict
+    """
+    def load():
+        conf = MediaLiveConfiguration.objects.get(pk=configuration_id)
+        return {
+            'source_settings': conf.source_settings,
+            'destination_settings': conf.destination_settings,
+            'encoder_settings': conf.encoder_settings,
+        }
+
+    return _get_template(MEDIA_LIVE.format(configuration_id), load)
+
+
+# The version is changed right away, so nothing is cached from the old rows while the
+# change isn't committed, and again once it is
+@receiver(post_save, sender=Configuration, dispatch_uid='configuration_saved')
+@receiver(post_save, sender=MediaConvertConfiguration,
+          dispatch_uid='media_convert_configuration_saved')
+@receiver(post_save, sender=MediaLiveConfiguration,
+          dispatch_uid='media_live_configuration_saved')
+@receiver(post_delete, sender=Configuration, dispatch_uid='configuration_deleted')
+@receiver(post_delete, sender=MediaConvertConfiguration,
+          dispatch_uid='media_convert_configuration_deleted')
+@receiver(post_delete, sender=MediaLiveConfiguration,
+          dispatch_uid='media_live_configuration_deleted')
+def configuration_changed_receiver(sender, instance, **kwargs):
+    bump_version()
+    transaction.on_commit(bump_version)
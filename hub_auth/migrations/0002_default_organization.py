@@ -0,0 +1,40 @@
+from django.db import migrations
+
+from utils.s3 import generate_bucket_name
+
+
+def create_default_organization(apps, schema_editor):
+    # hub_auth.default saves the default organization, this only creates it when missing.
+    # The historical model sends no signals, its bucket and default channel are provisioned
+    # from the admin, see organization.provisioning
+    Organization = apps.get_model('organization', 'Organization')
+    if Organization.objects.filter(pk=1).exists():
+        return
+
+    Plan = apps.get_model('organization', 'Plan')
+    AWSAccount = apps.get_model('organization', 'AWSAccount')
+    plan = Plan.objects.filter(name='Default Plan').first()
+    aws_account = AWSAccount.objects.filter(name='Default AWS Account').first()
+    if not plan or not aws_account:
+        return
+
+    name = 'Default Organization'
+    Organization.objects.create(id=1, name=name, bucket_name=generate_bucket_name(name),
+                                plan=plan, aws_account=aws_account, provisioning_state='failed')
+
+
+class Migration(migrations.Migration):
+
+    # hub_auth.default saves the default organization with the Organization model, which
+    # needs the current organization columns, and stores a null MediaConvert endpoint when
+    # it can't be discovered. Depending on the last organization migration runs them before
+    # hub_auth.default on new installs, the dependencies of an applied migration can't be
+    # changed
+    dependencies = [
+        ('hub_auth', 'default'),
+        ('organization', '0006_media_convert_endpoint_null'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_default_organization, migrations.RunPython.noop),
+    ]
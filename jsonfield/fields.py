@@ -17,7 +17,7 @@ try:
 except ImportError:
     from django.forms.util import ValidationError
 
-from .subclassing import SubfieldBase
+from .subclassing import SubfieldBase, Undecoded
 from .encoder import JSONEncoder
 
 
@@ -66,34 +66,39 @@ class JSONFieldBase(six.with_metaclass(SubfieldBase, models.Field)):
 
         SubfieldBase metaclass has been modified to call this method instead of
         to_python so that we can check the obj state and determine if it needs to be
-        deserialized"""
-
-        if obj._state.adding:
-            # Make sure the primary key actually exists on the object before
-            # checking if it's empty. This is a special case for South datamigrations
-            # see: https://github.com/bradjasper/django-jsonfield/issues/52
-            if isinstance(value, six.string_types):
-                try:
-                    return json.loads(value, **self.load_kwargs)
-                except ValueError:
-                    raise ValidationError(_("Enter valid JSON"))
-                except AttributeError:
-                    # south fake meta class doesn't create proper attributes
-                    # see this:
-                    # https://github.com/bradjasper/django-jsonfield/issues/52
-                    pass
+        deserialized. Strings are only marked as undecoded here, they are decoded on
+        first access (see subclassing.Creator)"""
+
+        if obj._state.adding and isinstance(value, six.string_types):
+            return value if isinstance(value, Undecoded) else Undecoded(value)
 
         return value
 
+    def loads(self, value):
+        try:
+            return json.loads(value, **self.load_kwargs)
+        except ValueError:
+            raise ValidationError(_("Enter valid JSON"))
+
     def to_python(self, value):
         """The SubfieldBase metaclass calls pre_init instead of to_python, however to_python
         is still necessary for Django's deserializer"""
         return value
 
+    def pre_save(self, model_instance, add):
+        # Values that were never read are saved back as they are, once they are validated
+        value = model_instance.__dict__.get(self.attname)
+        if isinstance(value, Undecoded):
+            self.loads(value)
+            return value
+        return super(JSONFieldBase, self).pre_save(model_instance, add)
+
     def get_db_prep_value(self, value, connection, prepared=False):
         """Convert JSON object to a string"""
         if self.null and value is None:
             return None
+        if isinstance(value, Undecoded):
+            return str(value)
         return json.dumps(value, **self.dump_kwargs)
 
     def value_to_string(self, obj):
@@ -160,8 +165,71 @@ class JSONCharField(JSONFieldBase, models.CharField):
     form_class = JSONCharFormField
 
 
+class JSONBField(JSONFieldBase, models.Field):
+    """JSONBField serializes/deserializes JSON objects like JSONField, stored in a
+    PostgreSQL jsonb column. It can be GIN indexed and queried by key, e.g.
+    `config__qtracking__enabled=True`, or with the `contains`, `contained_by` and
+    `has_key(s)` lookups of django.contrib.postgres.
+
+    Values are selected as text and lazily decoded like JSONField, so `values()` returns
+    the same for both. psycopg2 and django.contrib.postgres are only imported when a
+    JSONBField is used, so the module can still be imported with other databases.
+
+    A JSONField is migrated by changing it to a JSONBField and running makemigrations,
+    PostgreSQL converts the text of the existing rows with `USING column::jsonb`."""
+    form_class = JSONFormField
+    empty_strings_allowed = False
+
+    def db_type(self, connection):
+        return 'jsonb'
+
+    def select_format(self, compiler, sql, params):
+        # psycopg2 would decode jsonb values right away
+        return '(%s)::text' % sql, params
+
+    def from_db_value(self, value, expression, connection):
+        if isinstance(value, six.string_types) and not isinstance(value, Undecoded):
+            return Undecoded(value)
+        return value
+
+    def get_lookup(self, lookup_name):
+        from django.contrib.postgres import lookups
+
+        jsonb_lookups = {lookup.lookup_name: lookup for lookup in (
+            lookups.DataContains, lookups.ContainedBy, lookups.HasKey, lookups.HasKeys,
+            lookups.HasAnyKeys, lookups.JSONExact)}
+        return jsonb_lookups.get(lookup_name) or super(JSONBField, self).get_lookup(lookup_name)
+
+    def get_transform(self, name):
+        from django.contrib.postgres.fields.jsonb import KeyTransformFactory
+
+        transform = super(JSONBField, self).get_transform(name)
+        if transform:
+            return transform
+        return KeyTransformFactory(name)
+
+    def get_prep_value(self, value):
+        from psycopg2.extras import Json
+
+        if self.null and value is None:
+            return None
+        if isinstance(value, Undecoded):
+            return str(value)
+        return Json(value, dumps=lambda obj: json.dumps(obj, **self.dump_kwargs))
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        return value
+
+    def dumps_for_display(self, value):
+        kwargs = { "indent": 2 }
+        kwargs.update(self.dump_kwargs)
+        return json.dumps(value, **kwargs)
+
+
 try:
     from south.modelsinspector import add_introspection_rules
-    add_introspection_rules([], ["^jsonfield\.fields\.(JSONField|JSONCharField)"])
+    add_introspection_rules([], ["^jsonfield\.fields\.(JSONField|JSONCharField|JSONBField)"])
 except ImportError:
     pass
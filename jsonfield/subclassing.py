@@ -21,6 +21,12 @@ class SubfieldBase(type):
         )
         return new_class
 
+class Undecoded(str):
+    """
+    JSON text read from the database that hasn't been decoded yet.
+    """
+
+
 class Creator(object):
     """
     A placeholder class that provides a way to set the attribute on the model.
@@ -31,7 +37,15 @@ class Creator(object):
     def __get__(self, obj, type=None):
         if obj is None:
             raise AttributeError('Can only be accessed via an instance.')
-        return obj.__dict__[self.field.name]
+
+        value = obj.__dict__[self.field.name]
+
+        # Values are decoded on first access, so rows whose JSON is never read don't pay
+        # for it
+        if isinstance(value, Undecoded):
+            value = obj.__dict__[self.field.name] = self.field.loads(value)
+
+        return value
 
     def __set__(self, obj, value):
         # Usually this would call to_python, but we've changed it to pre_init
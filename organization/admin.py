@@ -1,122 +1,86 @@
 from django.contrib import admin, messages
+from django.db import transaction
+from django_fsm import TransitionNotAllowed
 from fernet_fields import EncryptedCharField
 from django.forms import widgets
 
-from utils import cloudfront
 from organization.models import Organization, Channel, AWSAccount, Plan, Bill
+from organization.provisioning import start_channels_provisioning
+from organization.tasks import start_distributions_update
 
 
-def disable_organization_data_traffic(modeladmin, request, queryset):
+def start_organization_distributions_update(modeladmin, request, queryset, operation):
+    # Every distribution goes through CloudFront, so they're updated in the background and
+    # the flag of the organization is changed once all of them are
     for org in queryset:
-        update_organization_data_traffic(org, False)
+        batch_id = start_distributions_update(org, operation)
+        modeladmin.message_user(
+            request,
+            f'The distributions of {org.name} are being updated in the background (batch {batch_id}).')
 
-def enable_organization_data_traffic(modeladmin, request, queryset):
-    for org in queryset:
-        update_organization_data_traffic(org, True)
 
-def update_organization_data_traffic(org, status):
-    # update organization distribution status if exists
-    if org.cf_id:
-        cloudfront.update_distribution_status(org, org.cf_id, status)
+def disable_organization_data_traffic(modeladmin, request, queryset):
+    start_organization_distributions_update(modeladmin, request, queryset, 'disable_traffic')
 
-    # udpate channels distributions status
-    cf_dist_channels = org.channels.all().values_list('cf_id', flat=True)
-    for chan in cf_dist_channels:
-        cloudfront.update_distribution_status(org, chan, status)
 
-    # update live videos distributions status
-    cf_dist_live = org.live_videos.all().values_list('cf_id', flat=True)
-    for dist in cf_dist_live:
-        cloudfront.update_distribution_status(org, dist, status)
-    org.traffic_enabled = status
-    org.save()
+def enable_organization_data_traffic(modeladmin, request, queryset):
+    start_organization_distributions_update(modeladmin, request, queryset, 'enable_traffic')
 
 
 def enable_signed_url_security(modeladmin, request, queryset):
-    # After applying the change to the channels, change this to do it for each channel
     for org in queryset:
         if not org.aws_account.cf_private_key and not org.aws_account.cf_key_pair_id:
             return messages.error(request,
                                   f'The organization {org.name} does not have a private key specified in its AWS account.')
 
-        cf = cloudfront.get_cloudfront_client(org.aws_account)
-        
-        # Update organization distribution trusted signers if exists
-        if org.cf_id:
-            update_cf_config_with_trusted_signer(cf, org.cf_id, org.aws_account.account_id)
-
-        # Udpate channels distributions status
-        cf_dist_channels = org.channels.all().values_list('cf_id', flat=True)
-        for chan in cf_dist_channels:
-            update_cf_config_with_trusted_signer(cf, chan, org.aws_account.account_id)
-
-        live_dist = org.live_videos.all().values_list('cf_id', flat=True)
-
-        for dist in live_dist:
-            update_cf_config_with_trusted_signer(cf, dist, org.aws_account.account_id)
-
-        org.security_enabled = True
-        org.save()
+    start_organization_distributions_update(modeladmin, request, queryset, 'enable_security')
 
 
 def disable_signed_url_security(modeladmin, request, queryset):
-    # After applying the change to the channels, change this to do it for each channel
-    for org in queryset:
-        cf = cloudfront.get_cloudfront_client(org.aws_account)
-
-        # Update organization distribution trusted signers if exists
-        if org.cf_id:
-            update_cf_config_with_trusted_signer(cf, org.cf_id, org.aws_account.account_id)
+    start_organization_distributions_update(modeladmin, request, queryset, 'disable_security')
 
-        # Udpate channels distributions status
-        cf_dist_channels = org.channels.all().values_list('cf_id', flat=True)
-        for chan in cf_dist_channels:
-            update_cf_config_without_trusted_signer(cf, chan)
 
-        live_dist = org.live_videos.all().values_list('cf_id', flat=True)
-
-        for dist in live_dist:
-            update_cf_config_without_trusted_signer(cf, dist)
+def re_provision_organizations(modeladmin, request, queryset):
+    for org in queryset:
+        try:
+            org.re_provision()
+        except TransitionNotAllowed:
+            messages.error(request, f'The organization {org.name} cannot be provisioned again.')
 
-        org.security_enabled = False
-        org.save()
 
+def re_provision_channels(modeladmin, request, queryset):
+    """
+    Provision the failed channels again, all of them at the same time.
+    """
+    channel_ids = []
+    for channel in queryset:
+        try:
+            channel._re_provision()
+        except TransitionNotAllowed:
+            messages.error(request, f'The channel {channel.name} cannot be provisioned again.')
+        else:
+            channel.save(update_fields=['provisioning_state'])
+            channel_ids.append(channel.pk)
 
-def update_cf_config_with_trusted_signer(cf, cf_id, account_id):
-    cf_conf = cf.get_distribution_config(Id=cf_id)
-    cf_config_etag = cf_conf['ETag']
-    cf_conf['DistributionConfig']['DefaultCacheBehavior']['TrustedSigners'] = {
-        "Enabled": True,
-        "Quantity": 1,
-        "Items": [
-            account_id
-        ]
-    }
-    cf.update_distribution(
-        Id=cf_id, IfMatch=cf_config_etag, DistributionConfig=cf_conf['DistributionConfig']
-    )
+    if channel_ids:
+        transaction.on_commit(lambda: start_channels_provisioning(channel_ids))
 
 
-def update_cf_config_without_trusted_signer(cf, cf_id):
-    cf_conf = cf.get_distribution_config(Id=cf_id)
-    cf_config_etag = cf_conf['ETag']
-    cf_conf['DistributionConfig']['DefaultCacheBehavior']['TrustedSigners'] = {
-        "Enabled": False,
-        "Quantity": 0
-    }
-    cf.update_distribution(
-        Id=cf_id, IfMatch=cf_config_etag, DistributionConfig=cf_conf['DistributionConfig']
-    )
+re_provision_organizations.short_description = 'Re-provision organizations'
+re_provision_channels.short_description = 'Re-provision channels'
 
 
 @admin.register(Organization)
 class OrganizationAdmin(admin.ModelAdmin):
     actions = [disable_organization_data_traffic, enable_organization_data_traffic,
-               enable_signed_url_security, disable_signed_url_security]
+               enable_signed_url_security, disable_signed_url_security,
+               re_provision_organizations]
     list_display = (
-    'id', 'name', 'contact_email', 'traffic_enabled', 'upload_enabled', 'security_enabled',)
+    'id', 'name', 'contact_email', 'traffic_enabled', 'upload_enabled', 'security_enabled',
+    'provisioning_state',)
+    list_filter = ('provisioning_state',)
     search_fields = ('name',)
-    readonly_fields = ('traffic_enabled', 'security_enabled',)
+    readonly_fields = ('traffic_enabled', 'security_enabled', 'provisioning_state',)
 
 
 @admin.register(Plan)
@@ -134,8 +98,11 @@ class BillsAdmin(admin.ModelAdmin):
 
 @admin.register(Channel)
 class ChannelAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'organization', 'allowed_domains', 'detect_adblock')
-    list_filter = ('organization',)
+    actions = [re_provision_channels]
+    list_display = ('id', 'name', 'organization', 'allowed_domains', 'detect_adblock',
+                    'provisioning_state')
+    list_filter = ('organization', 'provisioning_state')
+    readonly_fields = ('provisioning_state',)
     search_fields = ('name', 'organization__name')
 
 
@@ -0,0 +1,18 @@
+# Generated by Django 2.1.5 on 2026-10-18 14:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0002_auto_20231201_1506'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='awsaccount',
+            name='media_convert_endpoint_url',
+            field=models.URLField(blank=True, max_length=254, verbose_name='MediaConvert Endpoint URL'),
+        ),
+    ]
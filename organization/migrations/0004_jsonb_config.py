@@ -0,0 +1,29 @@
+# Generated by Django 2.1.5 on 2026-10-18 14:17
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+import jsonfield.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0003_media_convert_endpoint_blank'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bill',
+            name='extras',
+            field=jsonfield.fields.JSONBField(blank=True, default=dict, verbose_name='Extra information'),
+        ),
+        migrations.AlterField(
+            model_name='organization',
+            name='config',
+            field=jsonfield.fields.JSONBField(blank=True, default=dict, verbose_name='Configuration'),
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['config'], name='organization_config_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 2.1.5 on 2026-10-18 14:29
+
+from django.db import migrations
+import django_fsm
+
+def mark_unprovisioned_organizations(apps, schema_editor):
+    # Organizations without channels were never provisioned, e.g. the creation of their
+    # bucket failed, they can be provisioned again from the admin
+    Organization = apps.get_model('organization', 'Organization')
+    Organization.objects.filter(channels__isnull=True).update(provisioning_state='failed')
+
+
+CHOICES = [('provisioning', 'provisioning'), ('provisioned', 'provisioned'), ('failed', 'failed')]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0004_jsonb_config'),
+    ]
+
+    # Existing organizations and channels are provisioned, new ones start provisioning
+    operations = [
+        migrations.AddField(
+            model_name='channel',
+            name='provisioning_state',
+            field=django_fsm.FSMField(choices=CHOICES, default='provisioned', editable=False, max_length=50, verbose_name='Provisioning state'),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='provisioning_state',
+            field=django_fsm.FSMField(choices=CHOICES, default='provisioned', editable=False, max_length=50, verbose_name='Provisioning state'),
+        ),
+        migrations.AlterField(
+            model_name='channel',
+            name='provisioning_state',
+            field=django_fsm.FSMField(choices=CHOICES, default='provisioning', editable=False, max_length=50, verbose_name='Provisioning state'),
+        ),
+        migrations.AlterField(
+            model_name='organization',
+            name='provisioning_state',
+            field=django_fsm.FSMField(choices=CHOICES, default='provisioning', editable=False, max_length=50, verbose_name='Provisioning state'),
+        ),
+        migrations.RunPython(mark_unprovisioned_organizations, migrations.RunPython.noop),
+    ]
@@ -33,7 +33,10 @@ class AWSAccount(models.Model):
                                            verbose_name='Secret Access Key')
     region = models.CharField(max_length=254, verbose_name='Region', choices=REGION_CHOICES)
     media_convert_role = models.CharField(max_length=254, verbose_name='MediaConvert Role')
+    # Discovered and stored on first use when left blank or null, see utils.mediaconvert
     media_convert_endpoint_url = models.URLField(max_length=254,
+                                                 blank=True,
+                                                 null=True,
                                                  verbose_name='MediaConvert Endpoint URL')
     media_live_role = models.CharField(max_length=254, verbose_name='MediaLive Role')
     account_id = models.CharField(max_length=64, verbose_name='Account Id', blank=False, null=True)
@@ -1,7 +1,7 @@
 from django.utils import timezone
 
 from django.db import models
-from jsonfield import JSONField
+from jsonfield import JSONBField
 from organization.models import Organization, Plan
 
 
@@ -27,9 +27,9 @@ class Bill(models.Model):
                                 verbose_name='Storage (GB)')
     data_transfer = models.FloatField(default=0,
                                       verbose_name='Traffic (GB)')
-    extras = JSONField(blank=True,
-                       default=dict,
-                       verbose_name='Extra information')
+    extras = JSONBField(blank=True,
+                        default=dict,
+                        verbose_name='Extra information')
 
     def __str__(self):
         date = self.date.strftime('%b-%Y')
@@ -1,13 +1,14 @@
 from secrets import token_urlsafe
 
 import sys
-import time
 from django.contrib.postgres.fields import ArrayField
-from django.db import models
+from django.db import models, transaction
 from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
+from django_fsm import FSMField, transition
 
 from organization.models import Organization
+from organization.models.organization import ProvisioningState
 from utils import cloudfront
 
 
@@ -45,10 +46,34 @@ class Channel(models.Model):
                                  editable=False,
                                  default='',
                                  verbose_name='Cf_domain')
+    # The distribution is created in the background, see organization.provisioning
+    provisioning_state = FSMField(default=ProvisioningState.PROVISIONING,
+                                  choices=ProvisioningState.CHOICES,
+                                  editable=False,
+                                  verbose_name='Provisioning state')
 
     def __str__(self):
         return self.name
 
+    @transition(field=provisioning_state, source=[ProvisioningState.PROVISIONING],
+                target=ProvisioningState.PROVISIONED)
+    def _to_provisioned(self):
+        pass
+
+    @transition(field=provisioning_state, source=[ProvisioningState.PROVISIONING],
+                target=ProvisioningState.FAILED)
+    def _to_provisioning_failed(self):
+        pass
+
+    @transition(field=provisioning_state, source=[ProvisioningState.FAILED],
+                target=ProvisioningState.PROVISIONING)
+    def _re_provision(self):
+        pass
+
+    def to_provisioning_failed(self):
+        self._to_provisioning_failed()
+        self.save(update_fields=['provisioning_state'])
+
     class Meta:
         verbose_name = 'Channel'
         verbose_name_plural = 'Channels'
@@ -65,29 +90,11 @@ def channel_post_save_receiver(sender, instance, created, **kwargs):
         return
 
     if created:
-        """
-        define custom settings for CloudFront creation
-            -id: origin id
-            -domain: S3 bucker domain
-            -target: origin Id
-            -caller: operation unique identificator (in this case integer timestamp)
-        """
-
-        cf_settings = {
-            'id': instance.organization.bucket_name,
-            'domain': f"{instance.organization.bucket_name}.s3.amazonaws.com",
-            'target': instance.organization.bucket_name,
-            'caller': str(time.time()),
-        }
-
-        # execute CF tasks only on creation
-        # recover new distribution CloudFront Id & DomainName after creation
-        new_distribution = cloudfront.create_distribution(cf_settings, instance.organization, instance)
-
-        # update organization properties (check creation)
-        instance.cf_id = new_distribution['cf_id']
-        instance.cf_domain = new_distribution['cf_domain']
-        instance.save()
+        from organization.provisioning import start_channels_provisioning
+
+        # The distribution is created in the background
+        if instance.provisioning_state == ProvisioningState.PROVISIONING:
+            transaction.on_commit(lambda: start_channels_provisioning([instance.pk]))
 
 
 @receiver(pre_delete, sender=Channel, dispatch_uid='channel_deleted')
@@ -1,14 +1,31 @@
 import sys
-from django.db import models, IntegrityError
+from django.contrib.postgres.indexes import GinIndex
+from django.db import models, IntegrityError, transaction
 from django.db.models.signals import pre_save, post_save, pre_delete
 from django.dispatch import receiver
+from django_fsm import FSMField, transition
 
-from jsonfield import JSONField
+from jsonfield import JSONBField
 from organization.models import AWSAccount
 from organization.models.plan import Plan
 from utils import s3
 
 
+class ProvisioningState:
+    """
+    States of the provisioning of the AWS resources of organizations and channels
+    """
+    PROVISIONING = 'provisioning'
+    PROVISIONED = 'provisioned'
+    FAILED = 'failed'
+
+    CHOICES = (
+        (PROVISIONING, PROVISIONING),
+        (PROVISIONED, PROVISIONED),
+        (FAILED, FAILED),
+    )
+
+
 class Organization(models.Model):
     """ Organization is the top most level entity """
 
@@ -37,9 +54,9 @@ class Organization(models.Model):
                              default=1,
                              related_name='organizations',
                              verbose_name='Plan')
-    config = JSONField(blank=True,
-                       default=dict,
-                       verbose_name='Configuration')
+    config = JSONBField(blank=True,
+                        default=dict,
+                        verbose_name='Configuration')
     aws_account = models.ForeignKey(AWSAccount,
                                     null=True,
                                     related_name='organizations',
@@ -57,10 +74,46 @@ class Organization(models.Model):
         default=False,
         verbose_name='URL security enabled'
     )
+    # The bucket and default channel are created in the background, see
+    # organization.provisioning
+    provisioning_state = FSMField(default=ProvisioningState.PROVISIONING,
+                                  choices=ProvisioningState.CHOICES,
+                                  editable=False,
+                                  verbose_name='Provisioning state')
 
     def __str__(self):
         return self.name
 
+    @transition(field=provisioning_state, source=[ProvisioningState.PROVISIONING],
+                target=ProvisioningState.PROVISIONED)
+    def _to_provisioned(self):
+        pass
+
+    @transition(field=provisioning_state, source=[ProvisioningState.PROVISIONING],
+                target=ProvisioningState.FAILED)
+    def _to_provisioning_failed(self):
+        pass
+
+    @transition(field=provisioning_state, source=[ProvisioningState.FAILED],
+                target=ProvisioningState.PROVISIONING)
+    def _re_provision(self):
+        pass
+
+    def to_provisioned(self):
+        self._to_provisioned()
+        self.save(update_fields=['provisioning_state'])
+
+    def to_provisioning_failed(self):
+        self._to_provisioning_failed()
+        self.save(update_fields=['provisioning_state'])
+
+    def re_provision(self):
+        from organization.provisioning import start_organization_provisioning
+
+        self._re_provision()
+        self.save(update_fields=['provisioning_state'])
+        transaction.on_commit(lambda: start_organization_provisioning(self.pk))
+
     @property
     def cf_distribution_ids(self):
         dists = list(self.channels.values_list('cf_id', flat=True))
@@ -74,6 +127,10 @@ class Organization(models.Model):
     class Meta:
         verbose_name = 'Organization'
         verbose_name_plural = 'Organizations'
+        indexes = [
+            # Containment and key existence lookups on the configuration
+            GinIndex(fields=['config'], name='organization_config_idx'),
+        ]
 
 
 # -------------------------------- Organization signals handlers -------------------------------- #
@@ -100,11 +157,11 @@ def org_post_save_receiver(sender, instance, created, **kwargs):
         return
 
     if created:
-        # Create a default channel
-        from organization.models import Channel
-        s3.create_bucket(instance)
+        from organization.provisioning import start_organization_provisioning
 
-        Channel.objects.create(organization=instance, name="Default")
+        # The bucket and the default channel are created in the background
+        if instance.provisioning_state == ProvisioningState.PROVISIONING:
+            transaction.on_commit(lambda: start_organization_provisioning(instance.pk))
 
     # Updating plan
     else:
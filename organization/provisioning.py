@@ -0,0 +1,111 @@
+"""
+Provisioning of the AWS resources of organizations and channels, run in the background.
+
+A new organization starts in the `provisioning` state: its S3 bucket is created and
+configured and then its default channel is created. Every new channel creates its
+CloudFront distribution on its own, and `start_channels_provisioning` provisions many
+channels at the same time. Steps are retried on AWS errors and can run again, the
+bucket calls are idempotent and distributions use a caller reference per channel. Once
+the retries are exhausted the organization or channel is marked as failed.
+"""
+import logging
+
+from celery import group, shared_task
+from django.conf import settings
+from django.db import transaction
+from django_fsm import TransitionNotAllowed
+
+from organization.models import Channel, Organization
+from organization.models.organization import ProvisioningState
+from utils import cloudfront, s3
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNEL_NAME = 'Default'
+
+
+def start_organization_provisioning(organization_id):
+    """
+    Enqueue the provisioning of an organization.
+    """
+    provision_organization.delay(organization_id)
+
+
+def start_channels_provisioning(channel_ids):
+    """
+    Enqueue the provisioning of channels, all of them at the same time.
+    """
+    group(provision_channel.si(channel_id) for channel_id in channel_ids).apply_async()
+
+
+def _provisioning_failed(model, pk):
+    with transaction.atomic():
+        instance = model.objects.select_for_update().get(pk=pk)
+        try:
+            instance.to_provisioning_failed()
+        except TransitionNotAllowed:
+            pass
+
+
+def _retry(task, exc, model, pk):
+    """
+    Retry `task`, once the retries are exhausted mark the instance as failed.
+    """
+    if task.request.retries >= task.max_retries:
+        logger.exception(f'Error provisioning the {model._meta.verbose_name} {pk}')
+        _provisioning_failed(model, pk)
+    raise task.retry(exc=exc)
+
+
+@shared_task(bind=True, max_retries=settings.ORGANIZATION_PROVISIONING_MAX_RETRIES,
+             default_retry_delay=settings.ORGANIZATION_PROVISIONING_RETRY_DELAY)
+def provision_organization(self, organization_id):
+    """
+    Create the bucket of an organization and its default channel.
+    """
+    organization = Organization.objects.select_related('aws_account').get(pk=organization_id)
+
+    if organization.provisioning_state != ProvisioningState.PROVISIONING:
+        return
+
+    try:
+        s3.create_bucket(organization)
+    except Exception as e:
+        _retry(self, e, Organization, organization_id)
+
+    with transaction.atomic():
+        # The channel provisions its distribution once it's committed
+        Channel.objects.get_or_create(organization=organization, name=DEFAULT_CHANNEL_NAME)
+        organization.to_provisioned()
+
+
+@shared_task(bind=True, max_retries=settings.ORGANIZATION_PROVISIONING_MAX_RETRIES,
+             default_retry_delay=settings.ORGANIZATION_PROVISIONING_RETRY_DELAY)
+def provision_channel(self, channel_id):
+    """
+    Create the distribution of a channel.
+    """
+    channel = Channel.objects.select_related('organization__aws_account').get(pk=channel_id)
+
+    if channel.provisioning_state != ProvisioningState.PROVISIONING:
+        return
+
+    bucket_name = channel.organization.bucket_name
+
+    # The caller reference is unique for the channel, so retries get the same distribution
+    cf_settings = {
+        'id': bucket_name,
+        'domain': f"{bucket_name}.s3.amazonaws.com",
+        'target': bucket_name,
+        'caller': f'channel-{channel.channel_id}',
+    }
+
+    try:
+        distribution = cloudfront.create_distribution(cf_settings, channel.organization, channel)
+    except Exception as e:
+        _retry(self, e, Channel, channel_id)
+
+    channel.cf_id = distribution['cf_id']
+    channel.cf_domain = distribution['cf_domain']
+    channel._to_provisioned()
+    channel.save(update_fields=['cf_id', 'cf_domain', 'provisioning_state'])
@@ -0,0 +1,156 @@
+"""
+Organization-wide CloudFront updates, run in the background.
+
+Enabling or disabling the data traffic or the signed URLs of an organization updates the
+distribution of the organization and the ones of its channels and live videos. The
+updates are fanned out as Celery chains, so no more than `DISTRIBUTION_UPDATE_CONCURRENCY`
+run at the same time, and the organization flag is only changed, at the end, if every
+distribution was updated. The batch and the result of every distribution are kept in the
+cache, which has to be shared with the workers, see CONFIGURATION.md.
+"""
+import logging
+import uuid
+from functools import partial
+
+from celery import chain, chord, shared_task
+from django.conf import settings
+from django.core.cache import cache
+
+from organization.models import Organization
+from utils import cloudfront
+
+logger = logging.getLogger(__name__)
+
+BATCH_KEY = 'distribution_update:{}'
+RESULT_KEY = 'distribution_update:{}:{}'
+
+# Organization flag changed by each operation, and its new value
+OPERATIONS = {
+    'enable_traffic': ('traffic_enabled', True),
+    'disable_traffic': ('traffic_enabled', False),
+    'enable_security': ('security_enabled', True),
+    'disable_security': ('security_enabled', False),
+}
+
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+def start_distributions_update(organization, operation):
+    """
+    Enqueue `operation` for the distributions of `organization` and return the id of the
+    batch.
+    """
+    batch_id = str(uuid.uuid4())
+    dist_ids = list(filter(None, organization.cf_distribution_ids))
+
+    cache.set(BATCH_KEY.format(batch_id), {
+        'organization_id': organization.pk,
+        'operation': operation,
+        'dist_ids': dist_ids,
+        'applied': False,
+    }, settings.DISTRIBUTION_UPDATE_TIMEOUT)
+
+    if not dist_ids:
+        finish_distributions_update(batch_id)
+        return batch_id
+
+    concurrency = min(settings.DISTRIBUTION_UPDATE_CONCURRENCY, len(dist_ids))
+    chord(
+        [
+            chain(
+                update_distribution.si(batch_id, organization.pk, operation, dist_id)
+                for dist_id in dist_ids[number::concurrency]
+            )
+            for number in range(concurrency)
+        ],
+        finish_distributions_update.si(batch_id)
+    ).apply_async()
+
+    return batch_id
+
+
+def get_distributions_update(batch_id):
+    """
+    Return the progress of a batch, or None if it doesn't exist or has expired.
+    """
+    batch = cache.get(BATCH_KEY.format(batch_id))
+
+    if batch is None:
+        return None
+
+    keys = {RESULT_KEY.format(batch_id, dist_id): dist_id for dist_id in batch['dist_ids']}
+    results = {keys[key]: result for key, result in cache.get_many(keys).items()}
+
+    errors = {dist_id: result['error'] for dist_id, result in results.items()
+              if result['status'] == FAILED}
+
+    return {
+        'organization_id': batch['organization_id'],
+        'batch_id': batch_id,
+        'operation': batch['operation'],
+        'total': len(batch['dist_ids']),
+        'pending': len(batch['dist_ids']) - len(results),
+        'succeeded': len(results) - len(errors),
+        'failed': len(errors),
+        'errors': errors,
+        'applied': batch['applied'],
+    }
+
+
+def _update_config(operation, organization, config):
+    if operation in ('enable_traffic', 'disable_traffic'):
+        config['Enabled'] = OPERATIONS[operation][1]
+    elif operation == 'enable_security':
+        config['DefaultCacheBehavior']['TrustedSigners'] = {
+            "Enabled": True,
+            "Quantity": 1,
+            "Items": [
+                organization.aws_account.account_id
+            ]
+        }
+    else:
+        config['DefaultCacheBehavior']['TrustedSigners'] = {
+            "Enabled": False,
+            "Quantity": 0
+        }
+
+
+@shared_task
+def update_distribution(batch_id, organization_id, operation, dist_id):
+    """
+    Apply `operation` to a distribution and store the result. Errors are stored instead
+    of raised, so the rest of the chain still runs.
+    """
+    result = {'status': SUCCEEDED}
+
+    try:
+        organization = Organization.objects.select_related('aws_account').get(pk=organization_id)
+        cloudfront.update_distribution_config(organization, dist_id,
+                                              partial(_update_config, operation, organization),
+                                              settings.DISTRIBUTION_UPDATE_ATTEMPTS)
+    except Exception:
+        logger.exception(f'Error applying {operation} to the distribution {dist_id}')
+        result = {'status': FAILED, 'error': 'Error updating the distribution.'}
+
+    cache.set(RESULT_KEY.format(batch_id, dist_id), result, settings.DISTRIBUTION_UPDATE_TIMEOUT)
+
+
+@shared_task
+def finish_distributions_update(batch_id):
+    """
+    Change the organization flag if every distribution of the batch was updated.
+    """
+    progress = get_distributions_update(batch_id)
+
+    if progress is None or progress['pending'] or progress['failed']:
+        return
+
+    field, value = OPERATIONS[progress['operation']]
+    organization = Organization.objects.get(pk=progress['organization_id'])
+    setattr(organization, field, value)
+    organization.save(update_fields=[field])
+
+    batch = cache.get(BATCH_KEY.format(batch_id))
+    batch['applied'] = True
+    cache.set(BATCH_KEY.format(batch_id), batch, settings.DISTRIBUTION_UPDATE_TIMEOUT)
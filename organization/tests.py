@@ -1,3 +1,439 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from botocore.exceptions import ClientError
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from configuration import cache as templates
+from configuration.models import Configuration, MediaConvertConfiguration, \
+    MediaLiveConfiguration
+from jsonfield.subclassing import Undecoded
+from organization import provisioning, tasks
+from organization.models import AWSAccount, Bill, Channel, Organization
+from organization.models.organization import ProvisioningState
+from test_utils import create_user
+from utils import aws, mediaconvert
+
+
+class AWSClientsTests(TestCase):
+
+    def setUp(self):
+        self.account1, self.account2 = [
+            AWSAccount.objects.create(name=f'Account {number}', access_key=f'key{number}',
+                                      secret_access_key=f'secret{number}', region='us-east-1')
+            for number in (1, 2)
+        ]
+
+    def test_client_is_shared(self):
+        client = aws.get_client('s3', self.account1)
+
+        # Validate the same client is returned for the same account, also from another instance
+        self.assertIs(client, aws.get_client('s3', self.account1))
+        self.assertIs(client, aws.get_client('s3', AWSAccount.objects.get(pk=self.account1.pk)))
+
+        # Validate other services, accounts and endpoints get their own client
+        self.assertIsNot(client, aws.get_client('sns', self.account1))
+        self.assertIsNot(client, aws.get_client('s3', self.account2))
+        self.assertIsNot(client, aws.get_client('s3', self.account1,
+                                                endpoint_url='https://s3.example.com'))
+        self.assertIsNot(client, aws.get_client('s3'))
+
+    def test_client_config(self):
+        client = aws.get_client('s3', self.account1)
+
+        # Validate region and connection pool
+        self.assertEqual('us-east-1', client.meta.region_name)
+        self.assertEqual(aws.CLIENT_CONFIG.max_pool_connections,
+                         client.meta.config.max_pool_connections)
+
+    def test_client_evicted_on_account_change(self):
+        client1 = aws.get_client('s3', self.account1)
+        client2 = aws.get_client('s3', self.account2)
+
+        self.account1.region = 'us-west-2'
+        self.account1.save()
+
+        # Validate only the clients of the changed account are rebuilt
+        client = aws.get_client('s3', self.account1)
+        self.assertIsNot(client1, client)
+        self.assertEqual('us-west-2', client.meta.region_name)
+        self.assertIs(client2, aws.get_client('s3', self.account2))
+
+        account_id = self.account2.pk
+        self.account2.delete()
+
+        # Validate the clients of deleted accounts are dropped
+        self.assertFalse([key for key in aws._clients if key[1] == account_id])
+
+
+class MediaConvertEndpointTests(TestCase):
+
+    def setUp(self):
+        self.account = AWSAccount.objects.create(name='Account', access_key='key',
+                                                 secret_access_key='secret', region='us-east-1')
+        cache.delete(mediaconvert.MEDIA_CONVERT_ENDPOINT_KEY)
+
+    @staticmethod
+    def _mock_discovery(*endpoints):
+        client = mock.Mock()
+        client.describe_endpoints.side_effect = [{'Endpoints': [{'Url': endpoint}]}
+                                                 for endpoint in endpoints]
+        return mock.patch('utils.mediaconvert.get_client', return_value=client)
+
+    def test_endpoint_discovered_once(self):
+        with self._mock_discovery('https://abc.mediaconvert.us-east-1.amazonaws.com') as get_client:
+            endpoint = mediaconvert.get_media_convert_endpoint(self.account)
+            mediaconvert.get_media_convert_endpoint(self.account)
+
+        # Validate the endpoint is discovered and stored on the account
+        self.assertEqual('https://abc.mediaconvert.us-east-1.amazonaws.com', endpoint)
+        self.assertEqual(endpoint,
+                         AWSAccount.objects.get(pk=self.account.pk).media_convert_endpoint_url)
+        self.assertEqual(1, get_client.return_value.describe_endpoints.call_count)
+
+    def test_null_endpoint_is_discovered(self):
+        # hub_auth.default stores null when the endpoint can't be discovered
+        AWSAccount.objects.filter(pk=self.account.pk).update(media_convert_endpoint_url=None)
+        self.account.refresh_from_db()
+
+        with self._mock_discovery('https://abc.mediaconvert.us-east-1.amazonaws.com'):
+            endpoint = mediaconvert.get_media_convert_endpoint(self.account)
+
+        self.assertEqual('https://abc.mediaconvert.us-east-1.amazonaws.com', endpoint)
+        self.assertEqual(endpoint,
+                         AWSAccount.objects.get(pk=self.account.pk).media_convert_endpoint_url)
+
+    def test_configured_endpoint_is_used(self):
+        self.account.media_convert_endpoint_url = 'https://xyz.mediaconvert.us-east-1.amazonaws.com'
+        self.account.save()
+
+        with self._mock_discovery() as get_client:
+            endpoint = mediaconvert.get_media_convert_endpoint(self.account)
+
+        # Validate nothing is discovered
+        self.assertEqual('https://xyz.mediaconvert.us-east-1.amazonaws.com', endpoint)
+        get_client.return_value.describe_endpoints.assert_not_called()
+
+    @mock.patch.dict('os.environ', {'AWS_MEDIA_CONVERT_ENDPOINT': ''})
+    def test_default_endpoint_is_cached(self):
+        with self._mock_discovery('https://abc.mediaconvert.us-east-1.amazonaws.com') as get_client:
+            mediaconvert.get_media_convert_endpoint(None)
+            endpoint = mediaconvert.get_media_convert_endpoint(None)
+
+        # Validate the endpoint of the default credentials is discovered once
+        self.assertEqual('https://abc.mediaconvert.us-east-1.amazonaws.com', endpoint)
+        self.assertEqual(1, get_client.return_value.describe_endpoints.call_count)
+
+    def test_endpoint_refreshed_on_endpoint_errors(self):
+        self.account.media_convert_endpoint_url = 'https://old.mediaconvert.us-east-1.amazonaws.com'
+        self.account.save()
+
+        error = ClientError({'Error': {'Code': 'BadRequestException',
+                                       'Message': 'You must use the customer-specific endpoint'}},
+                            'GetJob')
+        client = mock.Mock()
+        client.get_job.side_effect = [error, {'Job': {'Id': '1'}}]
+        client.describe_endpoints.return_value = {
+            'Endpoints': [{'Url': 'https://new.mediaconvert.us-east-1.amazonaws.com'}]}
+
+        with mock.patch('utils.mediaconvert.get_client', return_value=client) as get_client:
+            job = mediaconvert.call_media_convert(self.account, 'get_job', Id='1')
+
+        # Validate the call is retried with the discovered endpoint
+        self.assertEqual({'Job': {'Id': '1'}}, job)
+        self.assertEqual('https://new.mediaconvert.us-east-1.amazonaws.com',
+                         get_client.call_args[1]['endpoint_url'])
+        self.assertEqual('https://new.mediaconvert.us-east-1.amazonaws.com',
+                         AWSAccount.objects.get(pk=self.account.pk).media_convert_endpoint_url)
+
+    def test_other_errors_are_raised(self):
+        error = ClientError({'Error': {'Code': 'NotFoundException', 'Message': 'Job not found'}},
+                            'GetJob')
+        client = mock.Mock()
+        client.get_job.side_effect = error
+
+        self.account.media_convert_endpoint_url = 'https://abc.mediaconvert.us-east-1.amazonaws.com'
+
+        with mock.patch('utils.mediaconvert.get_client', return_value=client):
+            with self.assertRaises(ClientError):
+                mediaconvert.call_media_convert(self.account, 'get_job', Id='1')
+
+        # Validate the endpoint is not discovered again
+        client.describe_endpoints.assert_not_called()
+
+
+class JSONBFieldTests(TestCase):
+
+    def setUp(self):
+        self.org1 = Organization.objects.create(
+            name='Organization 1', config={'qtracking': {'enabled': True, 'player_api_key': 'key'}})
+        self.org2 = Organization.objects.create(
+            name='Organization 2', config={'qtracking': {'enabled': False}})
+        self.org3 = Organization.objects.create(name='Organization 3')
+
+    def test_key_lookups(self):
+        # Validate nested keys can be filtered
+        self.assertEqual([self.org1.pk], list(Organization.objects.filter(
+            config__qtracking__enabled=True).values_list('pk', flat=True)))
+        self.assertEqual([self.org1.pk], list(Organization.objects.filter(
+            config__qtracking__player_api_key='key').values_list('pk', flat=True)))
+
+    def test_postgres_lookups(self):
+        queryset = Organization.objects.filter(pk__in=(self.org1.pk, self.org2.pk, self.org3.pk)) \
+            .order_by('pk').values_list('pk', flat=True)
+
+        # Validate the django.contrib.postgres lookups
+        self.assertEqual([self.org2.pk],
+                         list(queryset.filter(config__contains={'qtracking': {'enabled': False}})))
+        self.assertEqual([self.org1.pk, self.org2.pk],
+                         list(queryset.filter(config__has_key='qtracking')))
+        self.assertEqual([self.org3.pk], list(queryset.filter(config={})))
+
+    def test_lazy_decoding(self):
+        organization = Organization.objects.get(pk=self.org1.pk)
+
+        # Validate the JSON is only decoded when it's read
+        self.assertIsInstance(organization.__dict__['config'], Undecoded)
+        self.assertEqual({'enabled': True, 'player_api_key': 'key'},
+                         organization.config['qtracking'])
+        self.assertEqual(organization.config, organization.__dict__['config'])
+
+    def test_values_as_text(self):
+        # Validate values are the JSON text, like the ones of a JSONField
+        self.assertEqual(['{"qtracking": {"enabled": false}}'], list(
+            Organization.objects.filter(pk=self.org2.pk).values_list('config', flat=True)))
+
+        # Validate other jsonb values are still decoded by psycopg2
+        with connection.cursor() as cursor:
+            cursor.execute("""SELECT '{"enabled": true}'::jsonb""")
+            self.assertEqual({'enabled': True}, cursor.fetchone()[0])
+
+    def test_undecoded_values_are_saved_back(self):
+        bill = Bill.objects.create(organization=self.org1, date=timezone.now().date(),
+                                   extras={'invoice': 'A-1'})
+
+        bill = Bill.objects.get(pk=bill.pk)
+        bill.storage = 10
+        bill.save()
+
+        # Validate the JSON was never decoded and is kept
+        self.assertIsInstance(bill.__dict__['extras'], Undecoded)
+        self.assertEqual({'invoice': 'A-1'}, Bill.objects.get(pk=bill.pk).extras)
+
+
+    def test_malformed_undecoded_values_are_not_saved(self):
+        configuration = MediaConvertConfiguration.objects.create(name='Video', settings={})
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE configuration_mediaconvertconfiguration SET settings = %s '
+                           'WHERE id = %s', ['{"OutputGroups": [', configuration.pk])
+
+        configuration = MediaConvertConfiguration.objects.get(pk=configuration.pk)
+        configuration.name = 'Changed'
+
+        # Validate the malformed JSON isn't saved back
+        with self.assertRaises(ValidationError):
+            configuration.save()
+
+class ConfigurationTemplatesTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        templates._templates.clear()
+
+        self.media_convert = MediaConvertConfiguration.objects.create(
+            name='Video', settings={'OutputGroups': [{'Name': 'Apple HLS'}]})
+        self.media_live = MediaLiveConfiguration.objects.create(
+            name='Live', source_settings={'InputId': ''}, destination_settings={'Id': ''},
+            encoder_settings={'OutputGroups': []})
+
+    def test_templates_are_copied(self):
+        settings = templates.get_media_convert_settings(self.media_convert.pk)
+        settings['OutputGroups'][0]['Name'] = 'Changed'
+
+        # Validate changes to a copy don't reach the template
+        self.assertEqual({'OutputGroups': [{'Name': 'Apple HLS'}]},
+                         templates.get_media_convert_settings(self.media_convert.pk))
+
+    def test_templates_are_cached(self):
+        templates.get_media_live_settings(self.media_live.pk)
+
+        # Validate the template is cached in the process
+        with self.assertNumQueries(0):
+            settings = templates.get_media_live_settings(self.media_live.pk)
+
+        # Validate other processes get it from the shared cache
+        templates._templates.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(settings, templates.get_media_live_settings(self.media_live.pk))
+
+        self.assertEqual({'source_settings': {'InputId': ''},
+                          'destination_settings': {'Id': ''},
+                          'encoder_settings': {'OutputGroups': []}}, settings)
+
+    def test_templates_invalidated_on_save(self):
+        configuration = Configuration.get_solo()
+        configuration.cloud_front_configuration = {'Comment': 'Old'}
+        configuration.save()
+        self.assertEqual({'Comment': 'Old'}, templates.get_cloudfront_configuration())
+
+        configuration.cloud_front_configuration = {'Comment': 'New'}
+        configuration.save()
+
+        # Validate the new configuration is used
+        self.assertEqual({'Comment': 'New'}, templates.get_cloudfront_configuration())
+
+
+class ProvisioningTests(TestCase):
+
+    def setUp(self):
+        self.account = AWSAccount.objects.create(name='Account', access_key='key',
+                                                 secret_access_key='secret', region='us-east-1')
+        self.organization = Organization.objects.create(name='Organization',
+                                                        aws_account=self.account)
+
+    def test_provision_organization(self):
+        # Validate new organizations wait for their resources
+        self.assertEqual(ProvisioningState.PROVISIONING, self.organization.provisioning_state)
+
+        with mock.patch('utils.s3.create_bucket') as create_bucket:
+            provisioning.provision_organization(self.organization.pk)
+
+        # Validate the bucket and the default channel are created
+        self.assertEqual(self.organization.pk, create_bucket.call_args[0][0].pk)
+        self.assertEqual(ProvisioningState.PROVISIONED,
+                         Organization.objects.get(pk=self.organization.pk).provisioning_state)
+        self.assertEqual(['Default'], list(Channel.objects.filter(
+            organization=self.organization).values_list('name', flat=True)))
+
+    def test_provision_organization_failed(self):
+        with mock.patch('utils.s3.create_bucket', side_effect=Exception('SlowDown')), \
+                mock.patch.object(provisioning.provision_organization, 'max_retries', 0):
+            with self.assertRaises(Exception):
+                provisioning.provision_organization(self.organization.pk)
+
+        # Validate the organization is marked as failed once the retries are exhausted
+        self.assertEqual(ProvisioningState.FAILED,
+                         Organization.objects.get(pk=self.organization.pk).provisioning_state)
+        self.assertFalse(Channel.objects.filter(organization=self.organization).exists())
+
+    def test_provision_channels(self):
+        channels = [Channel.objects.create(organization=self.organization, name=f'Channel {number}')
+                    for number in range(3)]
+        distributions = [{'cf_id': f'E{number}', 'cf_domain': f'{number}.cloudfront.net'}
+                         for number in range(3)]
+
+        with mock.patch('organization.provisioning.group') as group:
+            provisioning.start_channels_provisioning([channel.pk for channel in channels])
+
+        # Validate the channels are provisioned at the same time
+        self.assertEqual([channel.pk for channel in channels],
+                         [signature.args[0] for signature in group.call_args[0][0]])
+        group.return_value.apply_async.assert_called_once()
+
+        with mock.patch('utils.cloudfront.create_distribution',
+                        side_effect=distributions) as create_distribution:
+            for channel in channels:
+                provisioning.provision_channel(channel.pk)
+            provisioning.provision_channel(channels[0].pk)
+
+        # Validate the distributions are stored once, with a caller reference per channel
+        self.assertEqual(3, create_distribution.call_count)
+        self.assertEqual(f'channel-{channels[0].channel_id}',
+                         create_distribution.call_args_list[0][0][0]['caller'])
+        self.assertEqual([('E0', '0.cloudfront.net', ProvisioningState.PROVISIONED),
+                          ('E1', '1.cloudfront.net', ProvisioningState.PROVISIONED),
+                          ('E2', '2.cloudfront.net', ProvisioningState.PROVISIONED)],
+                         list(Channel.objects.filter(organization=self.organization)
+                              .order_by('name')
+                              .values_list('cf_id', 'cf_domain', 'provisioning_state')))
+
+
+class DistributionsUpdateTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.account = AWSAccount.objects.create(name='Account', access_key='key',
+                                                 secret_access_key='secret', region='us-east-1',
+                                                 account_id='123456789012')
+        self.organization = Organization.objects.create(name='Organization', cf_id='E0',
+                                                        aws_account=self.account)
+        for number in (1, 2):
+            channel = Channel.objects.create(organization=self.organization,
+                                             name=f'Channel {number}')
+            Channel.objects.filter(pk=channel.pk).update(cf_id=f'E{number}')
+
+    @staticmethod
+    def _mock_cloudfront(update_errors=()):
+        client = mock.Mock()
+        client.get_distribution_config.side_effect = lambda Id: {
+            'ETag': f'{Id}-etag',
+            'DistributionConfig': {'Enabled': True, 'DefaultCacheBehavior': {}},
+        }
+        client.update_distribution.side_effect = list(update_errors) + [{}] * 10
+        return mock.patch('utils.cloudfront.get_cloudfront_client', return_value=client)
+
+    def _run_update(self, operation):
+        def run_chord(header, body):
+            self.chains = len(header)
+            for signature in header:
+                signature.apply()
+            body.apply()
+            return mock.Mock()
+
+        with mock.patch('organization.tasks.chord', side_effect=run_chord):
+            return tasks.start_distributions_update(self.organization, operation)
+
+    @staticmethod
+    def _error(code):
+        return ClientError({'Error': {'Code': code, 'Message': code}}, 'UpdateDistribution')
+
+    @override_settings(DISTRIBUTION_UPDATE_CONCURRENCY=2)
+    def test_update_distributions(self):
+        with self._mock_cloudfront([self._error('PreconditionFailed')]) as get_client:
+            batch_id = self._run_update('disable_traffic')
+
+        # Validate every distribution is disabled, in 2 chains, the ETag conflict is retried
+        self.assertEqual(2, self.chains)
+        client = get_client.return_value
+        self.assertEqual(4, client.update_distribution.call_count)
+        self.assertEqual({'E0', 'E1', 'E2'}, {call[1]['Id'] for call in
+                                              client.update_distribution.call_args_list})
+        self.assertFalse(client.update_distribution.call_args[1]['DistributionConfig']['Enabled'])
+
+        # Validate the report and the organization flag
+        self.assertEqual({'organization_id': self.organization.pk, 'batch_id': batch_id,
+                          'operation': 'disable_traffic', 'total': 3, 'pending': 0,
+                          'succeeded': 3, 'failed': 0, 'errors': {}, 'applied': True},
+                         tasks.get_distributions_update(batch_id))
+        self.assertFalse(Organization.objects.get(pk=self.organization.pk).traffic_enabled)
+
+    def test_update_distributions_with_errors(self):
+        with self._mock_cloudfront([self._error('AccessDenied')]):
+            batch_id = self._run_update('enable_security')
+
+        # Validate the failed distribution is reported and the flag is not changed
+        batch = tasks.get_distributions_update(batch_id)
+        self.assertEqual((2, 1, False), (batch['succeeded'], batch['failed'], batch['applied']))
+        self.assertEqual(['Error updating the distribution.'], list(batch['errors'].values()))
+        self.assertFalse(Organization.objects.get(pk=self.organization.pk).security_enabled)
+
+    def test_distributions_update_status(self):
+        user = create_user('user', '12345678', self.organization)
+        other = create_user('other', '12345678', Organization.objects.create(name='Other'))
+
+        with self._mock_cloudfront():
+            batch_id = self._run_update('disable_traffic')
+        url = reverse('organizations-distribution-update-status', kwargs={'batch_id': batch_id})
+
+        # Validate only the organization of the batch gets the report
+        self.client.force_login(user)
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(3, response.json()['succeeded'])
+
+        self.client.force_login(other)
+        self.assertEqual(404, self.client.get(url).status_code)
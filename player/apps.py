@@ -6,3 +6,7 @@ from django.apps import AppConfig
 
 class PlayerConfig(AppConfig):
     name = 'player'
+
+    def ready(self):
+        # Connect the embed cache invalidation receivers
+        from player import embed  # noqa
@@ -0,0 +1,53 @@
+"""
+Matching of the embedding page domain against the domains allowed for a channel.
+"""
+import hashlib
+import re
+
+from django.conf import settings
+
+REFERER_DOMAIN_REGEX = re.compile(r'^(?:https?:\/\/)?(?:[^@\/\n]+@)?([^:\/?\n]+)')
+
+# Compiled matchers by channel id, as (allowed domains digest, matcher) tuples
+_matchers = {}
+
+
+def get_referer_domain(referer):
+    if not referer:
+        return None
+
+    return REFERER_DOMAIN_REGEX.match(referer).group(1)
+
+
+def compile_domains(domains):
+    """
+    Compile a list of allowed domains into a single regex. A `*` matches one label
+    of the domain, e.g. `*.example.com` matches `www.example.com`.
+    """
+    patterns = [re.escape(domain).replace('\\*', '[a-zA-Z0-9_-]+') for domain in domains]
+    return re.compile('(?:{})'.format('|'.join(patterns)))
+
+
+def get_domain_matcher(channel_id, channel_allowed_domains):
+    """
+    Return the compiled matcher of a channel. It is only rebuilt when the allowed
+    domains of the channel change.
+    """
+    digest = hashlib.sha1('\n'.join(channel_allowed_domains).encode('utf-8')).hexdigest()
+
+    cached = _matchers.get(channel_id)
+    if cached is not None and cached[0] == digest:
+        return cached[1]
+
+    matcher = compile_domains(settings.ALLOWED_DOMAINS + list(channel_allowed_domains))
+    _matchers[channel_id] = (digest, matcher)
+
+    return matcher
+
+
+def is_domain_allowed(channel_id, channel_allowed_domains, referer_domain):
+    if not channel_allowed_domains:
+        return True
+
+    matcher = get_domain_matcher(channel_id, channel_allowed_domains)
+    return matcher.match(str(referer_domain)) is not None
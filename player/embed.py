@@ -0,0 +1,264 @@
+"""
+Resolution of the data needed to render the embed player.
+
+A `video_id` is resolved into three cached parts:
+    - video: the Media or LiveVideo fields used by the player
+    - channel: the fields of its Channel
+    - organization: the fields of its Organization
+
+The parts are cached separately so a change on a Channel or an Organization only
+invalidates one entry instead of every video that belongs to it. On a cache miss
+the three parts are fetched with a single query.
+
+Finished media, channels and organizations rarely change, so they are stored as
+long lived snapshots that are rebuilt after every change is committed. This lets
+the player be served without touching the database.
+"""
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from django.core.cache import cache
+from django.db.models import BooleanField, CharField, F, OuterRef, Subquery, Value
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.db import transaction
+from django.dispatch import receiver
+
+from organization.models import Channel, Organization
+from video.models import LiveVideo, Media, Tag
+
+VIDEO_KEY = 'embed:video:{}'
+CHANNEL_KEY = 'embed:channel:{}'
+ORGANIZATION_KEY = 'embed:organization:{}'
+
+LIVE = 'live'
+MEDIA = 'media'
+
+VIDEO_FIELDS = ('video_id', 'name', 'state', 'ads_vast_url', 'enable_ads', 'autoplay')
+CHANNEL_FIELDS = ('id', 'channel_id', 'name', 'allowed_domains', 'ads_vast_url', 'autoplay',
+                  'detect_adblock', 'cf_domain')
+ORGANIZATION_FIELDS = ('id', 'name', 'traffic_enabled', 'config')
+
+
+def _tag_names(related_name):
+    return Subquery(
+        Tag.objects.filter(**{related_name: OuterRef('pk')}).order_by('pk').values('name'),
+        template='ARRAY(%(subquery)s)',
+        output_field=ArrayField(CharField())
+    )
+
+
+def _embed_values(model, video_id, **columns):
+    """
+    Values queryset of `model` with every column of the three parts. Columns are
+    annotations so both models select them in the same order and can be combined
+    with a UNION.
+    """
+    annotations = OrderedDict(
+        [(f'video__{field}', F(field)) for field in VIDEO_FIELDS] +
+        [(field, columns[field]) for field in ('kind', 'media_type', 'has_thumbnail',
+                                                'cf_domain', 'tags')] +
+        [(f'channel__{field}', F(f'channel__{field}')) for field in CHANNEL_FIELDS] +
+        [(f'organization__{field}', F(f'organization__{field}'))
+         for field in ORGANIZATION_FIELDS]
+    )
+
+    # Aliases can't clash with model fields, so they are prefixed with `embed_`
+    aliases = OrderedDict((f'embed_{name}', value) for name, value in annotations.items())
+
+    return model.objects.filter(video_id=video_id).annotate(**aliases).values(*aliases)
+
+
+def _query_embed_data(video_id):
+    live_videos = _embed_values(LiveVideo, video_id,
+                                kind=Value(LIVE, output_field=CharField()),
+                                media_type=Value('', output_field=CharField()),
+                                has_thumbnail=Value(False, output_field=BooleanField()),
+                                cf_domain=F('cf_domain'),
+                                tags=_tag_names('live_videos'))
+    media = _embed_values(Media, video_id,
+                          kind=Value(MEDIA, output_field=CharField()),
+                          media_type=F('media_type'),
+                          has_thumbnail=F('has_thumbnail'),
+                          cf_domain=Value('', output_field=CharField()),
+                          tags=_tag_names('media'))
+
+    # Live videos take precedence, as they did when they were looked up first
+    row = next(iter(live_videos.union(media, all=True).order_by('embed_kind')[:1]), None)
+
+    if row is None:
+        return None
+
+    parts = {'video': {}, 'channel': {}, 'organization': {}}
+    for alias, value in row.items():
+        name = alias[len('embed_'):]
+        part, _, field = name.partition('__')
+        if field:
+            parts[part][field] = value
+        else:
+            parts['video'][name] = value
+
+    video = parts['video']
+    video['channel_pk'] = parts['channel']['id']
+    video['organization_pk'] = parts['organization']['id']
+    video['tags'] = video['tags'] or []
+
+    # The vendored JSONField isn't decoded by `values()`
+    organization = parts['organization']
+    if isinstance(organization['config'], str):
+        organization['config'] = json.loads(organization['config'])
+    organization['config'] = organization['config'] or {}
+
+    channel = parts['channel'] if video['channel_pk'] is not None else None
+
+    return {'video': video, 'channel': channel, 'organization': organization}
+
+
+def get_embed_data(video_id):
+    """
+    Return a dict with the `video`, `channel` and `organization` parts of the given
+    video, or None if there is no Media or LiveVideo with that id.
+    """
+    video = cache.get(VIDEO_KEY.format(video_id))
+
+    if video is not None:
+        keys = {'organization': ORGANIZATION_KEY.format(video['organization_pk'])}
+        if video['channel_pk'] is not None:
+            keys['channel'] = CHANNEL_KEY.format(video['channel_pk'])
+
+        cached = cache.get_many(keys.values())
+        if len(cached) == len(keys):
+            return {
+                'video': video,
+                'channel': cached.get(keys.get('channel')),
+                'organization': cached[keys['organization']],
+            }
+
+    return build_embed_snapshot(video_id)
+
+
+def build_embed_snapshot(video_id):
+    """
+    Fetch the embed data of a video and store it in the cache.
+    """
+    data = _query_embed_data(video_id)
+
+    if data is not None:
+        _store_embed_data(data)
+
+    return data
+
+
+def _store_embed_data(data):
+    video = data['video']
+
+    # Videos that can still change state expire sooner than finished media
+    timeout = settings.EMBED_CACHE_TIMEOUT
+    if video['kind'] == MEDIA and video['state'] == Media.State.FINISHED:
+        timeout = settings.EMBED_SNAPSHOT_TIMEOUT
+
+    entries = {ORGANIZATION_KEY.format(data['organization']['id']): data['organization']}
+    if data['channel'] is not None:
+        entries[CHANNEL_KEY.format(data['channel']['id'])] = data['channel']
+
+    cache.set_many(entries, settings.EMBED_SNAPSHOT_TIMEOUT)
+    cache.set(VIDEO_KEY.format(video['video_id']), video, timeout)
+
+
+def get_video_urls(data):
+    """
+    Return the (poster_url, video_url, mime_type) tuple of resolved embed data.
+    """
+    video = data['video']
+
+    if video['kind'] == LIVE:
+        return '', f'https://{video["cf_domain"]}/output.m3u8', 'application/x-mpegURL'
+
+    if data['channel'] is None:
+        return '', '', ''
+
+    return Media.build_urls(data['channel']['cf_domain'], video['video_id'],
+                            video['media_type'], video['has_thumbnail'])
+
+
+# -------------------------------- Cache invalidation -------------------------------- #
+# Entries are deleted right away, so nothing reads them while the change isn't committed,
+# and rebuilt (or deleted again) once it is, to drop anything cached in the meantime.
+@receiver(post_save, sender=Media, dispatch_uid='embed_media_saved')
+@receiver(post_save, sender=LiveVideo, dispatch_uid='embed_live_saved')
+def embed_video_saved_receiver(sender, instance, **kwargs):
+    key = VIDEO_KEY.format(instance.video_id)
+    cache.delete(key)
+
+    if sender is Media and instance.state == Media.State.FINISHED:
+        transaction.on_commit(lambda: build_embed_snapshot(instance.video_id))
+    else:
+        transaction.on_commit(lambda: cache.delete(key))
+
+
+@receiver(post_delete, sender=Media, dispatch_uid='embed_media_deleted')
+@receiver(post_delete, sender=LiveVideo, dispatch_uid='embed_live_deleted')
+def embed_video_deleted_receiver(sender, instance, **kwargs):
+    cache.delete(VIDEO_KEY.format(instance.video_id))
+
+
+@receiver(m2m_changed, sender=Media.tags.through, dispatch_uid='embed_media_tags_changed')
+@receiver(m2m_changed, sender=LiveVideo.tags.through, dispatch_uid='embed_live_tags_changed')
+def embed_video_tags_changed_receiver(sender, instance, action, reverse, model, pk_set,
+                                      **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if not reverse:
+        cache.delete(VIDEO_KEY.format(instance.video_id))
+        return
+
+    # Changed from the Tag side, so `model` is the video model
+    if pk_set:
+        videos = model.objects.filter(pk__in=pk_set)
+    else:
+        videos = model.objects.filter(tags=instance)
+
+    cache.delete_many([VIDEO_KEY.format(video_id)
+                       for video_id in videos.values_list('video_id', flat=True)])
+
+
+@receiver(post_save, sender=Tag, dispatch_uid='embed_tag_saved')
+def embed_tag_changed_receiver(sender, instance, created, **kwargs):
+    if created:
+        return
+
+    video_ids = list(instance.media.values_list('video_id', flat=True))
+    video_ids += instance.live_videos.values_list('video_id', flat=True)
+    cache.delete_many([VIDEO_KEY.format(video_id) for video_id in video_ids])
+
+
+@receiver(post_save, sender=Channel, dispatch_uid='embed_channel_saved')
+def embed_channel_saved_receiver(sender, instance, **kwargs):
+    key = CHANNEL_KEY.format(instance.pk)
+    channel = {field: getattr(instance, field) for field in CHANNEL_FIELDS}
+
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.set(key, channel, settings.EMBED_SNAPSHOT_TIMEOUT))
+
+
+@receiver(post_delete, sender=Channel, dispatch_uid='embed_channel_deleted')
+def embed_channel_deleted_receiver(sender, instance, **kwargs):
+    cache.delete(CHANNEL_KEY.format(instance.pk))
+
+
+@receiver(post_save, sender=Organization, dispatch_uid='embed_organization_saved')
+def embed_organization_saved_receiver(sender, instance, **kwargs):
+    key = ORGANIZATION_KEY.format(instance.pk)
+    organization = {field: getattr(instance, field) for field in ORGANIZATION_FIELDS}
+    organization['config'] = organization['config'] or {}
+
+    cache.delete(key)
+    transaction.on_commit(
+        lambda: cache.set(key, organization, settings.EMBED_SNAPSHOT_TIMEOUT))
+
+
+@receiver(post_delete, sender=Organization, dispatch_uid='embed_organization_deleted')
+def embed_organization_deleted_receiver(sender, instance, **kwargs):
+    cache.delete(ORGANIZATION_KEY.format(instance.pk))
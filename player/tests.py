@@ -1,7 +1,10 @@
+from unittest import mock
+
 from django.test import TestCase, Client
 from django.urls import reverse
 from rest_framework import status
 
+from player import domains, embed
 from player.views import EmbedView
 
 from organization.models import Organization, Channel
@@ -765,3 +768,231 @@ class PlayerTests(TestCase):
 
         url = response.context['url']
         self.assertTrue('hls/output.m3u8' in url)
+
+    # <editor-fold desc="Embed Cache TESTS">
+    def test_embed_resolved_with_one_query(self):
+        url = reverse('embed',
+                      kwargs={'channel_id': self.chan1.channel_id,
+                              'video_id': self.video1.video_id})
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+
+        self.assertEquals(status.HTTP_200_OK, response.status_code)
+        self.assertFalse(response.context['error'])
+
+        # Served from cache afterwards
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+
+        self.assertEquals(self.chan1.ads_vast_url, response.context['adTagUrl'])
+
+    def test_embed_live_video_resolved_with_one_query(self):
+        live = \
+            create_live_videos('Live', self.user1, self.org1, 1, LiveVideo.State.ON)[0]
+        add_channel_to_video(self.chan1, live)
+
+        url = reverse('embed',
+                      kwargs={'channel_id': self.chan1.channel_id,
+                              'video_id': live.video_id})
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+
+        self.assertFalse(response.context['error'])
+        self.assertEquals('application/x-mpegURL', response.context['type'])
+        self.assertTrue(response.context['url'].endswith('/output.m3u8'))
+
+    def test_embed_not_found(self):
+        url = reverse('embed', kwargs={'video_id': 'not-a-video'})
+        response = self.client.get(url)
+
+        self.assertEquals(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_embed_cache_invalidated_on_video_change(self):
+        url = reverse('embed',
+                      kwargs={'channel_id': self.chan1.channel_id,
+                              'video_id': self.video1.video_id})
+        self.client.get(url)
+
+        self.video1.ads_vast_url = 'http://www.new-video-vast-url.com'
+        self.video1.save()
+
+        response = self.client.get(url)
+        self.assertEquals(self.video1.ads_vast_url, response.context['adTagUrl'])
+
+    def test_embed_cache_invalidated_on_channel_change(self):
+        url = reverse('embed',
+                      kwargs={'channel_id': self.chan1.channel_id,
+                              'video_id': self.video1.video_id})
+        self.client.get(url)
+
+        self.chan1.ads_vast_url = 'http://www.new-channel-vast-url.com'
+        self.chan1.save()
+
+        response = self.client.get(url)
+        self.assertEquals(self.chan1.ads_vast_url, response.context['adTagUrl'])
+
+    def test_embed_cache_invalidated_on_organization_change(self):
+        url = reverse('embed',
+                      kwargs={'channel_id': self.chan1.channel_id,
+                              'video_id': self.video1.video_id})
+        self.client.get(url)
+
+        self.org1.traffic_enabled = False
+        self.org1.save()
+
+        try:
+            response = self.client.get(url)
+        finally:
+            self.org1.traffic_enabled = True
+            self.org1.save()
+
+        self.assertTrue(response.context['error'])
+        self.assertEqual(UNAVAILABLE_MESSAGE, response.context['message'])
+
+    # </editor-fold>
+
+    # <editor-fold desc="Domain Matcher TESTS">
+    def test_domain_matcher_cached_by_channel(self):
+        matcher = domains.get_domain_matcher(self.chan5.pk, self.chan5.allowed_domains)
+
+        self.assertIs(matcher, domains.get_domain_matcher(self.chan5.pk, ['www.*.test.com']))
+        self.assertTrue(domains.is_domain_allowed(self.chan5.pk, self.chan5.allowed_domains,
+                                                  'www.wildcard.test.com'))
+
+    def test_domain_matcher_rebuilt_when_domains_change(self):
+        url = reverse('embed', kwargs={'video_id': self.video3.video_id})
+        client = Client(HTTP_REFERER='http://www.allowed-domain.com')
+        add_channel_to_video(self.chan5, self.video3)
+
+        response = client.get(url)
+        self.assertEqual(INVALID_DOMAIN_MESSAGE, response.context['message'])
+
+        self.chan5.allowed_domains = ['www.*.test.com', 'www.allowed-domain.com']
+        self.chan5.save()
+
+        response = client.get(url)
+        self.assertFalse(response.context['error'])
+
+    def test_referer_domain(self):
+        self.assertEqual('www.domain.com',
+                         domains.get_referer_domain('https://user@www.domain.com:8080/page?q=1'))
+        self.assertIsNone(domains.get_referer_domain(None))
+
+    # </editor-fold>
+
+    # <editor-fold desc="Conditional Request TESTS">
+    def test_embed_etag_and_cache_headers(self):
+        url = reverse('embed',
+                      kwargs={'channel_id': self.chan1.channel_id,
+                              'video_id': self.video1.video_id})
+        response = self.client.get(url)
+
+        self.assertEquals(status.HTTP_200_OK, response.status_code)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertIn('Referer', response['Vary'])
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_embed_not_modified(self):
+        url = reverse('embed',
+                      kwargs={'channel_id': self.chan1.channel_id,
+                              'video_id': self.video1.video_id})
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEquals(status.HTTP_304_NOT_MODIFIED, response.status_code)
+        self.assertEquals(b'', response.content)
+
+        # Validate the 304 keeps the validator and caching headers
+        self.assertEquals(etag, response['ETag'])
+        self.assertEquals('Referer', response['Vary'])
+        self.assertIn('public', response['Cache-Control'])
+
+    def test_embed_etag_changes_with_rendered_fields(self):
+        url = reverse('embed',
+                      kwargs={'channel_id': self.chan1.channel_id,
+                              'video_id': self.video1.video_id})
+        etag = self.client.get(url)['ETag']
+
+        self.chan1.autoplay = True
+        self.chan1.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEquals(status.HTTP_200_OK, response.status_code)
+        self.assertNotEquals(etag, response['ETag'])
+
+    def test_embed_with_token_is_private(self):
+        url = reverse('embed',
+                      kwargs={'channel_id': self.chan1.channel_id,
+                              'video_id': self.video1.video_id})
+        response = self.client.get(url, {'token': 'dG9rZW4='})
+
+        self.assertEquals('token', response.context['token'])
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotIn('public', response['Cache-Control'])
+
+    # </editor-fold>
+
+    # <editor-fold desc="Embed Snapshot TESTS">
+    def test_embed_snapshot_served_without_queries(self):
+        embed.build_embed_snapshot(self.video3.video_id)
+
+        url = reverse('embed',
+                      kwargs={'channel_id': self.chan1.channel_id,
+                              'video_id': self.video3.video_id})
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+
+        self.assertFalse(response.context['error'])
+        self.assertEquals(self.video3.ads_vast_url, response.context['adTagUrl'])
+
+    def test_embed_snapshot_still_validates_domain(self):
+        add_channel_to_video(self.chan4, self.video3)
+        embed.build_embed_snapshot(self.video3.video_id)
+
+        url = reverse('embed', kwargs={'video_id': self.video3.video_id})
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+
+        self.assertEqual(INVALID_DOMAIN_MESSAGE, response.context['message'])
+
+    def test_embed_snapshot_rebuilt_on_channel_change(self):
+        embed.build_embed_snapshot(self.video1.video_id)
+
+        with mock.patch('player.embed.transaction.on_commit', side_effect=lambda func: func()):
+            self.chan1.ads_vast_url = 'http://www.new-channel-vast-url.com'
+            self.chan1.save()
+
+        url = reverse('embed',
+                      kwargs={'channel_id': self.chan1.channel_id,
+                              'video_id': self.video1.video_id})
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+
+        self.assertEquals(self.chan1.ads_vast_url, response.context['adTagUrl'])
+
+    def test_embed_snapshot_built_when_media_finishes(self):
+        video = create_videos('Video processing', self.user1, self.org1, 1,
+                              Media.State.PROCESSING)[0]
+        add_channel_to_video(self.chan1, video)
+
+        with mock.patch('player.embed.transaction.on_commit', side_effect=lambda func: func()), \
+                mock.patch('utils.s3.get_size', return_value=0):
+            video.to_finished()
+
+        url = reverse('embed',
+                      kwargs={'channel_id': self.chan1.channel_id,
+                              'video_id': video.video_id})
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+
+        self.assertFalse(response.context['error'])
+
+    # </editor-fold>
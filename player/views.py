@@ -1,68 +1,111 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import hashlib
+import json
 from base64 import b64decode
+from functools import lru_cache
 
-import re
 from django.conf import settings
 from django.http import Http404
+from django.template.loader import get_template
+from django.utils.cache import get_conditional_response, patch_cache_control, \
+    patch_vary_headers
 from django.utils.safestring import mark_safe
 from django.views.generic.base import TemplateView
 
+from player.domains import get_referer_domain, is_domain_allowed
+from player.embed import get_embed_data, get_video_urls
 from video.models import Media, LiveVideo
 
 
+@lru_cache(maxsize=None)
+def get_template_digest(template_name):
+    """
+    Digest of the template source, so a deploy that changes the template (or the
+    static bundles it references) also changes the ETags.
+    """
+    source = get_template(template_name).template.source
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+
 class EmbedView(TemplateView):
     template_name = "player/index.html"
 
-    def validate_domain(self, channel_allowed_domains, referer_domain):
-        allowed_domains = settings.ALLOWED_DOMAINS + channel_allowed_domains
+    def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+        etag = self.get_etag(context)
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = self.render_to_response(context)
+
+        # A 304 carries the same validator and caching headers, so caches in between
+        # keep and key the revalidated entry
+        response['ETag'] = etag
+        self.patch_cache_headers(response)
+
+        return response
 
-        if len(channel_allowed_domains) == 0:
-            return True
+    def get_etag(self, context):
+        """
+        Strong ETag of the fields the template renders.
+        """
+        fields = {key: value for key, value in context.items() if key != 'view'}
+        digest = hashlib.sha1(get_template_digest(self.template_name).encode('utf-8'))
+        digest.update(json.dumps(fields, sort_keys=True, default=str).encode('utf-8'))
 
-        for allowed_domain in allowed_domains:
-            secondary = allowed_domain
-            allowed_domain = re.escape(allowed_domain).replace('\\*', '[a-zA-Z0-9_-]+')
-            allowed_domain = re.compile(allowed_domain)
-            if allowed_domain.match(str(referer_domain)):
-                return True
+        return f'"{digest.hexdigest()}"'
 
-        return False
+    def patch_cache_headers(self, response):
+        # The response depends on the embedding site through the allowed domains
+        patch_vary_headers(response, ['Referer'])
+
+        if self.request.GET.get('token'):
+            patch_cache_control(response, private=True, max_age=0)
+        else:
+            patch_cache_control(response, public=True,
+                                max_age=settings.EMBED_BROWSER_MAX_AGE,
+                                s_maxage=settings.EMBED_SHARED_MAX_AGE)
+
+    def validate_domain(self, channel, referer_domain):
+        return is_domain_allowed(channel['id'], channel['allowed_domains'], referer_domain)
 
     def get_context_data(self, **kwargs):
         context = super(EmbedView, self).get_context_data(**kwargs)
 
-        poster_url, video, video_url, mime_type = self.get_video_data(kwargs.get('video_id'))
-        channel = video.channel
-        organization = video.organization
+        data = get_embed_data(kwargs.get('video_id'))
+
+        if data is None:
+            raise Http404('Video not found')
 
-        if not organization.traffic_enabled:
+        video = data['video']
+        channel = data['channel']
+        organization = data['organization']
+
+        if not organization['traffic_enabled'] or channel is None:
             context['error'] = True
             context['message'] = 'The content is not available.'
             return context
 
-        referer = self.request.META.get('HTTP_REFERER')
+        poster_url, video_url, mime_type = get_video_urls(data)
 
-        referer_domain = None
-        if referer:
-            regex_domain = r'^(?:https?:\/\/)?(?:[^@\/\n]+@)?([^:\/?\n]+)'
-            referer_domain = re.match(regex_domain, referer).group(1)
+        referer_domain = get_referer_domain(self.request.META.get('HTTP_REFERER'))
 
         adTagUrl = mark_safe(
-            video.ads_vast_url or channel.ads_vast_url or ''
-        ) if video.enable_ads else mark_safe('')
+            video['ads_vast_url'] or channel['ads_vast_url'] or ''
+        ) if video['enable_ads'] else mark_safe('')
 
-        if video.autoplay == 'c':
-            autoplay = channel.autoplay
+        if video['autoplay'] == 'c':
+            autoplay = channel['autoplay']
         else:
-            autoplay = video.autoplay == 'y'
+            autoplay = video['autoplay'] == 'y'
 
         if not autoplay:
             autoplay = ''
 
-        if self.validate_domain(channel.allowed_domains, referer_domain):
-            if video.state not in [LiveVideo.State.ON, Media.State.FINISHED]:
+        if self.validate_domain(channel, referer_domain):
+            if video['state'] not in [LiveVideo.State.ON, Media.State.FINISHED]:
                 context['error'] = True
                 context['message'] = 'The content is not available.'
 
@@ -92,7 +135,7 @@ class EmbedView(TemplateView):
                     video_data['token'] = b64decode(self.request.GET.get('token').encode('utf-8')).decode('utf-8')
 
                 # Traking
-                org_qtracking_config = organization.config.get('qtracking')
+                org_qtracking_config = organization['config'].get('qtracking')
 
                 if org_qtracking_config:
                     player_api_key = org_qtracking_config.get('player_api_key')
@@ -103,12 +146,12 @@ class EmbedView(TemplateView):
                         video_data['player_api_key'] = player_api_key
                         video_data['tracking_api_url'] = f'{tracking_api_url}/api/v1/tracking/'
 
-                custom_player_css = organization.config.get('playerCustomCss')
+                custom_player_css = organization['config'].get('playerCustomCss')
 
                 if custom_player_css: video_data['playerCustomCss'] = custom_player_css
 
                 # Qhub analytics
-                org_qhub_analytics_config = organization.config.get('qhub_analytics')
+                org_qhub_analytics_config = organization['config'].get('qhub_analytics')
 
                 if org_qhub_analytics_config:
                     video_data['qhub_analytics_enabled'] = org_qhub_analytics_config.get('enabled',
@@ -122,23 +165,3 @@ class EmbedView(TemplateView):
             context['message'] = 'Content is not available on this site.'
 
         return context
-
-    @staticmethod
-    def get_video_data(video_id):
-        live_video = LiveVideo.objects.filter(video_id=video_id).first()
-
-        if live_video:
-            video_url = f'https://{live_video.cf_domain}/output.m3u8'
-            poster_url = ''
-            mime_type = 'application/x-mpegURL'
-
-            return poster_url, live_video, video_url, mime_type
-
-        media = Media.objects.filter(video_id=video_id).first()
-
-        if media:
-            poster_url, media_url, mime_type = media.get_urls()
-
-            return poster_url, media, media_url, mime_type
-
-        raise Http404('Video not found')
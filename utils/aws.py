@@ -0,0 +1,113 @@
+"""
+Process wide registry of boto3 clients.
+
+Building a client resolves the credentials, loads the service model and endpoints and
+opens new connections, so clients are built once per service, AWSAccount and region and
+shared by every thread of the process (boto3 clients are thread safe). Entries are keyed
+by a hash of the credentials too, and the ones of an AWSAccount are evicted when the row
+changes or is deleted.
+
+Resources are not thread safe, so they are built on every call from a shared session.
+"""
+import hashlib
+import threading
+
+import boto3
+from botocore.config import Config
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+CLIENT_CONFIG = Config(
+    max_pool_connections=settings.AWS_MAX_POOL_CONNECTIONS,
+    connect_timeout=settings.AWS_CONNECT_TIMEOUT,
+    read_timeout=settings.AWS_READ_TIMEOUT,
+    retries={'max_attempts': settings.AWS_MAX_ATTEMPTS, 'mode': 'standard'},
+)
+
+_lock = threading.Lock()
+_sessions = {}
+_clients = {}
+
+
+def _account_key(aws_account):
+    """
+    (AWSAccount id, credentials hash, region) of an account, or Nones for the default
+    credentials of the environment.
+    """
+    if not aws_account:
+        return None, None, None
+
+    credentials = f'{aws_account.access_key}:{aws_account.secret_access_key}'
+    return (aws_account.pk, hashlib.sha256(credentials.encode()).hexdigest(),
+            aws_account.region)
+
+
+def _get_session(aws_account, account_key):
+    # Must be called holding the lock, sessions are not thread safe
+    session = _sessions.get(account_key)
+
+    if session is None:
+        if aws_account:
+            session = boto3.session.Session(
+                aws_access_key_id=aws_account.access_key,
+                aws_secret_access_key=aws_account.secret_access_key,
+                region_name=aws_account.region,
+            )
+        else:
+            session = boto3.session.Session()
+
+        _sessions[account_key] = session
+
+    return session
+
+
+def get_client(service, aws_account=None, endpoint_url=None):
+    """
+    Return the shared boto3 client of `service` for `aws_account`, or for the default
+    credentials if there is no account.
+    """
+    account_key = _account_key(aws_account)
+    key = (service, *account_key, endpoint_url)
+    client = _clients.get(key)
+
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+
+            if client is None:
+                session = _get_session(aws_account, account_key)
+                client = session.client(service, endpoint_url=endpoint_url, config=CLIENT_CONFIG)
+                _clients[key] = client
+
+    return client
+
+
+def get_resource(service, aws_account=None):
+    """
+    Return a new boto3 resource of `service` for `aws_account`, built from the shared session.
+    """
+    account_key = _account_key(aws_account)
+
+    with _lock:
+        session = _get_session(aws_account, account_key)
+        return session.resource(service, config=CLIENT_CONFIG)
+
+
+def evict(aws_account_id):
+    """
+    Drop the sessions and clients of an AWSAccount.
+    """
+    with _lock:
+        for key in [key for key in _sessions if key[0] == aws_account_id]:
+            del _sessions[key]
+
+        for key in [key for key in _clients if key[1] == aws_account_id]:
+            del _clients[key]
+
+
+@receiver(post_save, sender='organization.AWSAccount', dispatch_uid='aws_clients_account_saved')
+@receiver(post_delete, sender='organization.AWSAccount',
+          dispatch_uid='aws_clients_account_deleted')
+def aws_account_changed_receiver(sender, instance, **kwargs):
+    evict(instance.pk)
@@ -1,19 +1,13 @@
-import boto3
 from botocore.exceptions import ClientError
 from celery import shared_task
 from django.utils import timezone
 from video.signals import cloudfront_deleted
-from configuration.models import Configuration
+from configuration.cache import get_cloudfront_configuration
 from organization.models import AWSAccount
+from utils.aws import get_client
 
 def get_cloudfront_client(aws_account):
-    if aws_account:
-        cloudfront = boto3.client('cloudfront', aws_access_key_id=aws_account.access_key,
-                                  aws_secret_access_key=aws_account.secret_access_key,
-                                  region_name=aws_account.region)
-    else:
-        cloudfront = boto3.client('cloudfront')
-    return cloudfront
+    return get_client('cloudfront', aws_account)
 
 
 def create_distribution(settings, organization, channel):
@@ -45,8 +39,8 @@ def create_distribution(settings, organization, channel):
                 [2]: >> default profile configuration on /configuration/cloud_front_configuration.sample
     """
 
-    global_config = Configuration.get_solo()
-    conf_cont = global_config.cloud_front_configuration
+    # copy of the global configuration, patched for this distribution
+    conf_cont = get_cloudfront_configuration()
 
     # get Origins/Items path, update & replace values
     origin_conf = conf_cont['Origins']['Items'][0]
@@ -184,6 +178,32 @@ def update_distribution_status(organization, dist_id, status = False):
             raise ex
 
 
+def update_distribution_config(organization, dist_id, update, attempts=5):
+    """
+    Apply `update` to the configuration of a distribution. The configuration is read again
+    and `update` applied again when the distribution changed in between (the ETag no longer
+    matches), up to `attempts` times. Distributions that don't exist are skipped.
+    """
+    cloudfront = get_cloudfront_client(organization.aws_account)
+
+    for attempt in range(1, attempts + 1):
+        try:
+            cf_config = cloudfront.get_distribution_config(Id=dist_id)
+            update(cf_config['DistributionConfig'])
+
+            return cloudfront.update_distribution(
+                Id=dist_id, IfMatch=cf_config['ETag'],
+                DistributionConfig=cf_config['DistributionConfig']
+            )
+        except ClientError as ex:
+            code = ex.response['Error']['Code']
+
+            if code == 'NoSuchDistribution':
+                return None
+            if code != 'PreconditionFailed' or attempt == attempts:
+                raise ex
+
+
 def update_distribution_geoblocking(dist_id, type, location, organization):
     cloudfront = get_cloudfront_client(organization.aws_account)
 
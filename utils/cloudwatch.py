@@ -1,16 +1,10 @@
-import boto3
 from datetime import datetime, timedelta
 
+from utils.aws import get_client
 
-def get_cloudwatch(aws_account):
-    if aws_account:
-        cloudwatch = boto3.client('cloudwatch', aws_access_key_id=aws_account.access_key,
-                                  aws_secret_access_key=aws_account.secret_access_key,
-                                  region_name=aws_account.region)
-    else:
-        cloudwatch = boto3.client('cloudwatch')
 
-    return cloudwatch
+def get_cloudwatch(aws_account):
+    return get_client('cloudwatch', aws_account)
 
 
 def get_storage(aws_account, bucket_name):
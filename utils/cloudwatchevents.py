@@ -1,20 +1,14 @@
-import boto3
 import json
 
+from utils.aws import get_client
+
 class EventsNotFoundException(Exception):
     def __init__(self, message=''):
         self.message = message
 
 
 def get_cloudwatch_event(aws_account):
-    if aws_account:
-        events = boto3.client('events', aws_access_key_id=aws_account.access_key,
-                                  aws_secret_access_key=aws_account.secret_access_key,
-                                  region_name=aws_account.region)
-    else:
-        events = boto3.client('events')
-
-    return events
+    return get_client('events', aws_account)
 
 def put_rule(live):
     events = get_cloudwatch_event(live.organization.aws_account)
@@ -67,4 +61,43 @@ def remove_targets(live):
         response = events.remove_targets(Rule=str(live.video_id),
                                         Ids=[str(live.id)])
     except events.exceptions.ResourceNotFoundException:
-        raise EventsNotFoundException()
\ No newline at end of file
+        raise EventsNotFoundException()
+
+
+def put_job_state_rule(aws_account, name):
+    """
+    Rule of the MediaConvert job state change events of the jobs created by transcode
+    """
+    events = get_cloudwatch_event(aws_account)
+
+    conf = {
+        "source": [
+            "aws.mediaconvert"
+        ],
+        "detail-type": [
+            "MediaConvert Job State Change"
+        ],
+        "detail": {
+            "userMetadata": {
+                "video_id": [{"exists": True}]
+            }
+        }
+    }
+
+    return events.put_rule(Name=name,
+                           EventPattern=json.dumps(conf),
+                           State='ENABLED')
+
+
+def put_job_state_targets(aws_account, name, topic_arn):
+    events = get_cloudwatch_event(aws_account)
+
+    targets = [
+        {
+            'Id': name,
+            'Arn': topic_arn,
+            'InputPath': '$.detail'
+        },
+    ]
+
+    return events.put_targets(Rule=name, Targets=targets)
@@ -1,17 +1,11 @@
 from datetime import datetime, timedelta
-import boto3
 from celery import shared_task
 
+from utils.aws import get_client
+
 
 def get_cloudwatch(aws_account):
-    if aws_account:
-        cloudwatch = boto3.client('logs', aws_access_key_id=aws_account.access_key,
-                                  aws_secret_access_key=aws_account.secret_access_key,
-                                  region_name=aws_account.region)
-    else:
-        cloudwatch = boto3.client('logs')
-
-    return cloudwatch
+    return get_client('logs', aws_account)
 
 
 def check_input_state(live):
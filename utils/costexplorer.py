@@ -1,12 +1,13 @@
-import boto3
 import requests
 
 from celery import shared_task
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from dateutil.relativedelta import relativedelta
 from django.db.models import Sum, Count, Q
 from django.utils import timezone
 
+from utils.aws import get_client
+
 
 def update_bill(bill):
     if bill.is_current_bill():
@@ -103,7 +104,12 @@ def get_transcoding(organization_id, initial_date, final_date):
     video_transcoding_total = 0
     transcoding_per_channel = dict()
 
-    transcoding = Media.objects.filter(organization_id=organization_id, created_at__date__range=(initial_date, final_date))\
+    # Same as `created_at__date__range`, but as a range on the column so the
+    # (organization, created_at) index can be used
+    start = timezone.make_aware(datetime.combine(initial_date, datetime.min.time()))
+    end = timezone.make_aware(datetime.combine(final_date + timedelta(days=1), datetime.min.time()))
+
+    transcoding = Media.objects.filter(organization_id=organization_id, created_at__gte=start, created_at__lt=end)\
         .values('channel_id').order_by('channel_id').annotate(video_transcoding=Sum('duration', filter=Q(media_type='video')), audio_transcoding=Sum('duration', filter=Q(media_type='audio')))
 
     for channel in transcoding:
@@ -125,11 +131,7 @@ def get_transcoding(organization_id, initial_date, final_date):
 
 
 def get_cost_explorer(aws_account):
-    cost_explorer = boto3.client('ce',
-                                 aws_access_key_id=aws_account.access_key,
-                                 aws_secret_access_key=aws_account.secret_access_key,
-                                 region_name=aws_account.region)
-    return cost_explorer
+    return get_client('ce', aws_account)
 
 
 def get_data_transfer(aws_account, org_id, initial_date, final_date):
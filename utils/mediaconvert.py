@@ -1,41 +1,105 @@
 import pdb
 import os
 from pdb import Pdb
-import boto3
 import logging
 import math
+from botocore.exceptions import ClientError, EndpointConnectionError
 from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+from django.db.models import Case, F, Value, When
+from django.db.models.signals import post_save
+from django.utils import timezone
+from django_fsm import TransitionNotAllowed
+
+from configuration.cache import get_media_convert_settings
+from utils import cloudwatchevents, sns
+from utils.aws import get_client
 
 logger = logging.getLogger('defalut')
 
 
-def get_media_convert(aws_account):
+MEDIA_CONVERT_ENDPOINT_KEY = 'mediaconvert:endpoint'
+
+# Columns of Media written when a job is created or its status changes
+JOB_FIELDS = ('media_convert_job_id', 'job_status', 'job_percent_complete', 'job_submitted_at',
+              'job_updated_at')
+
+# Columns of Media written when listed jobs are applied
+APPLIED_FIELDS = ('state', 'job_status', 'job_percent_complete', 'job_updated_at')
+
+# Name of the EventBridge rule and SNS topic of the job state change events of an account
+JOB_EVENTS_NAME = 'video-headline-mediaconvert-jobs'
+
+
+def discover_media_convert_endpoint(aws_account):
     """
-    :return: media_convert object (boto3)
+    :return: account specific MediaConvert endpoint, from `describe_endpoints`
     """
-    # TODO: Uncomment and use cache
-    # session = boto3.session.Session()
-    # mediaclient = session.client('mediaconvert')
-    # response = mediaclient.describe_endpoints(
-    #     MaxResults=1
-    # )
-    # media_convert = session.client(
-    #     'mediaconvert',
-    #     endpoint_url=response['Endpoints'][0]['Url'])
+    media_convert = get_client('mediaconvert', aws_account)
+    return media_convert.describe_endpoints(MaxResults=1)['Endpoints'][0]['Url']
+
 
+def get_media_convert_endpoint(aws_account, refresh=False):
+    """
+    The endpoint is discovered once and stored on the AWSAccount, or in the cache for the
+    default credentials, unless configured by hand. `refresh` discovers it again.
+    """
     if aws_account:
-        media_convert = boto3.client(
-            'mediaconvert', aws_access_key_id=aws_account.access_key,
-            aws_secret_access_key=aws_account.secret_access_key,
-            endpoint_url=aws_account.media_convert_endpoint_url,
-            region_name=aws_account.region)
-    else:
-        media_convert = boto3.client(
-            'mediaconvert',
-            endpoint_url=(os.getenv('AWS_MEDIA_CONVERT_ENDPOINT'))
-        )
+        if aws_account.media_convert_endpoint_url and not refresh:
+            return aws_account.media_convert_endpoint_url
+
+        from organization.models import AWSAccount
+
+        endpoint = discover_media_convert_endpoint(aws_account)
+        aws_account.media_convert_endpoint_url = endpoint
+        # update() so the clients of the account are not evicted
+        AWSAccount.objects.filter(pk=aws_account.pk).update(media_convert_endpoint_url=endpoint)
+
+        return endpoint
+
+    endpoint = os.getenv('AWS_MEDIA_CONVERT_ENDPOINT')
+    if endpoint:
+        return endpoint
+
+    endpoint = None if refresh else cache.get(MEDIA_CONVERT_ENDPOINT_KEY)
+    if endpoint is None:
+        endpoint = discover_media_convert_endpoint(None)
+        cache.set(MEDIA_CONVERT_ENDPOINT_KEY, endpoint, settings.MEDIA_CONVERT_ENDPOINT_TIMEOUT)
+
+    return endpoint
+
+
+def get_media_convert(aws_account, refresh=False):
+    """
+    :return: media_convert object (boto3)
+    """
+    endpoint = get_media_convert_endpoint(aws_account, refresh)
+    return get_client('mediaconvert', aws_account, endpoint_url=endpoint)
+
+
+def is_endpoint_error(error):
+    if isinstance(error, EndpointConnectionError):
+        return True
+
+    return isinstance(error, ClientError) and \
+        'endpoint' in error.response.get('Error', {}).get('Message', '').lower()
+
+
+def call_media_convert(aws_account, operation, **kwargs):
+    """
+    Call a MediaConvert `operation`, discovering the endpoint again and retrying once if it
+    fails because of the endpoint.
+    """
+    try:
+        return getattr(get_media_convert(aws_account), operation)(**kwargs)
+    except (ClientError, EndpointConnectionError) as e:
+        if not is_endpoint_error(e):
+            raise
 
-    return media_convert
+        logger.warning(f'MediaConvert endpoint error, discovering it again: {e}')
+        return getattr(get_media_convert(aws_account, refresh=True), operation)(**kwargs)
 
 
 def transcode(media):
@@ -46,29 +110,30 @@ def transcode(media):
     # retrieve organization
     organization = media.organization
 
-    media_convert = get_media_convert(organization.aws_account)
-
-    # retrieve transcoding settings
+    # retrieve a copy of the transcoding settings, patched for this media
     if media.media_type == 'audio':
-        conf_cont = media.organization.plan.audio_transcode_configuration.settings
+        conf_cont = get_media_convert_settings(organization.plan.audio_transcode_configuration_id)
         conf_cont = set_audio_transcode_output_location(conf_cont, organization, media)
 
     else:
-        conf_cont = media.organization.plan.video_transcode_configuration.settings
+        conf_cont = get_media_convert_settings(organization.plan.video_transcode_configuration_id)
         conf_cont = set_video_transcode_output_location(conf_cont, organization, media)
 
     # create job
-    job = media_convert.create_job(
+    job = call_media_convert(
+        organization.aws_account,
+        'create_job',
         Role=organization.aws_account.media_convert_role,
-        Settings=conf_cont
+        Settings=conf_cont,
+        UserMetadata={'video_id': str(media.video_id)}
     )
 
     # get job reference and associated to target video
-    job_id = job['Job']['Id']
-    media.metadata['media_convert_job_id'] = job_id
-    media.save()
-
-    check_job_status.delay(media.video_id)
+    media.media_convert_job_id = job['Job']['Id']
+    media.job_status = job['Job'].get('Status', 'SUBMITTED')
+    media.job_percent_complete = None
+    media.job_submitted_at = media.job_updated_at = timezone.now()
+    media.save(update_fields=JOB_FIELDS)
 
 
 def set_video_transcode_output_location(conf_cont, organization, media):
@@ -141,48 +206,261 @@ def set_audio_transcode_output_location(conf_cont, organization, media):
     return conf_cont
 
 
+def update_job_status(media, status, percent_complete=None, duration_in_ms=None):
+    """
+    Apply the status of a MediaConvert job to its media, from `get_job` or from a job
+    state change event.
+    """
+    from video.models import Media
+
+    media.job_status = status
+    media.job_updated_at = timezone.now()
+
+    if status == 'PROGRESSING':
+        media.job_percent_complete = percent_complete
+
+        if media.state == Media.State.QUEUED:
+            media.to_processing()
+        else:
+            # Progress updates only write the job columns
+            media.save(update_fields=('job_status', 'job_percent_complete', 'job_updated_at'))
+
+    elif status == 'COMPLETE':
+        media.job_percent_complete = None
+        media.duration = math.ceil(duration_in_ms / 1000)
+        media.to_finished()
+
+    elif status == 'ERROR':
+        media.to_processing_failed()
+
+
+def get_duration_in_ms(job):
+    return job['OutputGroupDetails'][0]['OutputDetails'][0]['DurationInMs']
+
+
 @shared_task
 def check_job_status(video_id):
     """
-    Check Media Convert job status.
+    Check the Media Convert job of a single media with `get_job`.
+
+    Jobs are tracked with their state change events (see `job_state_changed`) and the ones
+    of lost events are caught up in batches by `reconcile_jobs`.
     """
     from video.models import Media
 
     media = Media.objects.select_related('organization__aws_account').get(video_id=video_id)
 
-    job_id = media.metadata.get('media_convert_job_id')
-
-    if not job_id:
-        return check_job_status.apply_async(args=(video_id,), countdown=10)
+    if media.state not in (Media.State.QUEUED, Media.State.PROCESSING) or \
+            not media.media_convert_job_id:
+        return
 
-    media_convert = get_media_convert(media.organization.aws_account)
     try:
         # recover job and update video status
-        job = media_convert.get_job(Id=job_id)['Job']
+        job = call_media_convert(media.organization.aws_account, 'get_job',
+                                 Id=media.media_convert_job_id)['Job']
+        status = job['Status']
+
+        duration_in_ms = get_duration_in_ms(job) if status == 'COMPLETE' else None
+        update_job_status(media, status, job.get('JobPercentComplete'), duration_in_ms)
+    except Exception:
+        check_job_status.retry()
+
+
+@shared_task
+def reconcile_jobs():
+    """
+    Periodic task, reconcile the jobs of every AWS account with media being transcoded.
+    """
+    from video.models import Media
+
+    aws_account_ids = Media.objects \
+        .filter(state__in=(Media.State.QUEUED, Media.State.PROCESSING),
+                media_convert_job_id__isnull=False) \
+        .order_by() \
+        .values_list('organization__aws_account', flat=True) \
+        .distinct()
+
+    for aws_account_id in aws_account_ids:
+        _reconcile_account_jobs.delay(aws_account_id)
+
+
+def list_jobs(aws_account, job_ids):
+    """
+    List the jobs of an account newest first, until all of `job_ids` are found or
+    MEDIA_CONVERT_RECONCILE_MAX_PAGES pages are read.
+
+    :return: {job_id: job} of the `job_ids` found
+    """
+    jobs = {}
+    kwargs = {'MaxResults': 20, 'Order': 'DESCENDING'}
+
+    for _ in range(settings.MEDIA_CONVERT_RECONCILE_MAX_PAGES):
+        page = call_media_convert(aws_account, 'list_jobs', **kwargs)
+        jobs.update((job['Id'], job) for job in page.get('Jobs', []) if job['Id'] in job_ids)
+
+        if len(jobs) == len(job_ids) or not page.get('NextToken'):
+            break
+
+        kwargs['NextToken'] = page['NextToken']
+
+    return jobs
+
+
+def apply_jobs(media_by_job_id, jobs):
+    """
+    Apply the status of listed `jobs` to their media. Progress updates, with the transitions
+    to processing, and the transitions to processing failed are applied with one query each,
+    the finished media one by one as their size is read from S3.
+    """
+    from video.models import Media
+
+    progressing = []
+    to_processing_failed = []
+
+    for job_id, job in jobs.items():
+        media = media_by_job_id[job_id]
         status = job['Status']
 
         if status == 'PROGRESSING':
-            if media.state == Media.State.QUEUED:
-                media.to_processing()
-            else:
-                media.metadata['job_percent_complete'] = job.get('JobPercentComplete')
-                media.save()
+            percent_complete = job.get('JobPercentComplete')
+
+            if media.state == Media.State.QUEUED or media.job_percent_complete != percent_complete:
+                media.job_percent_complete = percent_complete
+                progressing.append(media)
+
+        elif status == 'ERROR':
+            to_processing_failed.append(media)
+
+        elif status == 'COMPLETE':
+            try:
+                update_job_status(media, status, duration_in_ms=get_duration_in_ms(job))
+            except Exception:
+                logger.exception(f'Error finishing the video {media.video_id}')
+
+    now = timezone.now()
+    pending_states = (Media.State.QUEUED, Media.State.PROCESSING)
+
+    if progressing:
+        # Queued media move to processing, like Media.to_processing
+        Media.objects.filter(pk__in=[media.pk for media in progressing],
+                             state__in=pending_states).update(
+            state=Case(When(state=Media.State.QUEUED, then=Value(Media.State.PROCESSING)),
+                       default=F('state'), output_field=models.CharField()),
+            job_status='PROGRESSING',
+            job_percent_complete=Case(*[When(pk=media.pk, then=Value(media.job_percent_complete))
+                                        for media in progressing],
+                                      default=F('job_percent_complete'),
+                                      output_field=models.PositiveSmallIntegerField()),
+            job_updated_at=now,
+        )
+
+    # Jobs may fail before they progress, so failed jobs of queued media are applied too
+    if to_processing_failed:
+        Media.objects.filter(pk__in=[media.pk for media in to_processing_failed],
+                             state__in=pending_states) \
+            .update(state=Media.State.PROCESSING_FAILED, job_status='ERROR', job_updated_at=now)
+
+    # update() doesn't send post_save, it's sent for the updated media so the receivers
+    # invalidate what depends on them, e.g. the embed data and the dashboard counters
+    updated = [media.pk for media in progressing + to_processing_failed]
+    if updated:
+        for media in Media.objects.filter(pk__in=updated):
+            post_save.send(sender=Media, instance=media, created=False, raw=False,
+                           using=Media.objects.db, update_fields=frozenset(APPLIED_FIELDS))
 
-            return check_job_status.apply_async(args=(video_id,), countdown=5)
 
-        if status == 'COMPLETE':
-            media.to_finished()
-            media.metadata.pop('job_percent_complete')
+@shared_task
+def _reconcile_account_jobs(aws_account_id):
+    """
+    Apply the status of the jobs of an AWS account to its media being transcoded, listing
+    the jobs of the account instead of getting them one by one.
+    """
+    from organization.models import AWSAccount
+    from video.models import Media
 
-            media.duration = math.ceil(
-                job['OutputGroupDetails'][0]['OutputDetails'][0]['DurationInMs'] / 1000)
-            media.save()
-            return
+    aws_account = AWSAccount.objects.get(pk=aws_account_id) if aws_account_id else None
 
-        if status == 'ERROR':
-            media.to_processing_failed()
-            return
+    media_by_job_id = {
+        media.media_convert_job_id: media
+        for media in Media.objects
+        .select_related('organization__aws_account', 'channel')
+        .filter(organization__aws_account=aws_account_id,
+                state__in=(Media.State.QUEUED, Media.State.PROCESSING),
+                media_convert_job_id__isnull=False)
+    }
 
-        return check_job_status.apply_async(args=(video_id,), countdown=10)
-    except Exception:
-        check_job_status.retry()
+    if not media_by_job_id:
+        return
+
+    jobs = list_jobs(aws_account, media_by_job_id)
+    apply_jobs(media_by_job_id, jobs)
+
+    # Jobs older than the pages listed are checked one by one
+    for job_id in media_by_job_id.keys() - jobs.keys():
+        check_job_status.delay(media_by_job_id[job_id].video_id)
+
+
+def job_state_changed(message):
+    _job_state_changed.delay(message)
+
+
+@shared_task
+def _job_state_changed(message):
+    """
+    Update a media from the `detail` of a "MediaConvert Job State Change" event.
+    """
+    from video.models import Media
+
+    video_id = message.get('userMetadata', {}).get('video_id')
+    job_id = message.get('jobId')
+
+    # Job ids are only known by AWS and by us, so events of other jobs are ignored. Events
+    # are not ordered, so the ones arriving after the job finished are ignored too
+    media = job_id and Media.objects.select_related('organization__aws_account', 'channel') \
+        .filter(video_id=video_id, media_convert_job_id=job_id,
+                state__in=(Media.State.QUEUED, Media.State.PROCESSING)).first()
+
+    if not media:
+        return
+
+    status = message.get('status')
+    percent_complete = None
+    duration_in_ms = None
+
+    if status == 'STATUS_UPDATE':
+        status = 'PROGRESSING'
+        percent_complete = message.get('jobProgress', {}).get('jobPercentComplete')
+    elif status == 'COMPLETE':
+        duration_in_ms = message['outputGroupDetails'][0]['outputDetails'][0]['durationInMs']
+
+    try:
+        update_job_status(media, status, percent_complete, duration_in_ms)
+    except TransitionNotAllowed:
+        # Events are not ordered, and the polling may have applied it already
+        pass
+
+
+def is_job_events_topic(topic_arn):
+    """
+    Whether `topic_arn` is the job events topic of one of the AWS accounts.
+    """
+    from organization.models import AWSAccount
+
+    parts = (topic_arn or '').split(':')
+    if len(parts) != 6 or parts[:3] != ['arn', 'aws', 'sns'] or parts[5] != JOB_EVENTS_NAME:
+        return False
+
+    return AWSAccount.objects.filter(region=parts[3], account_id=parts[4]).exists()
+
+
+def job_events_service(aws_account):
+    """
+    Deliver the job state change events of an account to the media notify endpoint:
+    EventBridge rule -> SNS topic -> HTTPS subscription.
+    """
+    cloudwatchevents.put_job_state_rule(aws_account, JOB_EVENTS_NAME)
+    topic_arn = sns.create_account_topic(aws_account, JOB_EVENTS_NAME)
+    cloudwatchevents.put_job_state_targets(aws_account, JOB_EVENTS_NAME, topic_arn)
+
+    endpoint = f'{settings.BASE_URL}api/v1/videos/notify/'
+    sns.subscribe_endpoint(aws_account, topic_arn, endpoint)
@@ -1,10 +1,11 @@
-import boto3
 import re
 from celery import shared_task
 from django.conf import settings
 
+from configuration.cache import get_media_live_settings
 from organization.models import AWSAccount, Organization
 from utils import cloudwatchevents, sns
+from utils.aws import get_client
 from utils.s3 import delete_object
 
 CHANNEL_STATES_TO_DELETE = ["IDLE", "CREATE_FAILED"]
@@ -17,17 +18,7 @@ class ChannelNotFoundException(Exception):
 
 
 def get_media_live(aws_account):
-    if aws_account:
-        media_live = boto3.client(
-            "medialive",
-            aws_access_key_id=aws_account.access_key,
-            aws_secret_access_key=aws_account.secret_access_key,
-            region_name=aws_account.region,
-        )
-    else:
-        media_live = boto3.client("medialive")
-
-    return media_live
+    return get_client("medialive", aws_account)
 
 
 def create_input(live):
@@ -37,6 +28,8 @@ def create_input(live):
         Name=f"{live.video_id}",
         InputSecurityGroups=[input_security_group(media_live)],
         Destinations=[{"StreamName": f"live/{(live.video_id)}"}],
+        # Retries of the request return the same input
+        RequestId=f"{live.video_id}-input",
     )
 
     return response
@@ -46,28 +39,33 @@ def create_channel(live, source):
     organization = live.organization
 
     media_live = get_media_live(organization.aws_account)
-    # Get MediaLive video configuration
-    conf = organization.plan.medialive_configuration
+    # Get a copy of the MediaLive video configuration, patched for this live
+    conf = get_media_live_settings(organization.plan.medialive_configuration_id)
+    destination_settings = conf["destination_settings"]
+    source_settings = conf["source_settings"]
+    encoder_settings = conf["encoder_settings"]
 
-    conf.destination_settings["Settings"][0][
+    destination_settings["Settings"][0][
         "Url"
     ] = f"s3://{organization.bucket_name}/live/{live.video_id}/output"
-    conf.destination_settings["Id"] = organization.bucket_name
+    destination_settings["Id"] = organization.bucket_name
 
-    conf.source_settings["InputId"] = source["Input"]["Id"]
+    source_settings["InputId"] = source["Input"]["Id"]
 
-    conf.encoder_settings["OutputGroups"][0]["OutputGroupSettings"]["HlsGroupSettings"][
+    encoder_settings["OutputGroups"][0]["OutputGroupSettings"]["HlsGroupSettings"][
         "Destination"
     ]["DestinationRefId"] = organization.bucket_name
 
     response = media_live.create_channel(
         ChannelClass="SINGLE_PIPELINE",
-        Destinations=[conf.destination_settings],
-        InputAttachments=[conf.source_settings],
-        EncoderSettings=conf.encoder_settings,
+        Destinations=[destination_settings],
+        InputAttachments=[source_settings],
+        EncoderSettings=encoder_settings,
         Name=live.name,
         RoleArn=organization.aws_account.media_live_role,
         LogLevel="INFO",
+        # Retries of the request return the same channel
+        RequestId=f"{live.video_id}-channel",
     )
 
     return response
@@ -137,14 +135,15 @@ def delete_channels():
 
 
 def delete_channel(channel_id, account_id):
+    """
+    Start the deletion of a channel, it doesn't wait for the channel to be deleted.
+    """
     aws_account = AWSAccount.objects.get(account_id=account_id)
     media_live = get_media_live(aws_account)
     try:
-        waiter = media_live.get_waiter("channel_deleted")
         media_live.delete_channel(ChannelId=channel_id)
-        waiter.wait(ChannelId=channel_id)
-    except Exception as e:
-        raise Exception("Error deleting channel")
+    except media_live.exceptions.NotFoundException:
+        raise ChannelNotFoundException()
 
 
 @shared_task
@@ -176,11 +175,15 @@ def delete_inputs():
 
 
 def delete_input(input_id, account_id):
+    """
+    Delete an input. Inputs attached to a channel that is being deleted raise a
+    ConflictException until the channel is gone.
+    """
     media_live = get_media_live(AWSAccount.objects.get(account_id=account_id))
     try:
         media_live.delete_input(InputId=input_id)
-    except Exception as e:
-        raise Exception(f"Error deleting input ${input_id}")
+    except media_live.exceptions.NotFoundException:
+        pass
 
 
 @shared_task
@@ -251,15 +254,16 @@ def _add_channel_alert(message):
 
 
 def alert_service(live):
-    try:
-        cloudwatchevents.put_rule(live)
-        topic_arn = sns.create_topic(live)
+    """
+    Deliver the MediaLive alerts of the channel of `live` to the live videos notify endpoint.
+    Every call is idempotent, so it can be retried on errors.
+    """
+    cloudwatchevents.put_rule(live)
+    topic_arn = sns.create_topic(live)
 
-        live.sns_topic_arn = topic_arn
+    live.sns_topic_arn = topic_arn
 
-        cloudwatchevents.put_targets(live)
+    cloudwatchevents.put_targets(live)
 
-        endpoint = f"{settings.BASE_URL}api/v1/live-videos/notify/"
-        sns.subscribe(live, endpoint)
-    except Exception as ex:
-        print(f"Error: {ex}")
+    endpoint = f"{settings.BASE_URL}api/v1/live-videos/notify/"
+    sns.subscribe(live, endpoint)
@@ -1,37 +1,19 @@
-import boto3
 import hashlib
 import hmac
 import json
 import re
 import os
 from botocore.exceptions import BotoCoreError
+from utils.aws import get_client, get_resource
 from utils.cloudfront import get_cloudfront_client
 
 
 def get_s3_client(aws_account):
-    if aws_account:
-        s3 = boto3.client(
-            "s3",
-            aws_access_key_id=aws_account.access_key,
-            aws_secret_access_key=aws_account.secret_access_key,
-            region_name=aws_account.region,
-        )
-    else:
-        s3 = boto3.client("s3")
-    return s3
+    return get_client("s3", aws_account)
 
 
 def get_s3_resource(aws_account):
-    if aws_account:
-        s3 = boto3.resource(
-            "s3",
-            aws_access_key_id=aws_account.access_key,
-            aws_secret_access_key=aws_account.secret_access_key,
-            region_name=aws_account.region,
-        )
-    else:
-        s3 = boto3.resource("s3")
-    return s3
+    return get_resource("s3", aws_account)
 
 
 def get_put_presigned_s3_url(
@@ -41,20 +23,32 @@ def get_put_presigned_s3_url(
     Generate a Signed URL to put an object in a S3's bucket
     """
 
+    return get_put_presigned_s3_urls(
+        organization, [(path_to_file, content_type)], acl_policy
+    )[0]
+
+
+def get_put_presigned_s3_urls(organization, files, acl_policy="private"):
+    """
+    Generate the Signed URLs to put many objects in a S3's bucket, with a single client.
+    `files` is a list of (path_to_file, content_type) pairs.
+    """
+
     aws_account = organization.aws_account
     s3 = get_s3_client(aws_account)
 
-    url = s3.generate_presigned_url(
-        ClientMethod="put_object",
-        Params={
-            "Bucket": organization.bucket_name,
-            "Key": path_to_file,
-            "ContentType": content_type,
-            "ACL": acl_policy,
-        },
-    )
-
-    return url
+    return [
+        s3.generate_presigned_url(
+            ClientMethod="put_object",
+            Params={
+                "Bucket": organization.bucket_name,
+                "Key": path_to_file,
+                "ContentType": content_type,
+                "ACL": acl_policy,
+            },
+        )
+        for path_to_file, content_type in files
+    ]
 
 
 def generate_bucket_name(bucket_name):
@@ -88,7 +82,11 @@ def create_bucket(organization):
 
     """
     s3 = get_s3_client(organization.aws_account)
-    new_bucket = s3.create_bucket(Bucket=organization.bucket_name)
+    try:
+        s3.create_bucket(Bucket=organization.bucket_name)
+    except s3.exceptions.BucketAlreadyOwnedByYou:
+        # Created by a previous attempt, the configuration below is put again
+        pass
 
     # put CORS configuration
     cors_configuration = {
@@ -175,8 +173,6 @@ def create_bucket(organization):
         Bucket=organization.bucket_name, Policy=json.dumps(bucket_policy)
     )
 
-    return new_bucket
-
 
 def get_size(organization, bucket_name, prefix):
     s3 = get_s3_resource(organization.aws_account)
@@ -1,5 +1,7 @@
-import boto3
 import json
+from urllib.parse import parse_qs, urlparse
+
+from utils.aws import get_client
 
 
 class NotificationNotFoundException(Exception):
@@ -8,20 +10,17 @@ class NotificationNotFoundException(Exception):
 
 
 def get_sns(aws_account):
-    if aws_account:
-        sns = boto3.client('sns', aws_access_key_id=aws_account.access_key,
-                           aws_secret_access_key=aws_account.secret_access_key,
-                           region_name=aws_account.region)
-    else:
-        sns = boto3.client('sns')
-
-    return sns
+    return get_client('sns', aws_account)
 
 
 def create_topic(live):
-    sns = get_sns(live.organization.aws_account)
+    return create_account_topic(live.organization.aws_account, str(live.video_id))
 
-    response = sns.create_topic(Name=str(live.video_id))
+
+def create_account_topic(aws_account, name):
+    sns = get_sns(aws_account)
+
+    response = sns.create_topic(Name=name)
     topic_arn = response['TopicArn']
 
     attributes = sns.get_topic_attributes(TopicArn=topic_arn)
@@ -37,12 +36,14 @@ def create_topic(live):
         'Resource': topic_arn
     }
 
-    policy['Statement'].append(new_policy)
+    # create_topic returns the existing topic, so the statement may already be there
+    if new_policy['Sid'] not in [statement.get('Sid') for statement in policy['Statement']]:
+        policy['Statement'].append(new_policy)
 
-    # Allow eventbridge to publish messages
-    sns.set_topic_attributes(TopicArn=topic_arn,
-                             AttributeName='Policy',
-                             AttributeValue=json.dumps(policy))
+        # Allow eventbridge to publish messages
+        sns.set_topic_attributes(TopicArn=topic_arn,
+                                 AttributeName='Policy',
+                                 AttributeValue=json.dumps(policy))
 
     return topic_arn
 
@@ -53,9 +54,13 @@ def delete_topic(live):
 
 
 def subscribe(live, endpoint):
-    sns = get_sns(live.organization.aws_account)
+    return subscribe_endpoint(live.organization.aws_account, live.sns_topic_arn, endpoint)
 
-    response = sns.subscribe(TopicArn=live.sns_topic_arn,
+
+def subscribe_endpoint(aws_account, topic_arn, endpoint):
+    sns = get_sns(aws_account)
+
+    response = sns.subscribe(TopicArn=topic_arn,
                              Protocol='https',
                              Endpoint=endpoint,
                              ReturnSubscriptionArn=True)
@@ -64,6 +69,17 @@ def subscribe(live, endpoint):
     return response
 
 
+def is_subscribe_url(url, topic_arn):
+    """
+    Whether `url` confirms a subscription to `topic_arn`, on the SNS endpoint of its region.
+    """
+    region = topic_arn.split(':')[3]
+    url = urlparse(url)
+
+    return url.scheme == 'https' and url.hostname == f'sns.{region}.amazonaws.com' \
+        and parse_qs(url.query).get('TopicArn') == [topic_arn]
+
+
 def list_subscriptions_by_topic(live):
     sns = get_sns(live.organization.aws_account)
 
@@ -3,6 +3,7 @@ from django.forms import ModelForm, forms
 from django_fsm import TransitionNotAllowed
 
 from video.models import Tag, Media, LiveVideo, LiveVideoCut
+from video.tasks import start_bulk_transition
 
 
 class VideoForm(ModelForm):
@@ -50,14 +51,17 @@ class LiveVideoForm(ModelForm):
 
 
 # Videos status functions for VOD
+def start_video_bulk_transition(modeladmin, request, queryset, transition):
+    # Transcoding goes through AWS, so it runs in the background instead of in the request
+    videos = list(queryset.values_list('video_id', 'organization__aws_account_id'))
+    batch_id = start_bulk_transition(None, transition, videos)
+
+    modeladmin.message_user(request,
+                            f'The status of {len(videos)} videos is being changed in the background (batch {batch_id}).')
+
+
 def change_video_status_to_queued(modeladmin, request, queryset):
-    for video in queryset:
-        try:
-            video.to_queued()
-        except TransitionNotAllowed:
-            modeladmin.message_user(request,
-                                    f'The status of the video {video.name} cannot be changed to the one entered.',
-                                    level=messages.ERROR, )
+    start_video_bulk_transition(modeladmin, request, queryset, 'to_queued')
 
 
 def change_video_status_to_queued_failed(modeladmin, request, queryset):
@@ -101,13 +105,7 @@ def change_video_status_to_finished(modeladmin, request, queryset):
 
 
 def re_process_video(modeladmin, request, queryset):
-    for video in queryset:
-        try:
-            video.re_process()
-        except TransitionNotAllowed:
-            modeladmin.message_user(request,
-                                    f'The status of the video {video.name} cannot be changed to the one entered.',
-                                    level=messages.ERROR, )
+    start_video_bulk_transition(modeladmin, request, queryset, 're_process')
 
 
 # Videos status function for live videos
@@ -151,6 +149,16 @@ def change_live_video_status_to_stopping(modeladmin, request, queryset):
                                     level=messages.ERROR, )
 
 
+def re_provision_live_video(modeladmin, request, queryset):
+    for video in queryset:
+        try:
+            video.re_provision()
+        except TransitionNotAllowed:
+            modeladmin.message_user(request,
+                                    f'The live video {video.name} cannot be provisioned again.',
+                                    level=messages.ERROR, )
+
+
 # Videos status description for VOD
 change_video_status_to_queued.short_description = 'Change status to Queued'
 change_video_status_to_queued_failed.short_description = 'Change status to Queued (Failed)'
@@ -164,6 +172,7 @@ change_live_video_status_to_on.short_description = 'Change status to On'
 change_live_video_status_to_off.short_description = 'Change status to Off'
 change_live_video_status_to_starting.short_description = 'Change status to Starting'
 change_live_video_status_to_stopping.short_description = 'Change status to Stopping'
+re_provision_live_video.short_description = 'Re-provision live video'
 
 
 @admin.register(Media)
@@ -217,7 +226,12 @@ class VideoAdmin(admin.ModelAdmin):
             'video_id',
             'created_by',
             'state',
-            'created_at'
+            'created_at',
+            'media_convert_job_id',
+            'job_status',
+            'job_percent_complete',
+            'job_submitted_at',
+            'job_updated_at',
         ]
 
         if obj is not None:
@@ -259,7 +273,8 @@ class LiveVideoAdmin(admin.ModelAdmin):
         change_live_video_status_to_on,
         change_live_video_status_to_off,
         change_live_video_status_to_starting,
-        change_live_video_status_to_stopping
+        change_live_video_status_to_stopping,
+        re_provision_live_video
     ]
     form = LiveVideoForm
 
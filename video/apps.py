@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class VideoConfig(AppConfig):
     name = 'video'
+
+    def ready(self):
+        # Connect the dashboard cache invalidation receivers
+        from video import dashboard  # noqa
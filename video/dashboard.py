@@ -0,0 +1,37 @@
+"""
+Cache of the dashboard counters of an organization, see api.views.dashboard.
+
+The counters are cached per user under a version of the organization. Saving or deleting
+a media or a live video replaces the version, which drops the counters of every user of
+the organization at once. The entries left behind expire after DASHBOARD_CACHE_TIMEOUT.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from video.models import LiveVideo, Media
+
+DASHBOARD_KEY = 'dashboard:{}:{}:{}'
+VERSION_KEY = 'dashboard:{}'
+
+
+def get_dashboard_key(organization_id, user_id):
+    version = cache.get_or_set(VERSION_KEY.format(organization_id), lambda: uuid.uuid4().hex,
+                               None)
+
+    return DASHBOARD_KEY.format(organization_id, version, user_id)
+
+
+def invalidate_dashboard(organization_ids):
+    cache.delete_many([VERSION_KEY.format(organization_id)
+                       for organization_id in set(organization_ids)])
+
+
+@receiver(post_save, sender=Media, dispatch_uid='dashboard_media_saved')
+@receiver(post_save, sender=LiveVideo, dispatch_uid='dashboard_live_saved')
+@receiver(post_delete, sender=Media, dispatch_uid='dashboard_media_deleted')
+@receiver(post_delete, sender=LiveVideo, dispatch_uid='dashboard_live_deleted')
+def dashboard_video_changed_receiver(sender, instance, **kwargs):
+    invalidate_dashboard([instance.organization_id])
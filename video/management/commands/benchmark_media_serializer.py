@@ -0,0 +1,75 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ListSerializer
+
+from api.serializers import MediaSerializer
+from video.management.seed import seed
+from video.models import Media
+
+PAGE_SIZES = (30, 100, 500)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Seed a synthetic dataset and time the serialization of media list pages with ' \
+           'the default serializer fields and with MediaListSerializer. Nothing is persisted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.stdout.write('Seeding...')
+                organization = seed(organizations=1, media=max(PAGE_SIZES))[0]
+
+                self.benchmark(organization, options['repeat'])
+
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def benchmark(self, organization, repeat):
+        # Same queryset as MediaViewSet, fetched beforehand so only serialization is timed
+        media = list(Media.objects.select_related('organization', 'channel', 'created_by')
+                     .prefetch_related('tags').filter(organization_id=organization.pk)
+                     .order_by('-created_at', '-id')[:max(PAGE_SIZES)])
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            'Page size  Fields (us/row)  List serializer (us/row)'))
+
+        for page_size in PAGE_SIZES:
+            page = media[:page_size]
+
+            default = self.measure(lambda: ListSerializer(child=MediaSerializer(), instance=page),
+                                   repeat)
+            fast = self.measure(lambda: MediaSerializer(page, many=True), repeat)
+
+            if default[1] != fast[1]:
+                self.stderr.write(f'Outputs differ for a page of {page_size}')
+
+            self.stdout.write(f'{page_size:>9}{default[0] / page_size:>17.1f}'
+                              f'{fast[0] / page_size:>26.1f}')
+
+    @staticmethod
+    def measure(get_serializer, repeat):
+        """
+        Return the median time in microseconds to serialize and render a page, and
+        the rendered page.
+        """
+        renderer = JSONRenderer()
+        timings = []
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            content = renderer.render(get_serializer().data)
+            timings.append((time.perf_counter() - start) * 1000000)
+
+        return statistics.median(timings), content
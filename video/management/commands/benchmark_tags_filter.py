@@ -0,0 +1,78 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from video.management.seed import seed
+from video.models import Media, Tag
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Seed a synthetic dataset and time the `tags` filter of the media list with one ' \
+           'to `--max-tags` tags. Nothing is persisted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organizations', type=int, default=10)
+        parser.add_argument('--media', type=int, default=100000)
+        parser.add_argument('--max-tags', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('The tags filter is only available on PostgreSQL.')
+
+        try:
+            with transaction.atomic():
+                self.stdout.write('Seeding...')
+                organization = seed(organizations=options['organizations'],
+                                    media=options['media'])[0]
+
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+
+                self.benchmark(organization, options['max_tags'], options['repeat'])
+
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def benchmark(self, organization, max_tags, repeat):
+        media = Media.objects.filter(organization_id=organization.pk)
+        names = list(Tag.objects.filter(organization=organization)
+                     .order_by('name').values_list('name', flat=True)[:max_tags])
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            'Tags  Joins (all)  Names (all)  Names (any)   [ms, count + first page]'))
+
+        for number in range(1, len(names) + 1):
+            tags = names[:number]
+
+            joined = media
+            for tag in tags:
+                joined = joined.filter(tags__name=tag)
+
+            timings = [
+                self.measure(joined, repeat),
+                self.measure(media.filter(tag_names__contains=tags), repeat),
+                self.measure(media.filter(tag_names__overlap=tags), repeat),
+            ]
+
+            self.stdout.write(f'{number:>4}' + ''.join(f'{timing:>13.1f}' for timing in timings))
+
+    @staticmethod
+    def measure(queryset, repeat):
+        queryset = queryset.order_by('-created_at', '-id')
+        timings = []
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            queryset.count()
+            list(queryset[:30])
+            timings.append((time.perf_counter() - start) * 1000)
+
+        return statistics.median(timings)
@@ -0,0 +1,110 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from api.filters import TagNamesText
+from video.management.seed import seed
+from video.models import LiveVideo, LiveVideoCut, Media
+
+# Indexes added for the organization scoped query patterns
+INDEXES = (
+    'media_org_created_at_idx',
+    'media_org_active_state_idx',
+    'live_org_created_at_idx',
+    'live_ml_channel_arn_idx',
+    'cut_live_interval_idx',
+    'cut_scheduled_initial_idx',
+    'cut_executing_final_idx',
+    'media_video_id_trgm_idx',
+    'media_name_trgm_idx',
+    'media_tag_names_trgm_idx',
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Seed a synthetic dataset and print the query plans of the hot queries with and ' \
+           'without the composite/partial indexes. Nothing is persisted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organizations', type=int, default=10)
+        parser.add_argument('--media', type=int, default=100000)
+        parser.add_argument('--analyze', action='store_true',
+                            help='Run EXPLAIN ANALYZE instead of EXPLAIN')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Query plans are only meaningful on PostgreSQL.')
+
+        try:
+            with transaction.atomic():
+                self.stdout.write('Seeding...')
+                organization = seed(organizations=options['organizations'],
+                                    media=options['media'])[0]
+
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+
+                queries = self.get_queries(organization)
+
+                self.stdout.write(self.style.MIGRATE_HEADING('With indexes'))
+                self.explain(queries, options['analyze'])
+
+                with connection.cursor() as cursor:
+                    for index in INDEXES:
+                        cursor.execute(f'DROP INDEX IF EXISTS {index}')
+
+                self.stdout.write(self.style.MIGRATE_HEADING('Without indexes'))
+                self.explain(queries, options['analyze'])
+
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def explain(self, queries, analyze):
+        for title, queryset in queries:
+            self.stdout.write(self.style.SQL_KEYWORD(title))
+            self.stdout.write(queryset.explain(analyze=analyze))
+            self.stdout.write('')
+
+    @staticmethod
+    def get_queries(organization):
+        now = timezone.now()
+        media = Media.objects.filter(organization_id=organization.pk)
+        middle = media.order_by('-created_at')[media.count() // 2].created_at
+        live = LiveVideo.objects.filter(organization_id=organization.pk).first()
+
+        return [
+            ('Media list, first page',
+             media.order_by('-created_at', '-id')[:30]),
+            ('Media list, deep cursor page',
+             media.filter(created_at__lt=middle).order_by('-created_at', '-id')[:30]),
+            ('Media list, not finished filter',
+             media.filter(state__in=[Media.State.PROCESSING, Media.State.WAITING_FILE,
+                                     Media.State.QUEUED]).order_by('-created_at', '-id')[:30]),
+            ('Dashboard, failed media',
+             media.filter(state__in=[Media.State.QUEUING_FAILED,
+                                     Media.State.PROCESSING_FAILED]).values('id')),
+            ('Transcoding per channel, last month',
+             media.filter(created_at__gte=now - timedelta(days=30), created_at__lt=now)
+             .values('channel_id').order_by('channel_id')
+             .annotate(video_transcoding=Sum('duration', filter=Q(media_type='video')))),
+            ('Search by name, tags or partial video id',
+             media.annotate(search_tag_names=TagNamesText('tag_names'))
+             .filter(Q(video_id__icontains='abc1') | Q(name__icontains='abc1') |
+                     Q(search_tag_names__icontains='abc1'))),
+            ('Live video by MediaLive channel',
+             LiveVideo.objects.filter(ml_channel_arn=live.ml_channel_arn)),
+            ('Overlapping cuts',
+             LiveVideoCut.objects.filter(live=live, initial_time__lt=now + timedelta(hours=1),
+                                         final_time__gt=now)),
+            ('Cuts to start',
+             LiveVideoCut.objects.filter(state=LiveVideoCut.State.SCHEDULED,
+                                         initial_time__lte=now)),
+        ]
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from organization.models import AWSAccount
+from utils.mediaconvert import job_events_service
+
+
+class Command(BaseCommand):
+    help = 'Deliver the MediaConvert job state change events of every AWS account to the ' \
+           'media notify endpoint. Safe to run again, e.g. after adding an account.'
+
+    def handle(self, *args, **options):
+        for aws_account in AWSAccount.objects.all():
+            job_events_service(aws_account)
+            self.stdout.write(f'Job events delivered for {aws_account}')
@@ -0,0 +1,123 @@
+"""
+Synthetic data for the benchmark commands. Everything is created with `bulk_create`,
+so no signal handler (and no AWS call) is triggered. Callers are expected to run
+inside a transaction that is rolled back.
+"""
+import random
+import uuid
+from datetime import timedelta
+
+from django.utils import timezone
+
+from hub_auth.models import Account
+from organization.models import Channel, Organization
+from video.models import LiveVideo, LiveVideoCut, Media, Tag
+
+BATCH_SIZE = 5000
+
+# Most media of a real catalog is already transcoded
+STATE_WEIGHTS = (
+    (Media.State.FINISHED, 90),
+    (Media.State.WAITING_FILE, 3),
+    (Media.State.QUEUED, 2),
+    (Media.State.PROCESSING, 2),
+    (Media.State.QUEUING_FAILED, 1),
+    (Media.State.PROCESSING_FAILED, 2),
+)
+
+
+def seed(organizations=10, media=100000, channels=5, tags=50, live_videos=20, cuts=50,
+         seed_value=0):
+    """
+    Create `organizations` organizations and spread the rest of the objects between
+    them. Return the list of created organizations.
+    """
+    rand = random.Random(seed_value)
+    prefix = uuid.uuid4().hex[:8]
+    now = timezone.now()
+
+    orgs = Organization.objects.bulk_create([
+        Organization(name=f'benchmark-{prefix}-{number}', bucket_name=f'benchmark-{number}',
+                     plan=None)
+        for number in range(organizations)
+    ])
+
+    accounts = Account.objects.bulk_create([
+        Account(username=f'benchmark-{prefix}-{org.pk}', organization=org) for org in orgs
+    ])
+
+    org_channels = {
+        org.pk: Channel.objects.bulk_create([
+            Channel(organization=org, name=f'Channel {number}',
+                    cf_domain=f'{prefix}{number}.cloudfront.net')
+            for number in range(channels)
+        ])
+        for org in orgs
+    }
+
+    org_tags = {
+        org.pk: Tag.objects.bulk_create([
+            Tag(organization=org, name=f'Tag {number}') for number in range(tags)
+        ])
+        for org in orgs
+    }
+
+    states, weights = zip(*STATE_WEIGHTS)
+    media_per_org = media // organizations
+    through = []
+
+    for org, account in zip(orgs, accounts):
+        batch = []
+        for number in range(media_per_org):
+            tags_sample = rand.sample(org_tags[org.pk], rand.randint(0, min(3, tags)))
+            batch.append((Media(
+                name=f'Media {number}',
+                organization=org,
+                channel=rand.choice(org_channels[org.pk]),
+                created_by=account if rand.random() < 0.5 else None,
+                state=rand.choices(states, weights)[0],
+                media_type='video' if rand.random() < 0.8 else 'audio',
+                created_at=now - timedelta(seconds=rand.randint(0, 3 * 365 * 24 * 3600)),
+                duration=rand.randint(10, 3600),
+                storage=rand.randint(10 ** 6, 10 ** 9),
+                tag_names=sorted(tag.name for tag in tags_sample),
+            ), tags_sample))
+
+            if len(batch) == BATCH_SIZE:
+                through += _create_media(batch)
+                batch = []
+
+        if batch:
+            through += _create_media(batch)
+
+    for start in range(0, len(through), BATCH_SIZE):
+        Media.tags.through.objects.bulk_create(through[start:start + BATCH_SIZE])
+
+    for org, account in zip(orgs, accounts):
+        lives = LiveVideo.objects.bulk_create([
+            LiveVideo(name=f'Live {number}', organization=org, created_by=account,
+                      channel=rand.choice(org_channels[org.pk]),
+                      ml_channel_arn=f'arn:aws:medialive:us-east-1:0:channel:{prefix}{org.pk}{number}')
+            for number in range(live_videos)
+        ])
+
+        LiveVideoCut.objects.bulk_create([
+            LiveVideoCut(live=live, created_by=account,
+                         state=LiveVideoCut.State.PERFORMED if number < cuts - 2 else
+                         LiveVideoCut.State.SCHEDULED,
+                         initial_time=now + timedelta(hours=number - cuts + 2),
+                         final_time=now + timedelta(hours=number - cuts + 2, minutes=30))
+            for live in lives for number in range(cuts)
+        ])
+
+    return orgs
+
+
+def _create_media(batch):
+    """
+    Create the media of `batch`, a list of (media, tags) tuples, and return the rows
+    of the tags relation to create.
+    """
+    media = Media.objects.bulk_create([item for item, _ in batch])
+    return [Media.tags.through(media_id=item.pk, tag_id=tag.pk)
+            for item, (_, tags_sample) in zip(media, batch) for tag in tags_sample]
@@ -0,0 +1,21 @@
+# Generated by Django 2.1.5 on 2026-10-18 13:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='livevideo',
+            index=models.Index(fields=['organization', '-created_at', '-id'], name='live_org_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='media',
+            index=models.Index(fields=['organization', '-created_at', '-id'], name='media_org_created_at_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 2.1.5 on 2026-10-18 13:27
+
+from django.db import migrations, models
+
+# Partial indexes can't be declared in Meta.indexes before Django 2.2
+PARTIAL_INDEXES = [
+    # Media that is still being uploaded, transcoded or failed: dashboard counters, the
+    # `not_finished`/`failed` filters and the job status checks. Finished media is the
+    # bulk of the table and is left out.
+    ('media_org_active_state_idx', 'video_media', '(organization_id, state)',
+     "state <> 'finished'"),
+    # Cuts to start and to finish, polled by `check_live_cuts`
+    ('cut_scheduled_initial_idx', 'video_livevideocut', '(initial_time)',
+     "state = 'scheduled'"),
+    ('cut_executing_final_idx', 'video_livevideocut', '(final_time)',
+     "state = 'executing'"),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video', '0002_created_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='livevideo',
+            index=models.Index(fields=['ml_channel_arn'], name='live_ml_channel_arn_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='livevideocut',
+            index=models.Index(fields=['live', 'initial_time', 'final_time'], name='cut_live_interval_idx'),
+        ),
+    ] + [
+        migrations.RunSQL(
+            f'CREATE INDEX {name} ON {table} {columns} WHERE {condition};',
+            reverse_sql=f'DROP INDEX {name};'
+        )
+        for name, table, columns, condition in PARTIAL_INDEXES
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 2.1.5 on 2026-10-18 15:02
+
+import django.contrib.postgres.fields
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+# `array_to_string` is only STABLE, so it's wrapped to be usable in an index expression
+TAG_NAMES_TEXT_FUNCTION = """
+CREATE FUNCTION video_tag_names_text(varchar[]) RETURNS text
+    AS $$ SELECT array_to_string($1, ' ') $$
+    LANGUAGE sql IMMUTABLE;
+"""
+
+# Expressions match the SQL of the `icontains` lookups built by api.filters.VideoSearchFilter
+TRIGRAM_INDEXES = [
+    ('media_video_id_trgm_idx', 'video_media', 'UPPER(video_id::text)'),
+    ('media_name_trgm_idx', 'video_media', 'UPPER(name::text)'),
+    ('media_tag_names_trgm_idx', 'video_media', 'UPPER(video_tag_names_text(tag_names))'),
+    ('live_video_id_trgm_idx', 'video_livevideo', 'UPPER(video_id::text)'),
+    ('live_name_trgm_idx', 'video_livevideo', 'UPPER(name::text)'),
+    ('live_tag_names_trgm_idx', 'video_livevideo', 'UPPER(video_tag_names_text(tag_names))'),
+]
+
+BACKFILL = """
+UPDATE {table} SET tag_names = ARRAY(
+    SELECT t.name FROM video_tag t
+    INNER JOIN {through} r ON r.tag_id = t.id
+    WHERE r.{column} = {table}.id ORDER BY t.name
+);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video', '0003_query_pattern_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='livevideo',
+            name='tag_names',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=254), blank=True, default=list, editable=False, size=None, verbose_name='Tag names'),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='tag_names',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=254), blank=True, default=list, editable=False, size=None, verbose_name='Tag names'),
+        ),
+        migrations.RunSQL(
+            BACKFILL.format(table='video_media', through='video_media_tags', column='media_id'),
+            reverse_sql=migrations.RunSQL.noop
+        ),
+        migrations.RunSQL(
+            BACKFILL.format(table='video_livevideo', through='video_livevideo_tags',
+                            column='livevideo_id'),
+            reverse_sql=migrations.RunSQL.noop
+        ),
+        migrations.RunSQL(
+            TAG_NAMES_TEXT_FUNCTION,
+            reverse_sql='DROP FUNCTION video_tag_names_text(varchar[]);'
+        ),
+    ] + [
+        migrations.RunSQL(
+            f'CREATE INDEX {name} ON {table} USING gin ({expression} gin_trgm_ops);',
+            reverse_sql=f'DROP INDEX {name};'
+        )
+        for name, table, expression in TRIGRAM_INDEXES
+    ]
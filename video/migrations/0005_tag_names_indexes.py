@@ -0,0 +1,22 @@
+# Generated by Django 2.1.5 on 2026-10-18 13:48
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video', '0004_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='livevideo',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tag_names'], name='live_tag_names_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='media',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tag_names'], name='media_tag_names_idx'),
+        ),
+    ]
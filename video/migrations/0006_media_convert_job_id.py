@@ -0,0 +1,59 @@
+# Generated by Django 2.1.5 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+# Job ids are moved out of the `metadata` JSON text
+BACKFILL = """
+UPDATE video_media SET
+    media_convert_job_id = metadata::jsonb ->> 'media_convert_job_id',
+    metadata = (metadata::jsonb - 'media_convert_job_id')::text
+WHERE metadata LIKE '%"media_convert_job_id"%';
+"""
+
+REVERSE_BACKFILL = """
+UPDATE video_media SET
+    metadata = jsonb_set(metadata::jsonb, '{media_convert_job_id}',
+                         to_jsonb(media_convert_job_id))::text
+WHERE media_convert_job_id IS NOT NULL;
+"""
+
+RECONCILE_TASK_NAME = 'Reconcile MediaConvert Jobs'
+# Seconds, later changes are made on the periodic task
+RECONCILE_INTERVAL = 300
+
+
+def create_reconcile_task(apps, schema_editor):
+    IntervalSchedule = apps.get_model('django_celery_beat', 'IntervalSchedule')
+    PeriodicTask = apps.get_model('django_celery_beat', 'PeriodicTask')
+
+    interval, _ = IntervalSchedule.objects.get_or_create(
+        every=RECONCILE_INTERVAL,
+        period='seconds',
+    )
+    PeriodicTask.objects.get_or_create(
+        name=RECONCILE_TASK_NAME,
+        defaults={'task': 'utils.mediaconvert.reconcile_jobs', 'interval': interval},
+    )
+
+
+def delete_reconcile_task(apps, schema_editor):
+    PeriodicTask = apps.get_model('django_celery_beat', 'PeriodicTask')
+    PeriodicTask.objects.filter(name=RECONCILE_TASK_NAME).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_celery_beat', '0001_initial'),
+        ('video', '0005_tag_names_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='media_convert_job_id',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, null=True, verbose_name='MediaConvert job ID'),
+        ),
+        migrations.RunSQL(BACKFILL, reverse_sql=REVERSE_BACKFILL),
+        migrations.RunPython(create_reconcile_task, delete_reconcile_task),
+    ]
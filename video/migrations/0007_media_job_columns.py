@@ -0,0 +1,58 @@
+# Generated by Django 2.1.5 on 2026-10-18 14:13
+
+from django.db import migrations, models
+
+# Progress is moved out of the `metadata` JSON text, and the last job status is inferred
+# from the state of the media
+BACKFILL = """
+UPDATE video_media SET
+    job_percent_complete = round((metadata::jsonb ->> 'job_percent_complete')::numeric),
+    metadata = (metadata::jsonb - 'job_percent_complete')::text
+WHERE metadata LIKE '%"job_percent_complete"%';
+
+UPDATE video_media SET job_status = CASE state
+    WHEN 'queued' THEN 'SUBMITTED'
+    WHEN 'processing' THEN 'PROGRESSING'
+    WHEN 'processing_failed' THEN 'ERROR'
+    WHEN 'finished' THEN 'COMPLETE'
+END
+WHERE media_convert_job_id IS NOT NULL;
+"""
+
+REVERSE_BACKFILL = """
+UPDATE video_media SET
+    metadata = jsonb_set(metadata::jsonb, '{job_percent_complete}',
+                         to_jsonb(job_percent_complete))::text
+WHERE job_percent_complete IS NOT NULL;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video', '0006_media_convert_job_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='job_percent_complete',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, verbose_name='Job percent complete'),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='job_status',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=16, null=True, verbose_name='Job status'),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='job_submitted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Job submitted'),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='job_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Job updated'),
+        ),
+        migrations.RunSQL(BACKFILL, reverse_sql=REVERSE_BACKFILL),
+    ]
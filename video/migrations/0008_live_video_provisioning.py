@@ -0,0 +1,25 @@
+# Generated by Django 2.1.5 on 2026-10-18 14:24
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django_fsm
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video', '0007_media_job_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='livevideo',
+            name='provisioned_steps',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=20), blank=True, default=list, editable=False, size=None, verbose_name='Provisioned steps'),
+        ),
+        migrations.AlterField(
+            model_name='livevideo',
+            name='state',
+            field=django_fsm.FSMField(choices=[('off', 'off'), ('on', 'on'), ('starting', 'starting'), ('stopping', 'stopping'), ('provisioning', 'provisioning'), ('provisioning_failed', 'provisioning_failed')], default='provisioning', max_length=50, protected=True, verbose_name='Live Video state'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.1.5 on 2026-10-18 14:26
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('video', '0008_live_video_provisioning'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='livevideo',
+            name='teardown_steps',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=20), blank=True, default=list, editable=False, size=None, verbose_name='Teardown steps'),
+        ),
+    ]
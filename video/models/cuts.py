@@ -53,6 +53,13 @@ class LiveVideoCut(models.Model):
     class Meta:
         verbose_name = 'Live Video Cut'
         verbose_name_plural = 'Live Video Cuts'
+        indexes = [
+            # Overlapping cuts validation
+            models.Index(fields=['live', 'initial_time', 'final_time'],
+                         name='cut_live_interval_idx'),
+        ]
+        # Partial indexes for the cuts polled by `check_live_cuts` are created in
+        # migration 0003_query_pattern_indexes
 
     @transition(field=state, source=State.SCHEDULED, target=State.EXECUTING)
     def _to_executing(self):
@@ -1,10 +1,10 @@
 import sys
-import time
 import uuid
 
 from django.contrib.postgres.fields import ArrayField
-from django.db import models
-from django.db.models.signals import post_save, pre_delete, pre_save, post_delete
+from django.contrib.postgres.indexes import GinIndex
+from django.db import models, transaction
+from django.db.models.signals import m2m_changed, post_save, pre_delete, pre_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from django_fsm import FSMField, transition
@@ -12,8 +12,9 @@ from video.signals import cloudfront_deleted
 from hub_auth.models import Account
 from jsonfield import JSONField
 from organization.models import Channel, Organization
-from utils import cloudfront, medialive, cloudwatchevents, sns, cloudwatchlogs
+from utils import cloudfront, medialive, cloudwatchlogs
 from . import Tag
+from .tag import tags_changed
 
 class LiveVideo(models.Model):
     '''
@@ -27,12 +28,16 @@ class LiveVideo(models.Model):
         STOPPING = 'stopping'
         WAITING_INPUT = 'waiting_input'
         DELETING = 'deleting'
+        PROVISIONING = 'provisioning'
+        PROVISIONING_FAILED = 'provisioning_failed'
 
         CHOICES = (
             (OFF, OFF),
             (ON, ON),
             (STARTING, STARTING),
-            (STOPPING, STOPPING)
+            (STOPPING, STOPPING),
+            (PROVISIONING, PROVISIONING),
+            (PROVISIONING_FAILED, PROVISIONING_FAILED)
         )
 
     class GeoType:
@@ -80,11 +85,31 @@ class LiveVideo(models.Model):
                                   verbose_name='Tags',
                                   blank=True)
 
-    state = FSMField(default=State.OFF,
+    # Denormalized names of `tags`, used by the search
+    tag_names = ArrayField(models.CharField(max_length=254),
+                           default=list,
+                           blank=True,
+                           editable=False,
+                           verbose_name='Tag names')
+
+    # AWS resources of new live videos are created in the background, see video.provisioning
+    state = FSMField(default=State.PROVISIONING,
                      verbose_name='Live Video state',
                      choices=State.CHOICES,
                      protected=True)
 
+    provisioned_steps = ArrayField(models.CharField(max_length=20),
+                                   default=list,
+                                   blank=True,
+                                   editable=False,
+                                   verbose_name='Provisioned steps')
+
+    teardown_steps = ArrayField(models.CharField(max_length=20),
+                                default=list,
+                                blank=True,
+                                editable=False,
+                                verbose_name='Teardown steps')
+
     input_state = ArrayField(models.CharField(max_length=255,
                                               default='',
                                               verbose_name='Origin state'),
@@ -174,6 +199,16 @@ class LiveVideo(models.Model):
     class Meta:
         verbose_name = 'Live Video'
         verbose_name_plural = 'Live Videos'
+        indexes = [
+            # Newest first listings of an organization (keyset pagination)
+            models.Index(fields=['organization', '-created_at', '-id'],
+                         name='live_org_created_at_idx'),
+            # MediaLive alerts and channel clean up look lives up by channel arn
+            models.Index(fields=['ml_channel_arn'], name='live_ml_channel_arn_idx'),
+            # `tags` filter, by containment or overlap of the tag names
+            GinIndex(fields=['tag_names'], name='live_tag_names_idx'),
+        ]
+        # The trigram indexes used by the search are created in migration 0004_search
 
     @transition(field=state, source=[State.STOPPING], target=State.OFF)
     def _to_off(self):
@@ -195,9 +230,39 @@ class LiveVideo(models.Model):
     def _to_stopping(self):
         pass
 
-    @transition(field=state, source=[State.OFF], target=State.DELETING)
+    # Deleting again resumes a teardown that failed
+    @transition(field=state, source=[State.OFF, State.PROVISIONING_FAILED, State.DELETING],
+                target=State.DELETING)
     def _to_deleting(self):
         pass
+
+    @transition(field=state, source=[State.PROVISIONING], target=State.OFF)
+    def _to_provisioned(self):
+        pass
+
+    @transition(field=state, source=[State.PROVISIONING], target=State.PROVISIONING_FAILED)
+    def _to_provisioning_failed(self):
+        pass
+
+    @transition(field=state, source=[State.PROVISIONING_FAILED], target=State.PROVISIONING)
+    def _re_provision(self):
+        pass
+
+    def to_provisioned(self):
+        self._to_provisioned()
+        self.save()
+
+    def to_provisioning_failed(self):
+        self._to_provisioning_failed()
+        self.save()
+
+    def re_provision(self):
+        from video.provisioning import start_live_provisioning
+
+        self._re_provision()
+        self.save()
+        # The steps already provisioned are skipped
+        transaction.on_commit(lambda: start_live_provisioning(self.pk))
     
     def to_starting(self):
         self._to_starting()
@@ -224,24 +289,13 @@ class LiveVideo(models.Model):
         self.save()
     
     def to_deleting(self):
+        from video.provisioning import start_live_teardown
+
         self._to_deleting()
         self.save()
-        channel_id = self.ml_channel_arn.split(':')[-1]    
-        account_id = self.organization.aws_account.account_id
-        video_id = self.video_id
-        try:
-            medialive.delete_channel(channel_id, account_id)
-        except medialive.ChannelNotFoundException:
-            pass
-        finally:
-            medialive.delete_input(self.ml_input_id,account_id)
-        cloudfront.update_distribution(self.organization, self.cf_id, False)
-        cloudwatchevents.remove_targets(self)
-        cloudwatchevents.delete_rule(self)
-        sns.unsubscribe_all(self)
-        sns.delete_topic(self)
-        cloudfront._delete_cloudfront_distribution.delay(self.cf_id, account_id, video_id)
-           
+        # The AWS resources are deleted in the background, and the live video at the end
+        transaction.on_commit(lambda: start_live_teardown(self.pk))
+
 
 @receiver(pre_save, sender=LiveVideo, dispatch_uid='validate_save_fields')
 def live_pre_save_receiver(sender, instance, **kwargs):
@@ -254,41 +308,11 @@ def live_video_post_save_receiver(sender, instance, created, **kwargs):
         return
 
     if created:
-        # Create input
-        input = medialive.create_input(instance)
-        channel = medialive.create_channel(instance, input)
-
-        instance.ml_input_id = input['Input']['Id']
-        instance.ml_input_url = input['Input']['Destinations'][0]['Url']
-        instance.ml_channel_arn = channel['Channel']['Arn']
-
-        medialive.alert_service(instance)
-
-        bucket_name = instance.organization.bucket_name
-
-        """
-                define custom settings for CloudFront creation
-                  -id: origin id
-                  -domain: S3 bucker domain
-                  -target: origin Id
-                  -caller: operation unique identificator (in this case integer timestamp)
-        """
-
-        cf_settings = {
-            'id': bucket_name,
-            'domain': f"{bucket_name}.s3.amazonaws.com",
-            'path': f"/live/{instance.video_id}",
-            'target': bucket_name,
-            'caller': str(time.time()),
-            'defaultTTL': 5,
-            'maxTTL': 10,
-        }
-        new_distribution = cloudfront.create_distribution(cf_settings, instance.organization, instance.channel)
-
-        instance.cf_id = new_distribution['cf_id']
-        instance.cf_domain = new_distribution['cf_domain']
-
-        instance.save()
+        from video.provisioning import start_live_provisioning
+
+        # The AWS resources are created in the background, once the live video is committed
+        if instance.state == LiveVideo.State.PROVISIONING:
+            transaction.on_commit(lambda: start_live_provisioning(instance.pk))
 
     # Executed only if geoblocking options are updated
     elif instance._old_geolocation_type != instance.geolocation_type or \
@@ -308,3 +332,8 @@ def handle_cloudfront_deleted(sender, video_id, **kwargs):
         live.delete()
     except live.DoesNotExist:
         pass  # Handle the case where the object doesn't exist
+
+
+@receiver(m2m_changed, sender=LiveVideo.tags.through, dispatch_uid='live_tag_names')
+def live_tags_changed_receiver(sender, **kwargs):
+    tags_changed(sender, **kwargs)
@@ -1,7 +1,9 @@
 import sys
 import uuid
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
-from django.db.models.signals import pre_delete
+from django.db.models.signals import m2m_changed, pre_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from django_fsm import FSMField, transition
@@ -11,6 +13,7 @@ from jsonfield import JSONField
 from organization.models import Channel, Organization
 from utils import cloudfront, mediaconvert, s3
 from . import Tag
+from .tag import tags_changed
 
 
 class Media(models.Model):
@@ -73,6 +76,13 @@ class Media(models.Model):
                                   verbose_name='Tags',
                                   blank=True)
 
+    # Denormalized names of `tags`, used by the search
+    tag_names = ArrayField(models.CharField(max_length=254),
+                           default=list,
+                           blank=True,
+                           editable=False,
+                           verbose_name='Tag names')
+
     state = FSMField(default=State.WAITING_FILE,
                      verbose_name='Video State',
                      choices=State.CHOICES,
@@ -83,6 +93,37 @@ class Media(models.Model):
         verbose_name='Metadata'
     )
 
+    # Indexed, so the jobs listed by the reconciler are matched to their media in one query
+    media_convert_job_id = models.CharField(max_length=64,
+                                            null=True,
+                                            blank=True,
+                                            db_index=True,
+                                            editable=False,
+                                            verbose_name='MediaConvert job ID')
+
+    # Last status of the job, as reported by MediaConvert (SUBMITTED, PROGRESSING, ...)
+    job_status = models.CharField(max_length=16,
+                                  null=True,
+                                  blank=True,
+                                  db_index=True,
+                                  editable=False,
+                                  verbose_name='Job status')
+
+    job_percent_complete = models.PositiveSmallIntegerField(null=True,
+                                                            blank=True,
+                                                            editable=False,
+                                                            verbose_name='Job percent complete')
+
+    job_submitted_at = models.DateTimeField(null=True,
+                                            blank=True,
+                                            editable=False,
+                                            verbose_name='Job submitted')
+
+    job_updated_at = models.DateTimeField(null=True,
+                                          blank=True,
+                                          editable=False,
+                                          verbose_name='Job updated')
+
     ads_vast_url = models.URLField(
         blank=True,
         null=True,
@@ -132,6 +173,16 @@ class Media(models.Model):
     class Meta:
         verbose_name = 'Content'
         verbose_name_plural = 'Contents'
+        indexes = [
+            # Newest first listings of an organization (keyset pagination)
+            models.Index(fields=['organization', '-created_at', '-id'],
+                         name='media_org_created_at_idx'),
+            # `tags` filter, by containment or overlap of the tag names
+            GinIndex(fields=['tag_names'], name='media_tag_names_idx'),
+        ]
+        # Partial index on (organization, state) for the non finished states is created
+        # in migration 0003_query_pattern_indexes, and the trigram indexes used by the
+        # search in 0004_search
 
     def get_urls(self):
         channel = self.channel
@@ -139,23 +190,30 @@ class Media(models.Model):
         # Hacky patch. Don't know how you'd get into this state!
         if channel is None:
             return "", "", ""
-        
+
+        return self.build_urls(channel.cf_domain, self.video_id, self.media_type,
+                               self.has_thumbnail)
+
+    @staticmethod
+    def build_urls(cf_domain, video_id, media_type, has_thumbnail):
+        """
+        Build the (poster_url, media_url, mime_type) tuple from raw column values,
+        so callers that fetched them with `values()` don't need a Media instance.
+        """
         media_url = ''
 
         # Default mime type for video
         mime_type = 'application/x-mpegURL'
-        poster_url = ''
 
-        if self.media_type == 'video':
-            media_url = f'https://{channel.cf_domain}/{self.video_id}/hls/output.m3u8'
-            poster_url = f'https://{channel.cf_domain}/{self.video_id}/thumbs/thumb_high.0000000.jpg'
+        if media_type == 'video':
+            media_url = f'https://{cf_domain}/{video_id}/hls/output.m3u8'
 
-        elif self.media_type == 'audio':
-            media_url = f'https://{channel.cf_domain}/{self.video_id}/audio/output.mp4'
+        elif media_type == 'audio':
+            media_url = f'https://{cf_domain}/{video_id}/audio/output.mp4'
             mime_type = 'audio/mp4'
 
-        thumb_path = 'thumb.jpg' if self.has_thumbnail else 'thumbs/thumb_high.0000000.jpg'
-        poster_url = f'https://{channel.cf_domain}/{self.video_id}/{thumb_path}'
+        thumb_path = 'thumb.jpg' if has_thumbnail else 'thumbs/thumb_high.0000000.jpg'
+        poster_url = f'https://{cf_domain}/{video_id}/{thumb_path}'
 
         return poster_url, media_url, mime_type
 
@@ -237,3 +295,8 @@ def video_pre_delete_receiver(sender, instance, **kwargs):
     key = instance.video_id
 
     s3.delete_object(instance.organization.bucket_name, key, instance.organization.aws_account)
+
+
+@receiver(m2m_changed, sender=Media.tags.through, dispatch_uid='media_tag_names')
+def media_tags_changed_receiver(sender, **kwargs):
+    tags_changed(sender, **kwargs)
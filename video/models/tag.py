@@ -1,4 +1,8 @@
+from django.contrib.postgres.fields import ArrayField
 from django.db import models
+from django.db.models import OuterRef, Subquery
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
 
 from organization.models import Channel, Organization
 
@@ -19,3 +23,63 @@ class Tag(models.Model):
         verbose_name = 'Tag'
         verbose_name_plural = 'Tags'
         unique_together = [['name', 'organization']]
+
+
+def update_tag_names(queryset):
+    """
+    Recompute the denormalized `tag_names` of the Media or LiveVideo in `queryset`
+    with a single UPDATE.
+    """
+    related_name = queryset.model.tags.field.related_query_name()
+    tag_names = Subquery(
+        Tag.objects.filter(**{related_name: OuterRef('pk')}).order_by('name').values('name'),
+        template='ARRAY(%(subquery)s)',
+        output_field=ArrayField(models.CharField())
+    )
+
+    return queryset.update(tag_names=tag_names)
+
+
+def tags_changed(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """
+    `m2m_changed` handler of the video tags, connected by the Media and LiveVideo models.
+    """
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            update_tag_names(type(instance).objects.filter(pk=instance.pk))
+        return
+
+    # Changed from the Tag side, so `model` is the video model
+    related_name = model.tags.field.related_query_name()
+
+    if action == 'pre_clear':
+        instance._tag_names_video_pks = list(
+            getattr(instance, related_name).values_list('pk', flat=True))
+    elif action == 'post_clear':
+        update_tag_names(model.objects.filter(pk__in=instance._tag_names_video_pks))
+    elif action in ('post_add', 'post_remove'):
+        update_tag_names(model.objects.filter(pk__in=pk_set))
+
+
+@receiver(post_save, sender=Tag, dispatch_uid='tag_names_tag_saved')
+def tag_saved_receiver(sender, instance, created, **kwargs):
+    if created:
+        return
+
+    update_tag_names(instance.media.all())
+    update_tag_names(instance.live_videos.all())
+
+
+@receiver(pre_delete, sender=Tag, dispatch_uid='tag_names_tag_pre_delete')
+def tag_pre_delete_receiver(sender, instance, **kwargs):
+    # The through rows are deleted without m2m_changed, so the videos are kept to update them
+    instance._tag_names_querysets = [
+        related.model.objects.filter(pk__in=list(related.values_list('pk', flat=True)))
+        for related in (instance.media, instance.live_videos)
+    ]
+
+
+@receiver(post_delete, sender=Tag, dispatch_uid='tag_names_tag_deleted')
+def tag_deleted_receiver(sender, instance, **kwargs):
+    for queryset in getattr(instance, '_tag_names_querysets', []):
+        update_tag_names(queryset)
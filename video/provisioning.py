@@ -0,0 +1,320 @@
+"""
+Provisioning and teardown of the AWS resources of live videos, run in the background.
+
+A new live video starts in the `provisioning` state and a Celery chord creates its
+resources: the MediaLive input, channel and alerts one after the other and, at the same
+time, the CloudFront distribution. Each step stores what it created together with its
+name in `provisioned_steps`, and the AWS requests use idempotency tokens, so retries of a
+step and re-provisioning of a failed live video don't create anything twice.
+
+Deleting a live video works the same way in the `deleting` state: the MediaLive channel
+and input, the EventBridge rule, the SNS topic and the distribution are removed by
+independent branches, and each step is recorded in `teardown_steps`, so a failed teardown
+resumes where it stopped. The live video is deleted with its distribution at the end.
+"""
+import logging
+
+from celery import chain, chord, shared_task
+from django.conf import settings
+from django.db import transaction
+from django_fsm import TransitionNotAllowed
+
+from utils import cloudfront, cloudwatchevents, medialive, sns
+from video.models import LiveVideo
+
+logger = logging.getLogger(__name__)
+
+INPUT = 'input'
+CHANNEL = 'channel'
+ALERTS = 'alerts'
+DISTRIBUTION = 'distribution'
+
+STEPS = (INPUT, CHANNEL, ALERTS, DISTRIBUTION)
+
+RULE_TARGETS = 'rule_targets'
+RULE = 'rule'
+TOPIC = 'topic'
+
+TEARDOWN_STEPS = (CHANNEL, INPUT, RULE_TARGETS, RULE, TOPIC, DISTRIBUTION)
+
+
+def start_live_provisioning(live_id):
+    """
+    Enqueue the provisioning of a live video.
+    """
+    chord(
+        [
+            chain(provision_input.si(live_id),
+                  provision_channel.si(live_id),
+                  provision_alerts.si(live_id)),
+            provision_distribution.si(live_id),
+        ],
+        finish_live_provisioning.si(live_id)
+    ).apply_async()
+
+
+def start_live_teardown(live_id):
+    """
+    Enqueue the teardown of a live video, the steps already done are skipped.
+    """
+    chord(
+        [
+            chain(delete_live_channel.si(live_id), delete_live_input.si(live_id)),
+            chain(delete_live_rule_targets.si(live_id), delete_live_rule.si(live_id)),
+            delete_live_topic.si(live_id),
+            disable_live_distribution.si(live_id),
+        ],
+        finish_live_teardown.si(live_id)
+    ).apply_async()
+
+
+def get_provisioning_progress(live):
+    """
+    :return: percentage of the provisioning steps done for `live`
+    """
+    if live.state not in (LiveVideo.State.PROVISIONING, LiveVideo.State.PROVISIONING_FAILED):
+        return 100
+
+    return 100 * len(set(live.provisioned_steps) & set(STEPS)) // len(STEPS)
+
+
+def _get_live(live_id):
+    return LiveVideo.objects.select_related('organization__aws_account',
+                                            'organization__plan',
+                                            'channel').get(pk=live_id)
+
+
+def _run_step(task, live_id, step, run, state=LiveVideo.State.PROVISIONING,
+              steps_field='provisioned_steps', on_failure=None, max_retry_delay=None):
+    """
+    Run `run`, which does `step` and returns the fields to store, unless the live video
+    left `state` or the step is recorded in `steps_field`. Errors are retried, with the
+    delay of the task doubled on every retry up to `max_retry_delay` if it's given. Once
+    the retries are exhausted `on_failure` is called with the id of the live video.
+    """
+    live = _get_live(live_id)
+
+    if live.state != state or step in getattr(live, steps_field):
+        return
+
+    try:
+        fields = run(live)
+    except Exception as e:
+        if task.request.retries >= task.max_retries:
+            logger.exception(f'Error running the {step} step of the live video {live.video_id}')
+            if on_failure:
+                on_failure(live_id)
+        countdown = None
+        if max_retry_delay is not None:
+            countdown = min(task.default_retry_delay * 2 ** task.request.retries, max_retry_delay)
+        raise task.retry(exc=e, countdown=countdown)
+
+    # Steps run at the same time, each one only saves its own fields
+    with transaction.atomic():
+        live = LiveVideo.objects.select_for_update().get(pk=live_id)
+        for name, value in fields.items():
+            setattr(live, name, value)
+        getattr(live, steps_field).append(step)
+        live.save(update_fields=[*fields, steps_field])
+
+
+def _run_teardown_step(task, live_id, step, run, max_retry_delay=None):
+    # A failed teardown stays in the deleting state, deleting again resumes it
+    _run_step(task, live_id, step, run, LiveVideo.State.DELETING, 'teardown_steps',
+              max_retry_delay=max_retry_delay)
+
+
+def _provisioning_failed(live_id):
+    with transaction.atomic():
+        live = LiveVideo.objects.select_for_update().get(pk=live_id)
+        try:
+            live.to_provisioning_failed()
+        except TransitionNotAllowed:
+            # Another step has already failed
+            pass
+
+
+def _create_input(live):
+    response = medialive.create_input(live)
+
+    return {
+        'ml_input_id': response['Input']['Id'],
+        'ml_input_url': response['Input']['Destinations'][0]['Url'],
+    }
+
+
+def _create_channel(live):
+    response = medialive.create_channel(live, {'Input': {'Id': live.ml_input_id}})
+
+    return {'ml_channel_arn': response['Channel']['Arn']}
+
+
+def _create_alerts(live):
+    medialive.alert_service(live)
+
+    return {'sns_topic_arn': live.sns_topic_arn}
+
+
+def _create_distribution(live):
+    bucket_name = live.organization.bucket_name
+
+    # The caller reference is unique for the live video, so retries get the same distribution
+    cf_settings = {
+        'id': bucket_name,
+        'domain': f"{bucket_name}.s3.amazonaws.com",
+        'path': f"/live/{live.video_id}",
+        'target': bucket_name,
+        'caller': f'live-{live.video_id}',
+        'defaultTTL': 5,
+        'maxTTL': 10,
+    }
+    distribution = cloudfront.create_distribution(cf_settings, live.organization, live.channel)
+
+    return {'cf_id': distribution['cf_id'], 'cf_domain': distribution['cf_domain']}
+
+
+def _delete_channel(live):
+    if live.ml_channel_arn:
+        try:
+            medialive.delete_channel(live.ml_channel_id(),
+                                     live.organization.aws_account.account_id)
+        except medialive.ChannelNotFoundException:
+            pass
+
+    return {}
+
+
+def _delete_input(live):
+    # Raises a ConflictException, and is retried with backoff, until the channel is deleted
+    if live.ml_input_id:
+        medialive.delete_input(live.ml_input_id, live.organization.aws_account.account_id)
+
+    return {}
+
+
+def _delete_rule_targets(live):
+    try:
+        cloudwatchevents.remove_targets(live)
+    except cloudwatchevents.EventsNotFoundException:
+        pass
+
+    return {}
+
+
+def _delete_rule(live):
+    try:
+        cloudwatchevents.delete_rule(live)
+    except cloudwatchevents.EventsNotFoundException:
+        pass
+
+    return {}
+
+
+def _delete_topic(live):
+    if live.sns_topic_arn:
+        sns.unsubscribe_all(live)
+        sns.delete_topic(live)
+
+    return {}
+
+
+def _disable_distribution(live):
+    if live.cf_id:
+        cloudfront.update_distribution(live.organization, live.cf_id, False)
+
+    return {}
+
+
+@shared_task(bind=True, max_retries=settings.LIVE_PROVISIONING_MAX_RETRIES,
+             default_retry_delay=settings.LIVE_PROVISIONING_RETRY_DELAY)
+def provision_input(self, live_id):
+    _run_step(self, live_id, INPUT, _create_input, on_failure=_provisioning_failed)
+
+
+@shared_task(bind=True, max_retries=settings.LIVE_PROVISIONING_MAX_RETRIES,
+             default_retry_delay=settings.LIVE_PROVISIONING_RETRY_DELAY)
+def provision_channel(self, live_id):
+    _run_step(self, live_id, CHANNEL, _create_channel, on_failure=_provisioning_failed)
+
+
+@shared_task(bind=True, max_retries=settings.LIVE_PROVISIONING_MAX_RETRIES,
+             default_retry_delay=settings.LIVE_PROVISIONING_RETRY_DELAY)
+def provision_alerts(self, live_id):
+    _run_step(self, live_id, ALERTS, _create_alerts, on_failure=_provisioning_failed)
+
+
+@shared_task(bind=True, max_retries=settings.LIVE_PROVISIONING_MAX_RETRIES,
+             default_retry_delay=settings.LIVE_PROVISIONING_RETRY_DELAY)
+def provision_distribution(self, live_id):
+    _run_step(self, live_id, DISTRIBUTION, _create_distribution,
+              on_failure=_provisioning_failed)
+
+
+@shared_task
+def finish_live_provisioning(live_id):
+    """
+    Make the live video available once all the steps are done.
+    """
+    with transaction.atomic():
+        live = LiveVideo.objects.select_for_update().get(pk=live_id)
+
+        done = set(STEPS) <= set(live.provisioned_steps)
+
+        if live.state == LiveVideo.State.PROVISIONING and done:
+            live.to_provisioned()
+
+
+@shared_task(bind=True, max_retries=settings.LIVE_PROVISIONING_MAX_RETRIES,
+             default_retry_delay=settings.LIVE_PROVISIONING_RETRY_DELAY)
+def delete_live_channel(self, live_id):
+    _run_teardown_step(self, live_id, CHANNEL, _delete_channel)
+
+
+@shared_task(bind=True, max_retries=settings.LIVE_INPUT_DELETION_MAX_RETRIES,
+             default_retry_delay=settings.LIVE_INPUT_DELETION_RETRY_DELAY)
+def delete_live_input(self, live_id):
+    _run_teardown_step(self, live_id, INPUT, _delete_input,
+                       max_retry_delay=settings.LIVE_INPUT_DELETION_MAX_RETRY_DELAY)
+
+
+@shared_task(bind=True, max_retries=settings.LIVE_PROVISIONING_MAX_RETRIES,
+             default_retry_delay=settings.LIVE_PROVISIONING_RETRY_DELAY)
+def delete_live_rule_targets(self, live_id):
+    _run_teardown_step(self, live_id, RULE_TARGETS, _delete_rule_targets)
+
+
+@shared_task(bind=True, max_retries=settings.LIVE_PROVISIONING_MAX_RETRIES,
+             default_retry_delay=settings.LIVE_PROVISIONING_RETRY_DELAY)
+def delete_live_rule(self, live_id):
+    _run_teardown_step(self, live_id, RULE, _delete_rule)
+
+
+@shared_task(bind=True, max_retries=settings.LIVE_PROVISIONING_MAX_RETRIES,
+             default_retry_delay=settings.LIVE_PROVISIONING_RETRY_DELAY)
+def delete_live_topic(self, live_id):
+    _run_teardown_step(self, live_id, TOPIC, _delete_topic)
+
+
+@shared_task(bind=True, max_retries=settings.LIVE_PROVISIONING_MAX_RETRIES,
+             default_retry_delay=settings.LIVE_PROVISIONING_RETRY_DELAY)
+def disable_live_distribution(self, live_id):
+    _run_teardown_step(self, live_id, DISTRIBUTION, _disable_distribution)
+
+
+@shared_task
+def finish_live_teardown(live_id):
+    """
+    Delete the distribution once all the steps are done, the live video is deleted with
+    it. Live videos without a distribution are deleted right away.
+    """
+    live = _get_live(live_id)
+
+    if live.state != LiveVideo.State.DELETING or \
+            not set(TEARDOWN_STEPS) <= set(live.teardown_steps):
+        return
+
+    if live.cf_id:
+        cloudfront._delete_cloudfront_distribution.delay(
+            live.cf_id, live.organization.aws_account.account_id, live.video_id)
+    else:
+        live.delete()
@@ -0,0 +1,112 @@
+"""
+Bulk transitions of media, run in the background.
+
+The transitions of a batch are fanned out as Celery chains: the videos of each AWS
+account are split in at most `BULK_TRANSITION_CONCURRENCY` chains, so no more than
+that many transcodes, S3 deletes and CloudFront invalidations run at the same time
+for an account. The batch and the result of every video are kept in the cache.
+"""
+import logging
+import uuid
+from collections import defaultdict
+
+from celery import chain, shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django_fsm import TransitionNotAllowed
+
+from video.models import Media
+
+logger = logging.getLogger(__name__)
+
+BATCH_KEY = 'bulk_transition:{}'
+RESULT_KEY = 'bulk_transition:{}:{}'
+
+TRANSITIONS = (
+    'to_queued',
+    'to_queued_failed',
+    'to_processing',
+    'to_processing_failed',
+    'to_finished',
+    're_process',
+)
+
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+def start_bulk_transition(organization_id, transition, videos):
+    """
+    Enqueue `transition` for `videos`, a list of (video_id, aws_account_id) pairs, and
+    return the id of the batch.
+    """
+    batch_id = str(uuid.uuid4())
+
+    cache.set(BATCH_KEY.format(batch_id), {
+        'organization_id': organization_id,
+        'transition': transition,
+        'video_ids': [video_id for video_id, _ in videos],
+    }, settings.BULK_TRANSITION_TIMEOUT)
+
+    by_account = defaultdict(list)
+    for video_id, aws_account_id in videos:
+        by_account[aws_account_id].append(video_id)
+
+    for video_ids in by_account.values():
+        for number in range(min(settings.BULK_TRANSITION_CONCURRENCY, len(video_ids))):
+            chain(
+                transition_media.si(batch_id, video_id, transition)
+                for video_id in video_ids[number::settings.BULK_TRANSITION_CONCURRENCY]
+            ).apply_async()
+
+    return batch_id
+
+
+def get_bulk_transition(batch_id):
+    """
+    Return the progress of a batch, or None if it doesn't exist or has expired.
+    """
+    batch = cache.get(BATCH_KEY.format(batch_id))
+
+    if batch is None:
+        return None
+
+    keys = {RESULT_KEY.format(batch_id, video_id): video_id for video_id in batch['video_ids']}
+    results = {keys[key]: result for key, result in cache.get_many(keys).items()}
+
+    errors = {video_id: result['error'] for video_id, result in results.items()
+              if result['status'] == FAILED}
+
+    return {
+        'organization_id': batch['organization_id'],
+        'batch_id': batch_id,
+        'transition': batch['transition'],
+        'total': len(batch['video_ids']),
+        'pending': len(batch['video_ids']) - len(results),
+        'succeeded': len(results) - len(errors),
+        'failed': len(errors),
+        'errors': errors,
+    }
+
+
+@shared_task
+def transition_media(batch_id, video_id, transition):
+    """
+    Apply `transition` to a video and store the result. Errors are stored instead of
+    raised, so the rest of the chain still runs.
+    """
+    result = {'status': SUCCEEDED}
+
+    try:
+        media = Media.objects.select_related('organization__aws_account', 'channel') \
+            .get(video_id=video_id)
+        getattr(media, transition)()
+    except TransitionNotAllowed:
+        result = {'status': FAILED, 'error': 'Cannot be changed to the entered state.'}
+    except Media.DoesNotExist:
+        result = {'status': FAILED, 'error': 'The video does not exist.'}
+    except Exception:
+        logger.exception(f'Error applying {transition} to the video {video_id}')
+        result = {'status': FAILED, 'error': 'Error applying the transition.'}
+
+    cache.set(RESULT_KEY.format(batch_id, video_id), result, settings.BULK_TRANSITION_TIMEOUT)
@@ -0,0 +1,123 @@
+"""
+Minimal Django cache backend on top of the `redis` client already used by Celery.
+
+Values are pickled, so anything that can be stored in the local memory cache can
+be stored here too. Only the operations used by the project are optimized; the
+rest of the `BaseCache` API falls back to the default implementations.
+"""
+import pickle
+
+import redis
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+
+
+class RedisCache(BaseCache):
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        self._server = server
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = redis.Redis.from_url(self._server)
+        return self._client
+
+    def _timeout(self, timeout):
+        """
+        Translate a Django timeout into milliseconds for Redis. `None` means no
+        expiration, and a non-positive value means the key expires right away.
+        """
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return None
+        return max(int(timeout * 1000), 0)
+
+    @staticmethod
+    def _dumps(value):
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _loads(value):
+        return None if value is None else pickle.loads(value)
+
+    def _key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        if timeout == 0:
+            return False
+        return bool(self.client.set(self._key(key, version), self._dumps(value),
+                                    px=timeout, nx=True))
+
+    def get(self, key, default=None, version=None):
+        value = self.client.get(self._key(key, version))
+        return default if value is None else self._loads(value)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        timeout = self._timeout(timeout)
+        if timeout == 0:
+            self.client.delete(key)
+        else:
+            self.client.set(key, self._dumps(value), px=timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        timeout = self._timeout(timeout)
+        if timeout is None:
+            return bool(self.client.persist(key)) or bool(self.client.exists(key))
+        return bool(self.client.pexpire(key, timeout))
+
+    def delete(self, key, version=None):
+        self.client.delete(self._key(key, version))
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self.client.mget([self._key(key, version) for key in keys])
+        return {key: self._loads(value) for key, value in zip(keys, values) if value is not None}
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        pipeline = self.client.pipeline()
+        for key, value in data.items():
+            key = self._key(key, version)
+            if timeout == 0:
+                pipeline.delete(key)
+            else:
+                pipeline.set(key, self._dumps(value), px=timeout)
+        pipeline.execute()
+        return []
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            self.client.delete(*keys)
+
+    def has_key(self, key, version=None):
+        return bool(self.client.exists(self._key(key, version)))
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        if not self.client.exists(key):
+            raise ValueError("Key '%s' not found" % key)
+        # Values are pickled, so the counter can't be updated with INCRBY in place
+        ttl = self.client.pttl(key)
+        value = self._loads(self.client.get(key)) + delta
+        self.client.set(key, self._dumps(value), px=ttl if ttl > 0 else None)
+        return value
+
+    def clear(self):
+        prefix = self.make_key('*')
+        for key in self.client.scan_iter(match=prefix):
+            self.client.delete(key)
+
+    def close(self, **kwargs):
+        # The connection pool is reused between requests
+        pass
@@ -12,6 +12,8 @@ app.conf.task_default_exchange = 'default'
 app.conf.task_default_routing_key = 'default'
 
 app.autodiscover_tasks()
+# Background provisioning of AWS resources, in the provisioning modules of the apps
+app.autodiscover_tasks(related_name='provisioning')
 
 
 @app.task(bind=True)
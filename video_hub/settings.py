@@ -149,6 +149,91 @@ else:
         }
     }
 
+# Cache
+# https://docs.djangoproject.com/en/2.1/topics/cache/
+# The cache is shared with the Celery workers, which store there the progress of background
+# operations, so Redis is required outside of the tests, see CONFIGURATION.md
+
+if REDIS_URL and not TESTING_MODE:
+    CACHES = {
+        'default': {
+            'BACKEND': 'video_hub.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'vh',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Embed player data is invalidated on every change, the timeout only bounds staleness
+EMBED_CACHE_TIMEOUT = int(os.getenv('EMBED_CACHE_TIMEOUT', 300))
+
+# Snapshots of finished media, channels and organizations are rebuilt on every change
+EMBED_SNAPSHOT_TIMEOUT = int(os.getenv('EMBED_SNAPSHOT_TIMEOUT', 7 * 24 * 60 * 60))
+
+# Cache-Control max-age of embed pages for browsers and for shared caches (CDN, nginx)
+EMBED_BROWSER_MAX_AGE = int(os.getenv('EMBED_BROWSER_MAX_AGE', 60))
+EMBED_SHARED_MAX_AGE = int(os.getenv('EMBED_SHARED_MAX_AGE', 300))
+
+# Dashboard counters are dropped when a video is saved or deleted, and only cached for a
+# short while, so the ones changed by queryset updates are never far behind
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', 30))
+
+# Rows fetched from the server-side cursor at a time by the streaming exports
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 2000))
+
+# Most media that can be created with a single bulk create request
+MEDIA_BULK_CREATE_MAX = int(os.getenv('MEDIA_BULK_CREATE_MAX', 500))
+
+# Bulk transitions: most media per request, transitions run at the same time for an AWS
+# account, and how long the progress of a batch is kept
+BULK_TRANSITION_MAX = int(os.getenv('BULK_TRANSITION_MAX', 1000))
+BULK_TRANSITION_CONCURRENCY = int(os.getenv('BULK_TRANSITION_CONCURRENCY', 4))
+BULK_TRANSITION_TIMEOUT = int(os.getenv('BULK_TRANSITION_TIMEOUT', 24 * 60 * 60))
+
+# Organization-wide CloudFront updates: distributions updated at the same time, attempts on
+# ETag conflicts, and how long the result of a batch is kept
+DISTRIBUTION_UPDATE_CONCURRENCY = int(os.getenv('DISTRIBUTION_UPDATE_CONCURRENCY', 8))
+DISTRIBUTION_UPDATE_ATTEMPTS = int(os.getenv('DISTRIBUTION_UPDATE_ATTEMPTS', 5))
+DISTRIBUTION_UPDATE_TIMEOUT = int(os.getenv('DISTRIBUTION_UPDATE_TIMEOUT', 24 * 60 * 60))
+
+# boto3 clients are shared by the whole process, see utils.aws
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv('AWS_MAX_POOL_CONNECTIONS', 25))
+AWS_MAX_ATTEMPTS = int(os.getenv('AWS_MAX_ATTEMPTS', 5))
+AWS_CONNECT_TIMEOUT = int(os.getenv('AWS_CONNECT_TIMEOUT', 10))
+AWS_READ_TIMEOUT = int(os.getenv('AWS_READ_TIMEOUT', 60))
+
+# MediaConvert endpoint discovered for the default credentials, it's refreshed on errors
+MEDIA_CONVERT_ENDPOINT_TIMEOUT = int(os.getenv('MEDIA_CONVERT_ENDPOINT_TIMEOUT',
+                                               30 * 24 * 60 * 60))
+
+# Configuration templates are invalidated when they are saved, the timeout only frees memory
+CONFIGURATION_CACHE_TIMEOUT = int(os.getenv('CONFIGURATION_CACHE_TIMEOUT', 24 * 60 * 60))
+
+# Jobs are tracked with their state change events, the reconciler only catches up on lost
+# events: it lists the jobs of each account, up to a number of pages. It runs every 5
+# minutes, the interval is changed on the "Reconcile MediaConvert Jobs" periodic task
+MEDIA_CONVERT_RECONCILE_MAX_PAGES = int(os.getenv('MEDIA_CONVERT_RECONCILE_MAX_PAGES', 10))
+
+# Live videos are provisioned and torn down in the background, every step is retried on
+# AWS errors
+LIVE_PROVISIONING_MAX_RETRIES = int(os.getenv('LIVE_PROVISIONING_MAX_RETRIES', 5))
+LIVE_PROVISIONING_RETRY_DELAY = int(os.getenv('LIVE_PROVISIONING_RETRY_DELAY', 10))
+
+# The MediaLive input can only be deleted once its channel is, which can take minutes, so
+# its deletion is retried for longer, doubling the delay up to a maximum
+LIVE_INPUT_DELETION_MAX_RETRIES = int(os.getenv('LIVE_INPUT_DELETION_MAX_RETRIES', 10))
+LIVE_INPUT_DELETION_RETRY_DELAY = int(os.getenv('LIVE_INPUT_DELETION_RETRY_DELAY', 10))
+LIVE_INPUT_DELETION_MAX_RETRY_DELAY = int(os.getenv('LIVE_INPUT_DELETION_MAX_RETRY_DELAY', 120))
+
+# Organization buckets and channel distributions are also provisioned in the background
+ORGANIZATION_PROVISIONING_MAX_RETRIES = int(os.getenv('ORGANIZATION_PROVISIONING_MAX_RETRIES', 5))
+ORGANIZATION_PROVISIONING_RETRY_DELAY = int(os.getenv('ORGANIZATION_PROVISIONING_RETRY_DELAY', 30))
+
 # ELASTIC APM
 ELASTIC_APM = {
     'DEBUG': APM_DEBUG,
@@ -248,6 +333,9 @@ CELERY_ALWAYS_EAGER = False
 
 CELERY_TASK_ROUTES = {
     'utils.mediaconvert.check_job_status': {'queue': 'transcode'},
+    'utils.mediaconvert._job_state_changed': {'queue': 'transcode'},
+    'utils.mediaconvert.reconcile_jobs': {'queue': 'transcode'},
+    'utils.mediaconvert._reconcile_account_jobs': {'queue': 'transcode'},
 }
 
 # Generic domains that are allowed to play the videos